@@ -0,0 +1,65 @@
+"""
+Asset ingestion benchmark
+Upserts N synthetic discovered assets through AssetIngestor, twice:
+the first pass inserts, the second hits ON CONFLICT and updates in place.
+
+Usage (needs DATABASE_URL pointing at a scratch Postgres):
+    cd backend/api_service
+    python -m benchmarks.bench_asset_ingest --assets 100000 --batch-size 1000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import delete
+
+from models.asset_models import Asset
+from utils.asset_ingest import AssetIngestor
+from utils.database import AsyncSessionLocal, init_db, close_db
+
+
+def synthetic_assets(user_id: str, count: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "user_id": user_id,
+            "name": f"host-{i}.sub{i % 97}.bench.example.com",
+            "type": "domain" if i % 4 else "ip",
+            "risk_score": rng.randint(0, 100),
+            "last_seen": f"2024-01-{1 + seed % 28:02d}T00:00:00",
+            "tags": ["discovered"],
+        }
+
+
+async def run_pass(label: str, user_id: str, count: int, batch_size: int, seed: int):
+    start = time.perf_counter()
+    async with AssetIngestor(batch_size=batch_size) as ingestor:
+        await ingestor.add_many(synthetic_assets(user_id, count, seed))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {ingestor.total:>8} rows  {elapsed:8.2f}s  {ingestor.total / elapsed:10.0f} rows/s")
+
+
+async def main(args):
+    await init_db()
+    user_id = args.user_id
+
+    try:
+        await run_pass("insert", user_id, args.assets, args.batch_size, seed=1)
+        await run_pass("update", user_id, args.assets, args.batch_size, seed=2)
+    finally:
+        if not args.keep:
+            async with AsyncSessionLocal() as session:
+                await session.execute(delete(Asset).where(Asset.user_id == user_id))
+                await session.commit()
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--assets", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--user-id", required=True, help="existing users.id (assets.user_id has a FK)")
+    parser.add_argument("--keep", action="store_true", help="do not delete benchmark rows")
+    asyncio.run(main(parser.parse_args()))
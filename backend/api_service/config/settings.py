@@ -35,6 +35,31 @@ class Settings:
     RABBITMQ_PORT: int = int(os.getenv("RABBITMQ_PORT", "5672"))
     RABBITMQ_USER: str = os.getenv("RABBITMQ_USER", "guest")
     RABBITMQ_PASSWORD: str = os.getenv("RABBITMQ_PASSWORD", "guest")
+    QUEUE_CHANNEL_POOL_SIZE: int = int(os.getenv("QUEUE_CHANNEL_POOL_SIZE", "8"))
+    QUEUE_PUBLISHER_CONFIRMS: bool = (
+        os.getenv("QUEUE_PUBLISHER_CONFIRMS", "True").lower() == "true"
+    )
+    QUEUE_CONFIRM_BATCH_SIZE: int = int(os.getenv("QUEUE_CONFIRM_BATCH_SIZE", "100"))
+    QUEUE_CODEC: str = os.getenv("QUEUE_CODEC", "orjson")   # json | orjson | msgpack
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+    OUTBOX_POLL_INTERVAL: float = float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "20"))   # then parked
+    OUTBOX_BACKOFF_BASE: float = float(os.getenv("OUTBOX_BACKOFF_BASE", "1"))   # seconds, doubled per attempt
+    OUTBOX_BACKOFF_MAX: float = float(os.getenv("OUTBOX_BACKOFF_MAX", "300"))
+    RESULTS_MAX_RETRIES: int = int(os.getenv("RESULTS_MAX_RETRIES", "5"))   # transient failures per chunk
+    RESULTS_RETRY_DELAYS: str = os.getenv("RESULTS_RETRY_DELAYS", "1,5,30")   # seconds per retry tier
+
+    # -------------------- ASM -------------------------
+    ASM_BULK_MAX_ITEMS: int = int(os.getenv("ASM_BULK_MAX_ITEMS", "1000"))
+    ASM_SHARD_SIZE: int = int(os.getenv("ASM_SHARD_SIZE", "500"))   # targets per fan-out sub-job
+    ASM_MAX_SHARDS: int = int(os.getenv("ASM_MAX_SHARDS", "256"))   # shards grow beyond ASM_SHARD_SIZE to stay under
+    ASM_MAX_TARGET_ADDRESSES: int = int(os.getenv("ASM_MAX_TARGET_ADDRESSES", str(2 ** 24)))   # a /8
+    ASSET_INGEST_BATCH_SIZE: int = int(os.getenv("ASSET_INGEST_BATCH_SIZE", "1000"))
+    ASSET_INGEST_FLUSH_INTERVAL: float = float(os.getenv("ASSET_INGEST_FLUSH_INTERVAL", "2.0"))
+
+    # -------------------- Scheduler -------------------
+    SCHEDULER_BATCH_SIZE: int = int(os.getenv("SCHEDULER_BATCH_SIZE", "100"))
+    SCHEDULER_POLL_INTERVAL: float = float(os.getenv("SCHEDULER_POLL_INTERVAL", "5.0"))
 
     # -------------------- JWT -------------------------
     SECRET_KEY: str = os.getenv(
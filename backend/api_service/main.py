@@ -1,10 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config.settings import settings
-from utils.database import init_db, close_db 
+from utils.database import init_db, close_db, engine
+from utils.asset_ingest import ensure_upsert_index
 from utils.redis_client import  close_redis
-from utils.queue import close_queue, get_queue_connection
+from utils.queue import close_queue, get_queue_connection, get_publish_stats
 from utils.clickhouse_client import close_clickhouse, get_clickhouse
+from utils.outbox import start_outbox_relay, stop_outbox_relay, ensure_outbox_schema
+from utils.results_consumer import start_results_consumer, stop_results_consumer
+from utils.metrics import registry
 
 # Import all routes
 from routes import auth, users, profile, accounts, billing, services, asm, vs, settings_route, activity, assets, tasks
@@ -31,8 +35,20 @@ async def startup_event():
     """Initialize connections on startup"""
     try:
         await init_db()
+        # Dedupe existing assets and add the (user_id, type, name) unique index
+        async with engine.begin() as conn:
+            await ensure_upsert_index(conn)
+        # Backoff column on an outbox table created before it existed
+        async with engine.begin() as conn:
+            await ensure_outbox_schema(conn)
     except Exception as e:
         print(f"Warning: Database initialization failed: {e}")
+
+    # Relay queue messages staged in the outbox table
+    await start_outbox_relay()
+
+    # Apply worker result chunks as they stream in
+    await start_results_consumer()
     
     # Initialize other connections (optional)
     try:
@@ -46,6 +62,8 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close connections on shutdown"""
+    await stop_outbox_relay()
+    await stop_results_consumer()
     await close_db()
     await close_redis()
     await close_queue()
@@ -61,6 +79,14 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "queue": {"publisher": get_publish_stats()},
+        "outbox": registry.snapshot("outbox."),
+        "results": registry.snapshot("results."),
+    }
+
 # ==================== REGISTER ALL ROUTES ====================
 
 app.include_router(auth.router)
@@ -1,6 +1,6 @@
 # models/asm_models.py
 import uuid
-from sqlalchemy import Column, String, DateTime, Enum, JSON
+from sqlalchemy import Column, String, DateTime, Enum, JSON, Index, Integer
 from sqlalchemy.sql import func
 
 from utils.database import Base
@@ -52,6 +52,11 @@ class AsmDiscovery(Base):
         onupdate=func.now(),
     )
 
+    # Scheduler claims: status IN (...) AND next_run_at <= now ORDER BY next_run_at
+    __table_args__ = (
+        Index("ix_asm_discoveries_status_next_run", "status", "next_run_at"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -110,3 +115,37 @@ class AsmDiscoveryRun(Base):
             "summary": self.summary,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class AsmDiscoveryRunJob(Base):
+    """
+    Progress of one job (fan-out shard) of a run, fed by its result
+    chunks; kept out of the run's summary so a run with many shards
+    does not rewrite all of them on every chunk
+    """
+    __tablename__ = "asm_discovery_run_jobs"
+
+    id = Column(String, primary_key=True)   # job_id ("<run_id>.<shard>" for shards)
+    run_id = Column(String, nullable=False, index=True)
+
+    # Result stream attempt nonce; earlier (abandoned) attempts in superseded
+    attempt = Column(String, nullable=True)
+    superseded = Column(JSON, nullable=True)
+
+    seqs = Column(JSON, nullable=False, default=list)   # applied chunk seqs
+    final_seq = Column(Integer, nullable=True)
+    status = Column(
+        Enum("RUNNING", "COMPLETED", "FAILED", name="asm_run_job_status"),
+        default="RUNNING",
+    )
+    error = Column(String, nullable=True)
+
+    counts = Column(JSON, nullable=True)    # items per stage, for backing out an abandoned attempt
+    summary = Column(JSON, nullable=True)   # the worker's final summary
+
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    @property
+    def done(self) -> bool:
+        return self.final_seq is not None and len(self.seqs or []) == self.final_seq + 1
@@ -2,7 +2,7 @@
 SQLAlchemy Models for Assets
 """
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text, Index
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql import func
 import uuid
@@ -46,6 +46,11 @@ class Asset(Base):
         nullable=False,
     )
 
+    # Canonical key for bulk upserts (utils/asset_ingest.py)
+    __table_args__ = (
+        Index("uq_assets_user_type_name", "user_id", "type", "name", unique=True),
+    )
+
     def __repr__(self) -> str:
         return f"<Asset id={self.id} name={self.name} type={self.type}>"
 
@@ -0,0 +1,69 @@
+# models/outbox_models.py
+import uuid
+from sqlalchemy import Column, String, DateTime, Integer, JSON, Index
+from sqlalchemy.sql import func
+
+from utils.database import Base
+
+
+class OutboxMessage(Base):
+    """
+    Queue message written in the same transaction as the business row.
+    The outbox relay publishes pending rows and deletes them once the
+    broker has confirmed them (at-least-once delivery).
+    """
+    __tablename__ = "queue_outbox"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    queue_name = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String, nullable=True)
+    # Backoff after a failed publish; NULL = due now
+    next_attempt_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_queue_outbox_created_at", "created_at"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "queue_name": self.queue_name,
+            "payload": self.payload,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class OutboxParkedMessage(Base):
+    """
+    Outbox row that failed OUTBOX_MAX_ATTEMPTS publishes. Moved out of
+    queue_outbox so the relay stops retrying it; kept for inspection.
+    """
+    __tablename__ = "queue_outbox_parked"
+
+    id = Column(String, primary_key=True)
+    queue_name = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, nullable=False)
+    parked_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "queue_name": self.queue_name,
+            "payload": self.payload,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "parked_at": self.parked_at.isoformat() if self.parked_at else None,
+        }
@@ -1,13 +1,21 @@
 # api/asm.py
 
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert
 from datetime import datetime
+import uuid
+
+from config.settings import settings
 
 from utils.database import get_db
-from utils.queue import publish_message
+from utils.outbox import enqueue_message, enqueue_messages, notify_outbox
+from utils.lanes import asm_trigger_queue
+from utils.schedule import next_fire_time
+from utils.fanout import needs_sharding, stage_sharded_run
 from utils.auth_utils import get_current_user
+from utils.portset import HostPortMap
 from models.asm_models import (
     AsmDiscovery as AsmDiscoveryModel,
     AsmDiscoveryRun as AsmDiscoveryRunModel,
@@ -16,9 +24,12 @@ from models.asm_models import (
 # -------------------- Schemas -------------------- #
 from schemas.asm_schema import (
     AsmDiscoveryCreateRequest,
+    AsmDiscoveryBulkCreateRequest,
+    AsmDiscoveryBulkCreateResponse,
     AsmDiscoveryUpdateRequest,
     AsmDiscoveryResponse,
     AsmDiscoveryListResponse,
+    AsmRunPortDiffResponse,
     AsmDashboardResponse,
 )
 
@@ -26,6 +37,21 @@ from schemas.asm_schema import (
 router = APIRouter(prefix="/api/v1/asm", tags=["ASM"])
 
 
+# ---------------------------------------------------
+# Trigger message
+# ---------------------------------------------------
+def build_trigger_message(user_id: str, discovery_id: str, payload: AsmDiscoveryCreateRequest) -> dict:
+    return {
+        "user_id": user_id,
+        "asm_discovery_id": discovery_id,
+        "asset_type": payload.asset_type,
+        "target_source": payload.target_source,
+        "intensity": payload.intensity,
+        # Distinguishes this trigger from later runs of the same discovery
+        "run_nonce": uuid.uuid4().hex,
+    }
+
+
 # ---------------------------------------------------
 # Create Discovery
 # ---------------------------------------------------
@@ -35,6 +61,8 @@ async def create_discovery(
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
+    # The first run is triggered right away; the scheduler takes the
+    # following INTERVAL / CRON runs from next_run_at
     discovery = AsmDiscoveryModel(
         user_id=current_user["user_id"],
         name=payload.name,
@@ -45,35 +73,128 @@ async def create_discovery(
         intensity=payload.intensity,
         schedule_type=payload.schedule_type,
         schedule_value=payload.schedule_value,
-        next_run_at=datetime.utcnow(),
+        next_run_at=next_fire_time(payload.schedule_type, payload.schedule_value, datetime.utcnow()),
         status="PENDING",
     )
 
     # add() is NOT async
     db.add(discovery)
+
+    # Flush to get the discovery id, then stage the trigger message in the
+    # same transaction; the outbox relay publishes it after commit
+    await db.flush()
+
+    if needs_sharding(discovery):
+        # Large target sets fan out to asm.jobs sub-jobs
+        await stage_sharded_run(db, discovery, triggered_by="API", run_mode="QUICK")
+    else:
+        queue_message = build_trigger_message(current_user["user_id"], discovery.id, payload)
+
+        queue_name = asm_trigger_queue(payload.intensity, payload.schedule_type, triggered_by="API")
+
+        enqueue_message(db, queue_name, queue_message)
+
     await db.commit()
     await db.refresh(discovery)
+    notify_outbox()
 
     discovery_data = discovery.to_dict()
 
-    # PUSH TO QUEUE
-    queue_message = {
-        "user_id": current_user["user_id"],
-        "asm_discovery_id": discovery_data["id"],
-        "asset_type": payload.asset_type,
-        "target_source": payload.target_source,
-        "intensity": payload.intensity,
-    }
+    return discovery_data
 
-    queue_name = "asm.triggers"
 
-    if not await publish_message(queue_name, queue_message):
+# ---------------------------------------------------
+# Bulk Create Discoveries
+# ---------------------------------------------------
+@router.post("/discoveries:bulk", response_model=AsmDiscoveryBulkCreateResponse)
+async def bulk_create_discoveries(
+    payload: AsmDiscoveryBulkCreateRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Validate every item, insert the valid ones with one multi-row INSERT
+    and stage all trigger messages in the outbox in the same transaction.
+    The outbox relay publishes them on one channel with batched confirms.
+    """
+    if len(payload.items) > settings.ASM_BULK_MAX_ITEMS:
         raise HTTPException(
-            status_code=500,
-            detail="Not able to schedule this discovery",
+            status_code=413,
+            detail=f"At most {settings.ASM_BULK_MAX_ITEMS} discoveries per request",
         )
 
-    return discovery_data
+    user_id = current_user["user_id"]
+    now = datetime.utcnow()
+
+    results = [None] * len(payload.items)
+    rows = []
+    valid = []
+
+    for index, item in enumerate(payload.items):
+        try:
+            request = AsmDiscoveryCreateRequest.model_validate(item)
+        except ValidationError as e:
+            results[index] = {
+                "index": index,
+                "status": "error",
+                "errors": [
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}"
+                    for err in e.errors()
+                ],
+            }
+            continue
+
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "name": request.name,
+            "asset_type": request.asset_type,
+            "target_source": request.target_source,
+            "asset_ids": request.asset_ids,
+            "manual_targets": request.manual_targets,
+            "intensity": request.intensity,
+            "schedule_type": request.schedule_type,
+            "schedule_value": request.schedule_value,
+            "next_run_at": next_fire_time(request.schedule_type, request.schedule_value, now),
+            "status": "PENDING",
+        })
+        valid.append((index, request))
+
+    if rows:
+        created = await db.scalars(
+            insert(AsmDiscoveryModel).returning(
+                AsmDiscoveryModel, sort_by_parameter_order=True
+            ),
+            rows,
+        )
+        discoveries = created.all()
+
+        triggers = []
+        for discovery, (_, request) in zip(discoveries, valid):
+            if needs_sharding(discovery):
+                await stage_sharded_run(db, discovery, triggered_by="API", run_mode="QUICK")
+                continue
+            triggers.append((
+                asm_trigger_queue(request.intensity, request.schedule_type, triggered_by="API"),
+                build_trigger_message(user_id, discovery.id, request),
+            ))
+        await enqueue_messages(db, triggers)
+
+        await db.commit()
+        notify_outbox()
+
+        for discovery, (index, _) in zip(discoveries, valid):
+            results[index] = {
+                "index": index,
+                "status": "created",
+                "discovery": discovery.to_dict(),
+            }
+
+    return AsmDiscoveryBulkCreateResponse(
+        items=results,
+        created=len(rows),
+        failed=len(payload.items) - len(rows),
+    )
 
 
 # ---------------------------------------------------
@@ -137,9 +258,18 @@ async def update_discovery(
     if not discovery:
         raise HTTPException(status_code=404, detail="Discovery not found")
 
-    for key, value in payload.dict(exclude_unset=True).items():
+    changes = payload.dict(exclude_unset=True)
+    for key, value in changes.items():
         setattr(discovery, key, value)
 
+    if changes.keys() & {"schedule_type", "schedule_value"}:
+        try:
+            discovery.next_run_at = next_fire_time(
+                discovery.schedule_type, discovery.schedule_value, datetime.utcnow()
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
     await db.commit()
     await db.refresh(discovery)
 
@@ -171,6 +301,65 @@ async def delete_discovery(
 
     return discovery.to_dict()  
 
+# ---------------------------------------------------
+# Run Port Diff
+# ---------------------------------------------------
+@router.get(
+    "/discoveries/{discovery_id}/runs/{run_id}/port-diff",
+    response_model=AsmRunPortDiffResponse,
+)
+async def run_port_diff(
+    discovery_id: str,
+    run_id: str,
+    against: str | None = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Ports opened / closed between two runs, from their port bitsets.
+    Defaults to the previous completed run of the same discovery.
+    """
+    runs_query = select(AsmDiscoveryRunModel).where(
+        AsmDiscoveryRunModel.asm_discovery_id == discovery_id,
+        AsmDiscoveryRunModel.user_id == current_user["user_id"],
+    )
+
+    result = await db.execute(runs_query.where(AsmDiscoveryRunModel.id == run_id))
+    run = result.scalar_one_or_none()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    if against:
+        result = await db.execute(runs_query.where(AsmDiscoveryRunModel.id == against))
+        previous = result.scalar_one_or_none()
+        if not previous:
+            raise HTTPException(status_code=404, detail="Comparison run not found")
+    else:
+        result = await db.execute(
+            runs_query
+            .where(
+                AsmDiscoveryRunModel.status == "COMPLETED",
+                AsmDiscoveryRunModel.started_at < run.started_at,
+            )
+            .order_by(AsmDiscoveryRunModel.started_at.desc())
+            .limit(1)
+        )
+        previous = result.scalar_one_or_none()
+
+    current_ports = HostPortMap.deserialize((run.summary or {}).get("ports"))
+    previous_ports = HostPortMap.deserialize((previous.summary or {}).get("ports") if previous else None)
+    diff = current_ports.diff(previous_ports)
+
+    return AsmRunPortDiffResponse(
+        run_id=run.id,
+        against_run_id=previous.id if previous else None,
+        opened=diff["opened"],
+        closed=diff["closed"],
+        hosts=len(current_ports),
+        open_ports=current_ports.pairs(),
+    )
+
+
 # ---------------------------------------------------
 # Dashboard
 # ---------------------------------------------------
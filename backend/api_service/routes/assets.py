@@ -3,10 +3,12 @@ from pydantic import BaseModel
 from typing import List, Optional, Literal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, not_
+from sqlalchemy.exc import IntegrityError
 
 from utils.database import get_db
 from utils.auth_utils import get_current_user
 from models.asset_models import Asset as AssetModel
+from utils.asset_ingest import canonical_name
 
 
 # -------------------- Schemas --------------------
@@ -76,7 +78,7 @@ async def create_asset(
 ):
     asset = AssetModel(
         user_id=current_user["user_id"],
-        name=payload.name,
+        name=canonical_name(payload.name),
         type=payload.type,
         exposure=payload.exposure,
         tags=payload.tags or [],
@@ -86,7 +88,11 @@ async def create_asset(
     )
 
     db.add(asset)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Asset already exists")
     await db.refresh(asset)
 
     return asset.to_dict()
@@ -136,10 +142,17 @@ async def update_asset(
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
 
-    for key, value in payload.dict(exclude_unset=True).items():
+    updates = payload.dict(exclude_unset=True)
+    if updates.get("name") is not None:
+        updates["name"] = canonical_name(updates["name"])
+    for key, value in updates.items():
         setattr(asset, key, value)
 
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Asset already exists")
     await db.refresh(asset)
 
     return asset.to_dict()
@@ -0,0 +1,202 @@
+"""
+ASM Discovery Scheduler
+Fires due INTERVAL / CRON discoveries; run any number of replicas
+
+Each tick claims a batch of due discoveries with
+SELECT ... FOR UPDATE SKIP LOCKED (served by the (status, next_run_at)
+index) and, in the same transaction, creates their CRON runs, stages
+the trigger messages in the outbox and moves next_run_at forward.
+Replicas skip each other's locked rows and a committed claim is no
+longer due, so a fire time is never triggered twice.
+
+    cd backend/api_service
+    python scheduler.py
+"""
+
+import asyncio
+import logging
+import signal
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select, func, text
+
+from config.settings import settings
+from models.asm_models import AsmDiscovery, AsmDiscoveryRun
+from utils.database import AsyncSessionLocal, init_db, close_db
+from utils.fanout import needs_sharding, stage_sharded_run
+from utils.lanes import asm_trigger_queue
+from utils.metrics import registry
+from utils.outbox import enqueue_message, notify_outbox, start_outbox_relay, stop_outbox_relay
+from utils.queue import close_queue
+from utils.schedule import next_fire_time
+
+logger = logging.getLogger("scheduler")
+
+SCHEDULED_TYPES = ("INTERVAL", "CRON")
+SCHEDULABLE_STATUSES = ("ACTIVE", "PENDING")
+
+_fired = registry.counter("scheduler.fired")
+_invalid = registry.counter("scheduler.invalid_schedules")
+_tick_latency = registry.histogram("scheduler.tick_latency")
+
+
+def _due(now: datetime):
+    return (
+        AsmDiscovery.status.in_(SCHEDULABLE_STATUSES),
+        AsmDiscovery.next_run_at <= now,
+        AsmDiscovery.schedule_type.in_(SCHEDULED_TYPES),
+    )
+
+
+async def ensure_schedule_index(conn):
+    """
+    create_all() does not add indexes to an existing table
+    """
+    await conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_asm_discoveries_status_next_run "
+        "ON asm_discoveries (status, next_run_at)"
+    ))
+
+
+def build_scheduled_message(discovery: AsmDiscovery, run_id: str) -> dict:
+    return {
+        "user_id": discovery.user_id,
+        "asm_discovery_id": discovery.id,
+        "run_id": run_id,
+        "asset_type": discovery.asset_type,
+        "target_source": discovery.target_source,
+        "intensity": discovery.intensity,
+        "triggered_by": "CRON",
+        "run_nonce": uuid.uuid4().hex,
+    }
+
+
+# ---------------------------------------------------
+# Claim + fire one batch
+# ---------------------------------------------------
+async def fire_due(batch_size: int | None = None) -> int:
+    """
+    Claim up to batch_size due discoveries and fire them.
+    Returns number of discoveries claimed.
+    """
+    batch_size = batch_size or settings.SCHEDULER_BATCH_SIZE
+    now = datetime.utcnow()
+
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            result = await session.execute(
+                select(AsmDiscovery)
+                .where(*_due(now))
+                .order_by(AsmDiscovery.next_run_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            discoveries = result.scalars().all()
+
+            fired = 0
+            for discovery in discoveries:
+                try:
+                    next_run_at = next_fire_time(discovery.schedule_type, discovery.schedule_value, now)
+                except ValueError as e:
+                    # Stop claiming it until the schedule is fixed
+                    logger.warning("Discovery %s has an invalid schedule: %s", discovery.id, e)
+                    discovery.next_run_at = None
+                    _invalid.inc()
+                    continue
+
+                run = AsmDiscoveryRun(
+                    id=str(uuid.uuid4()),
+                    asm_discovery_id=discovery.id,
+                    user_id=discovery.user_id,
+                    triggered_by="CRON",
+                    run_mode="SCHEDULED",
+                    status="PENDING",
+                )
+                session.add(run)
+                if needs_sharding(discovery):
+                    await stage_sharded_run(session, discovery, "CRON", "SCHEDULED", run=run)
+                else:
+                    enqueue_message(
+                        session,
+                        asm_trigger_queue(discovery.intensity, discovery.schedule_type),
+                        build_scheduled_message(discovery, run.id),
+                    )
+
+                # Missed fire times are not replayed: the next one is after now
+                discovery.last_run_at = now
+                discovery.next_run_at = next_run_at
+                fired += 1
+
+    if fired:
+        notify_outbox()
+    _fired.inc(fired)
+    return len(discoveries)
+
+
+async def seconds_until_due() -> float:
+    """
+    Time until the earliest scheduled discovery is due (index-only min)
+    """
+    async with AsyncSessionLocal() as session:
+        earliest = await session.scalar(
+            select(func.min(AsmDiscovery.next_run_at)).where(
+                AsmDiscovery.status.in_(SCHEDULABLE_STATUSES),
+                AsmDiscovery.schedule_type.in_(SCHEDULED_TYPES),
+            )
+        )
+    if earliest is None:
+        return settings.SCHEDULER_POLL_INTERVAL
+    # Floor: rows still due here are locked by another replica's claim
+    return max((earliest - datetime.utcnow()).total_seconds(), 0.1)
+
+
+# ---------------------------------------------------
+# Loop
+# ---------------------------------------------------
+async def run_scheduler(stop_event: asyncio.Event):
+    while not stop_event.is_set():
+        try:
+            with _tick_latency.time():
+                claimed = await fire_due()
+            # Full batch: more may be due right now
+            if claimed >= settings.SCHEDULER_BATCH_SIZE:
+                continue
+            delay = min(await seconds_until_due(), settings.SCHEDULER_POLL_INTERVAL)
+        except Exception:
+            logger.exception("Scheduler tick failed")
+            delay = settings.SCHEDULER_POLL_INTERVAL
+
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            await ensure_schedule_index(await session.connection())
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    # Publish staged triggers from this process too (relays share via SKIP LOCKED)
+    await start_outbox_relay()
+    logger.info("Scheduler started (batch=%d)", settings.SCHEDULER_BATCH_SIZE)
+    try:
+        await run_scheduler(stop_event)
+    finally:
+        await stop_outbox_relay()
+        await close_queue()
+        await close_db()
+        logger.info("Scheduler stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
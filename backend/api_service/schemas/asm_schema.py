@@ -1,5 +1,9 @@
-from pydantic import BaseModel
-from typing import List, Optional, Literal
+from pydantic import BaseModel, model_validator
+from typing import List, Optional, Literal, Dict, Any
+
+from config.settings import settings
+from utils.schedule import validate_schedule
+from utils.targets import TargetSet
 
 
 # ---------------------------------------------------
@@ -17,6 +21,32 @@ class AsmDiscoveryCreateRequest(BaseModel):
     schedule_type: Literal["QUICK", "INTERVAL", "CRON"] = "QUICK"
     schedule_value: Optional[str] = None
 
+    @model_validator(mode="after")
+    def check_schedule(self):
+        validate_schedule(self.schedule_type, self.schedule_value)
+        return self
+
+    @model_validator(mode="after")
+    def normalize_targets(self):
+        # Deduplicated, canonical, CIDRs / ranges merged
+        if self.manual_targets:
+            targets = TargetSet.parse(self.manual_targets)
+            if targets.address_count > settings.ASM_MAX_TARGET_ADDRESSES:
+                raise ValueError(
+                    f"manual_targets cover {targets.address_count} addresses "
+                    f"(at most {settings.ASM_MAX_TARGET_ADDRESSES})"
+                )
+            self.manual_targets = targets.canonical()
+        return self
+
+
+# ---------------------------------------------------
+# Asm Discovery Bulk Create Request
+# ---------------------------------------------------
+class AsmDiscoveryBulkCreateRequest(BaseModel):
+    # Items are validated one by one so a bad item fails alone
+    items: List[Dict[str, Any]]
+
 
 # ---------------------------------------------------
 # Asm Discovery Update Request
@@ -59,6 +89,34 @@ class AsmDiscoveryListResponse(BaseModel):
     page_size: int
 
 
+# ---------------------------------------------------
+# Asm Discovery Bulk Create Response
+# ---------------------------------------------------
+class AsmDiscoveryBulkItemResult(BaseModel):
+    index: int
+    status: Literal["created", "error"]
+    discovery: Optional[AsmDiscoveryResponse] = None
+    errors: Optional[List[str]] = None
+
+
+class AsmDiscoveryBulkCreateResponse(BaseModel):
+    items: List[AsmDiscoveryBulkItemResult]
+    created: int
+    failed: int
+
+
+# ---------------------------------------------------
+# Asm Run Port Diff Response
+# ---------------------------------------------------
+class AsmRunPortDiffResponse(BaseModel):
+    run_id: str
+    against_run_id: Optional[str]
+    opened: Dict[str, List[int]]
+    closed: Dict[str, List[int]]
+    hosts: int
+    open_ports: int
+
+
 # ---------------------------------------------------
 # Asm Dashboard Response
 # ---------------------------------------------------
@@ -0,0 +1,208 @@
+"""
+Bulk Asset Ingestion (ASYNC)
+Batched INSERT ... ON CONFLICT upserts keyed on (user_id, type, name)
+
+Names are canonicalized (trimmed, lower-cased, no trailing dot) by
+canonical_name(), here and in routes/assets.py, so both write paths
+agree on the key.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+
+from sqlalchemy import text, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config.settings import settings
+from models.asset_models import Asset
+from utils.database import AsyncSessionLocal
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+UPSERT_KEY = ("user_id", "type", "name")
+
+# Columns written per row (everything else keeps its DB default)
+_COLUMNS = ("id", "user_id", "name", "type", "exposure", "risk_score", "tags", "status", "last_seen")
+
+_index_ready = False
+
+_rows_upserted = registry.counter("assets.ingest.rows")
+_flush_latency = registry.histogram("assets.ingest.flush_latency")
+
+
+# ---------------------------------------------------
+# Canonical key index
+# ---------------------------------------------------
+_CANONICAL_NAME_SQL = "left(lower(rtrim(btrim(name), '.')), 255)"
+
+# Keep the oldest row of each canonical key, then canonicalize the rest
+_DEDUPE_ASSETS = f"""
+WITH ranked AS (
+    SELECT id, row_number() OVER (
+        PARTITION BY user_id, type, {_CANONICAL_NAME_SQL}
+        ORDER BY created_at, id
+    ) AS rank
+    FROM assets
+)
+DELETE FROM assets WHERE id IN (SELECT id FROM ranked WHERE rank > 1)
+"""
+
+_CANONICALIZE_NAMES = f"""
+UPDATE assets SET name = {_CANONICAL_NAME_SQL}
+WHERE name <> {_CANONICAL_NAME_SQL}
+"""
+
+
+def canonical_name(name: str) -> str:
+    return name.strip().lower().rstrip(".")[:255]
+
+
+async def ensure_upsert_index(conn):
+    """
+    ON CONFLICT needs a unique index on the key. create_all() does not add
+    indexes to an existing table, so create it here once per process,
+    after collapsing rows that already share a canonical key (the index
+    cannot be built over duplicates). The advisory lock keeps concurrent
+    processes from migrating at the same time.
+    """
+    global _index_ready
+
+    if _index_ready:
+        return
+    await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('uq_assets_user_type_name'))"))
+    exists = await conn.scalar(text("SELECT to_regclass('uq_assets_user_type_name') IS NOT NULL"))
+    if not exists:
+        deleted = await conn.execute(text(_DEDUPE_ASSETS))
+        await conn.execute(text(_CANONICALIZE_NAMES))
+        if deleted.rowcount:
+            logger.warning("Removed %d duplicate assets before creating the upsert index", deleted.rowcount)
+        await conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_assets_user_type_name "
+            "ON assets (user_id, type, name)"
+        ))
+    _index_ready = True
+
+
+def canonical_asset(asset: dict) -> dict:
+    """
+    Normalize a discovered asset dict into an assets row
+    """
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": asset["user_id"],
+        "name": canonical_name(asset["name"]),
+        "type": asset.get("type", "domain"),
+        "exposure": asset.get("exposure", "public"),
+        "risk_score": int(asset.get("risk_score") or 0),
+        "tags": list(asset.get("tags") or ["discovered"]),
+        "status": "active",
+        "last_seen": asset.get("last_seen"),
+    }
+
+
+# ---------------------------------------------------
+# Upsert one batch
+# ---------------------------------------------------
+async def upsert_assets(session, rows: list[dict]) -> int:
+    """
+    One multi-row INSERT ... ON CONFLICT (user_id, type, name) DO UPDATE.
+    Existing assets only get last_seen / updated_at refreshed: their risk
+    score and status (e.g. archived) are left as the user set them.
+    Rows are de-duplicated on the key first: Postgres rejects a statement
+    that would update the same row twice.
+    """
+    if not rows:
+        return 0
+
+    unique = {}
+    for row in rows:
+        unique[(row["user_id"], row["type"], row["name"])] = row
+    values = [{col: row[col] for col in _COLUMNS} for row in unique.values()]
+
+    statement = pg_insert(Asset).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(UPSERT_KEY),
+        set_={
+            "last_seen": func.coalesce(statement.excluded.last_seen, Asset.last_seen),
+            "updated_at": func.now(),
+        },
+    )
+
+    await ensure_upsert_index(await session.connection())
+    await session.execute(statement)
+    return len(values)
+
+
+# ---------------------------------------------------
+# Batching ingestor
+# ---------------------------------------------------
+class AssetIngestor:
+    """
+    Buffers assets and flushes them when ASSET_INGEST_BATCH_SIZE rows are
+    waiting or ASSET_INGEST_FLUSH_INTERVAL seconds have passed since the
+    first buffered row, whichever comes first.
+
+        async with AssetIngestor() as ingestor:
+            for asset in assets:
+                await ingestor.add(asset)
+    """
+
+    def __init__(self, batch_size: int | None = None, flush_interval: float | None = None):
+        self.batch_size = batch_size or settings.ASSET_INGEST_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.ASSET_INGEST_FLUSH_INTERVAL
+        self.total = 0
+        self._buffer: list[dict] = []
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def add(self, asset: dict):
+        self._buffer.append(canonical_asset(asset))
+
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def add_many(self, assets):
+        for asset in assets:
+            await self.add(asset)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if self._timer is not None and self._timer is not asyncio.current_task():
+                self._timer.cancel()
+                self._timer = None
+
+            batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    written = await upsert_assets(session, batch)
+
+            _flush_latency.observe(time.perf_counter() - start)
+            _rows_upserted.inc(written)
+            self.total += written
+            return written
+
+    async def close(self):
+        await self.flush()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -0,0 +1,126 @@
+"""
+Discovery Fan-out
+Splits large target sets into fixed-size shards enqueued as asm.jobs sub-jobs
+
+Small discoveries keep the single trigger message. Above ASM_SHARD_SIZE
+hosts (CIDRs count every address) the run row is created up front with
+summary["expected_jobs"] set to the shard count, and one sub-job per
+shard is staged in the outbox. Shards grow past ASM_SHARD_SIZE so a run
+never has more than ASM_MAX_SHARDS of them (a /8 is 256 shards, not
+33k outbox rows in one transaction). The results consumer tracks each
+shard in asm_discovery_run_jobs, counts finished ones in
+summary["progress"] and closes the run, with merged totals, when the
+last one is done.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import settings
+from models.asm_models import AsmDiscovery, AsmDiscoveryRun
+from models.asset_models import Asset
+from utils.outbox import enqueue_messages
+from utils.targets import TargetSet
+
+JOBS_QUEUE = "asm.jobs"
+
+
+def target_count(discovery: AsmDiscovery) -> int:
+    """
+    Upper bound on the number of hosts, without touching the DB
+    (a CIDR counts as all of its addresses)
+    """
+    if discovery.target_source == "FROM_ASSET":
+        return len(discovery.asset_ids or [])
+    return TargetSet.parse(discovery.manual_targets or [], strict=False).count
+
+
+def needs_sharding(discovery: AsmDiscovery) -> bool:
+    return target_count(discovery) > settings.ASM_SHARD_SIZE
+
+
+async def discovery_targets(db: AsyncSession, discovery: AsmDiscovery) -> TargetSet:
+    """
+    Targets of a discovery; asset names that do not parse are skipped
+    """
+    if discovery.target_source == "FROM_ASSET":
+        ids = discovery.asset_ids or []
+        result = await db.execute(
+            select(Asset.id, Asset.name).where(
+                Asset.id.in_(ids),
+                Asset.user_id == discovery.user_id,
+            )
+        )
+        names = dict(result.all())
+        targets = [names[asset_id] for asset_id in ids if asset_id in names]
+    else:
+        targets = discovery.manual_targets or []
+    return TargetSet.parse(targets, strict=False)
+
+
+def shard_size(count: int) -> int:
+    """
+    ASM_SHARD_SIZE, raised as needed to stay within ASM_MAX_SHARDS shards
+    """
+    return max(settings.ASM_SHARD_SIZE, -(-count // settings.ASM_MAX_SHARDS))
+
+
+def shard(targets: TargetSet, size: int | None = None) -> list[list[str]]:
+    """
+    Canonical target strings per shard, at most `size` hosts each;
+    address blocks are cut into sub-ranges rather than expanded
+    """
+    return list(targets.split(size or shard_size(targets.count)))
+
+
+async def stage_sharded_run(
+    db: AsyncSession,
+    discovery: AsmDiscovery,
+    triggered_by: str,
+    run_mode: str,
+    run: AsmDiscoveryRun | None = None,
+) -> AsmDiscoveryRun:
+    """
+    Create (or fill in) the run row and stage one asm.jobs message per
+    shard, inside the caller's transaction
+    """
+    shards = shard(await discovery_targets(db, discovery))
+
+    if run is None:
+        run = AsmDiscoveryRun(
+            id=str(uuid.uuid4()),
+            asm_discovery_id=discovery.id,
+            user_id=discovery.user_id,
+            triggered_by=triggered_by,
+            run_mode=run_mode,
+            status="PENDING",
+        )
+        db.add(run)
+
+    run.summary = {
+        "expected_jobs": len(shards),
+        "progress": {"total": len(shards), "done": 0, "failed": 0},
+    }
+    if not shards:
+        # None of the selected assets exist any more
+        run.status = "COMPLETED"
+        run.completed_at = datetime.utcnow()
+        return run
+
+    await enqueue_messages(db, [
+        (JOBS_QUEUE, {
+            "job_id": f"{run.id}.{index}",
+            "run_id": run.id,
+            "user_id": discovery.user_id,
+            "asm_discovery_id": discovery.id,
+            "intensity": discovery.intensity,
+            "targets": targets,
+            "shard": index,
+            "shards": len(shards),
+        })
+        for index, targets in enumerate(shards)
+    ])
+    return run
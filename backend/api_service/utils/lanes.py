@@ -0,0 +1,30 @@
+"""
+ASM Trigger Priority Lanes
+Routes discovery triggers to a queue by intensity and schedule type
+(duplicated in the workers, which consume the lanes)
+"""
+
+# Lane -> queue name. "standard" keeps the original queue name so
+# messages already queued on asm.triggers are still consumed.
+ASM_TRIGGER_LANES = {
+    "interactive": "asm.triggers.interactive",
+    "standard": "asm.triggers",
+    "bulk": "asm.triggers.bulk",
+}
+
+
+def asm_trigger_lane(intensity: str, schedule_type: str, triggered_by: str = "CRON") -> str:
+    """
+    QUICK (user is waiting)  -> interactive, unless DEEP
+    QUICK + DEEP             -> standard
+    INTERVAL / CRON          -> standard when LIGHT, otherwise bulk
+    An API-triggered run (the first run on create) is routed as QUICK
+    whatever its schedule: the user is waiting for it.
+    """
+    if schedule_type == "QUICK" or triggered_by == "API":
+        return "standard" if intensity == "DEEP" else "interactive"
+    return "standard" if intensity == "LIGHT" else "bulk"
+
+
+def asm_trigger_queue(intensity: str, schedule_type: str, triggered_by: str = "CRON") -> str:
+    return ASM_TRIGGER_LANES[asm_trigger_lane(intensity, schedule_type, triggered_by)]
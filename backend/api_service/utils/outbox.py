@@ -0,0 +1,235 @@
+"""
+Transactional Outbox Relay (ASYNC)
+Moves queue messages from the queue_outbox table to RabbitMQ
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from sqlalchemy import select, delete, insert, or_, text, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import settings
+from models.outbox_models import OutboxMessage, OutboxParkedMessage
+from utils.database import AsyncSessionLocal
+from utils.metrics import registry
+from utils.queue import publish_messages
+
+logger = logging.getLogger(__name__)
+
+# Relay task + wake-up signal (per process)
+_relay_task: asyncio.Task | None = None
+_wakeup: asyncio.Event | None = None
+
+_relayed = registry.counter("outbox.relayed")
+_relay_failures = registry.counter("outbox.failures")
+_parked = registry.counter("outbox.parked")
+_last_batch = registry.gauge("outbox.last_batch_size")
+
+
+# ---------------------------------------------------
+# Schema
+# ---------------------------------------------------
+async def ensure_outbox_schema(conn):
+    """
+    create_all() does not add columns to an existing table
+    """
+    await conn.execute(text(
+        "ALTER TABLE queue_outbox ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP"
+    ))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Exponential backoff after `attempts` failed publishes
+    """
+    seconds = settings.OUTBOX_BACKOFF_BASE * (2 ** min(attempts - 1, 32))
+    return timedelta(seconds=min(settings.OUTBOX_BACKOFF_MAX, seconds))
+
+
+# ---------------------------------------------------
+# Enqueue (inside the caller's transaction)
+# ---------------------------------------------------
+def enqueue_message(db: AsyncSession, queue_name: str, message: dict) -> OutboxMessage:
+    """
+    Stage a queue message in the current session.
+    It is only published after the caller commits.
+    """
+    row = OutboxMessage(queue_name=queue_name, payload=message)
+    db.add(row)
+    return row
+
+
+async def enqueue_messages(db: AsyncSession, messages: list[tuple[str, dict]]):
+    """
+    Stage many (queue_name, message) pairs with one multi-row INSERT
+    """
+    if not messages:
+        return
+    await db.execute(
+        insert(OutboxMessage),
+        [{"queue_name": queue_name, "payload": message} for queue_name, message in messages],
+    )
+
+
+def notify_outbox():
+    """
+    Wake the relay right after a commit instead of waiting for the next poll
+    """
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+# ---------------------------------------------------
+# Drain one batch
+# ---------------------------------------------------
+async def relay_batch(batch_size: int | None = None) -> int:
+    """
+    Publish one batch of due outbox rows.
+    Rows are locked with SKIP LOCKED so several API replicas can relay
+    concurrently; published rows are deleted in the same transaction.
+    A failed row is retried after an exponential backoff, and moved to
+    queue_outbox_parked once it has failed OUTBOX_MAX_ATTEMPTS times.
+
+    Returns number of rows published.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            result = await session.execute(
+                select(OutboxMessage)
+                .where(or_(
+                    OutboxMessage.next_attempt_at.is_(None),
+                    OutboxMessage.next_attempt_at <= func.now(),
+                ))
+                .order_by(OutboxMessage.created_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = result.scalars().all()
+            _last_batch.set(len(rows))
+
+            if not rows:
+                return 0
+
+            by_queue = defaultdict(list)
+            for row in rows:
+                by_queue[row.queue_name].append(row)
+
+            published_ids = []
+            failed = []
+
+            for queue_name, queue_rows in by_queue.items():
+                results = await publish_messages(
+                    queue_name, [row.payload for row in queue_rows]
+                )
+                for row, ok in zip(queue_rows, results):
+                    if ok:
+                        published_ids.append(row.id)
+                    else:
+                        failed.append(row)
+
+            if published_ids:
+                await session.execute(
+                    delete(OutboxMessage).where(OutboxMessage.id.in_(published_ids))
+                )
+
+            parked = []
+            for row in failed:
+                row.attempts += 1
+                row.last_error = "publish failed"
+                if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    parked.append(row)
+                else:
+                    row.next_attempt_at = func.now() + retry_delay(row.attempts)
+
+            if parked:
+                await session.execute(
+                    insert(OutboxParkedMessage),
+                    [
+                        {
+                            "id": row.id,
+                            "queue_name": row.queue_name,
+                            "payload": row.payload,
+                            "attempts": row.attempts,
+                            "last_error": row.last_error,
+                            "created_at": row.created_at,
+                        }
+                        for row in parked
+                    ],
+                )
+                for row in parked:
+                    await session.delete(row)
+
+    _relayed.inc(len(published_ids))
+    _relay_failures.inc(len(failed))
+    _parked.inc(len(parked))
+
+    if failed:
+        logger.warning(f"Outbox relay: {len(failed)} messages not published, will retry")
+    if parked:
+        logger.error(
+            f"Outbox relay: parked {len(parked)} messages after "
+            f"{settings.OUTBOX_MAX_ATTEMPTS} failed publishes"
+        )
+
+    return len(published_ids)
+
+
+# ---------------------------------------------------
+# Relay loop
+# ---------------------------------------------------
+async def _relay_loop():
+    while True:
+        try:
+            published = await relay_batch()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Outbox relay batch failed")
+            published = 0
+
+        # Full batch: keep draining without waiting
+        if published >= settings.OUTBOX_BATCH_SIZE:
+            continue
+
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.OUTBOX_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+async def start_outbox_relay():
+    """
+    Start the background relay (call on app startup)
+    """
+    global _relay_task, _wakeup
+
+    if _relay_task and not _relay_task.done():
+        return
+
+    _wakeup = asyncio.Event()
+    _relay_task = asyncio.create_task(_relay_loop())
+    logger.info("Outbox relay started")
+
+
+async def stop_outbox_relay():
+    """
+    Stop the background relay (call on app shutdown)
+    """
+    global _relay_task, _wakeup
+
+    if _relay_task:
+        _relay_task.cancel()
+        try:
+            await _relay_task
+        except asyncio.CancelledError:
+            pass
+
+    _relay_task = None
+    _wakeup = None
+    logger.info("Outbox relay stopped")
@@ -2,16 +2,26 @@
 RabbitMQ / Message Queue Connection (ASYNC)
 """
 
-import json
+import asyncio
 import logging
+import time
 import aio_pika
 from config.settings import settings
+from utils.metrics import registry
+from utils.codec import encode_payload, decode_payload
 
 logger = logging.getLogger(__name__)
 
 # Async connection (singleton)
 _queue_connection: aio_pika.RobustConnection | None = None
 
+# Publisher state (per process)
+_channel_pool: "ChannelPool | None" = None
+_declared_queues: set[str] = set()
+
+_publish_latency = registry.histogram("queue.publish_latency")
+_publish_failures = registry.counter("queue.publish_failures")
+
 
 async def get_queue_connection() -> aio_pika.RobustConnection | None:
     """
@@ -38,38 +48,216 @@ async def get_queue_connection() -> aio_pika.RobustConnection | None:
 
 
 
-async def publish_message(queue_name: str, message: dict) -> bool:
+# ---------------------------------------------------
+# Channel pool
+# ---------------------------------------------------
+class ChannelPool:
     """
-    Publish message to queue (ASYNC)
+    Bounded pool of publisher channels.
+    Channels are reused across publishes instead of opened per message;
+    closed channels are dropped and replaced lazily.
     """
-    try:
+
+    def __init__(self, max_size: int, publisher_confirms: bool = True):
+        self.max_size = max_size
+        self.publisher_confirms = publisher_confirms
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_size)
+        self._channels: set = set()
+
+    async def _open_channel(self):
         connection = await get_queue_connection()
         if not connection:
-            logger.warning("Queue not available, message not sent")
-            return False
+            raise ConnectionError("Queue not available")
+        channel = await connection.channel(
+            publisher_confirms=self.publisher_confirms
+        )
+        self._channels.add(channel)
+        return channel
+
+    async def acquire(self):
+        await self._slots.acquire()
+        try:
+            while not self._idle.empty():
+                channel = self._idle.get_nowait()
+                if not channel.is_closed:
+                    return channel
+                self._channels.discard(channel)
+            return await self._open_channel()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, channel, discard: bool = False):
+        if discard or channel.is_closed:
+            self._channels.discard(channel)
+            if not channel.is_closed:
+                asyncio.ensure_future(channel.close())
+        else:
+            self._idle.put_nowait(channel)
+        self._slots.release()
+
+    async def close(self):
+        for channel in list(self._channels):
+            if not channel.is_closed:
+                await channel.close()
+        self._channels.clear()
+        self._idle = asyncio.Queue()
+
+    def stats(self) -> dict:
+        return {
+            "max_size": self.max_size,
+            "open": len(self._channels),
+            "idle": self._idle.qsize(),
+        }
+
+
+def get_channel_pool() -> ChannelPool:
+    global _channel_pool
+
+    if _channel_pool is None:
+        _channel_pool = ChannelPool(
+            max_size=settings.QUEUE_CHANNEL_POOL_SIZE,
+            publisher_confirms=settings.QUEUE_PUBLISHER_CONFIRMS,
+        )
+    return _channel_pool
 
-        channel = await connection.channel()
 
-        await channel.declare_queue(
-            queue_name,
-            durable=True
-        )
+async def ensure_queue(channel, queue_name: str, arguments: dict | None = None):
+    """
+    Declare a queue once per process; later publishes skip the round trip
+    """
+    if queue_name in _declared_queues:
+        return
+    await channel.declare_queue(queue_name, durable=True, arguments=arguments)
+    _declared_queues.add(queue_name)
+
+
+PUBLISHED_AT_HEADER = "x-published-at"
+
+
+def _build_message(message: dict) -> aio_pika.Message:
+    body, content_type, headers = encode_payload(message)
+    headers[PUBLISHED_AT_HEADER] = time.time()
+    return aio_pika.Message(
+        body=body,
+        content_type=content_type,
+        headers=headers,
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+    )
+
+
+# ---------------------------------------------------
+# Publish message
+# ---------------------------------------------------
+async def publish_message(queue_name: str, message: dict) -> bool:
+    """
+    Publish message to queue (ASYNC)
+    Uses a pooled channel and the declared-queue cache
+    """
+    pool = get_channel_pool()
+    channel = None
+    failed = False
+    start = time.perf_counter()
+
+    try:
+        channel = await pool.acquire()
+        await ensure_queue(channel, queue_name)
 
         await channel.default_exchange.publish(
-            aio_pika.Message(
-                body=json.dumps(message).encode(),
-                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-            ),
-            routing_key=queue_name
+            _build_message(message),
+            routing_key=queue_name,
         )
 
         logger.info(f"Message published to {queue_name}")
         return True
 
-    except Exception as e:
+    except Exception:
+        failed = True
+        _publish_failures.inc()
         logger.exception("Failed to publish message")
         return False
 
+    finally:
+        if channel is not None:
+            pool.release(channel, discard=failed)
+        _publish_latency.observe(time.perf_counter() - start)
+
+
+# ---------------------------------------------------
+# Publish many messages (batched confirms)
+# ---------------------------------------------------
+async def publish_messages(queue_name: str, messages: list[dict]) -> list[bool]:
+    """
+    Publish a batch on one channel. Publishes are pipelined and broker
+    confirms are awaited together per QUEUE_CONFIRM_BATCH_SIZE chunk,
+    instead of one confirm round trip per message.
+
+    Returns one success flag per input message.
+    """
+    if not messages:
+        return []
+
+    pool = get_channel_pool()
+    channel = None
+    results = [False] * len(messages)
+    failed = False
+
+    try:
+        channel = await pool.acquire()
+        await ensure_queue(channel, queue_name)
+
+        batch_size = max(1, settings.QUEUE_CONFIRM_BATCH_SIZE)
+        for offset in range(0, len(messages), batch_size):
+            chunk = messages[offset:offset + batch_size]
+            start = time.perf_counter()
+
+            confirms = await asyncio.gather(
+                *(
+                    channel.default_exchange.publish(
+                        _build_message(message),
+                        routing_key=queue_name,
+                    )
+                    for message in chunk
+                ),
+                return_exceptions=True,
+            )
+
+            elapsed = time.perf_counter() - start
+            for index, confirm in enumerate(confirms):
+                ok = not isinstance(confirm, BaseException)
+                results[offset + index] = ok
+                _publish_latency.observe(elapsed / len(chunk))
+                if not ok:
+                    failed = True
+                    _publish_failures.inc()
+
+        logger.info(
+            f"Published {sum(results)}/{len(messages)} messages to {queue_name}"
+        )
+
+    except Exception:
+        failed = True
+        _publish_failures.inc()
+        logger.exception("Failed to publish message batch")
+
+    finally:
+        if channel is not None:
+            pool.release(channel, discard=failed)
+
+    return results
+
+
+def get_publish_stats() -> dict:
+    """
+    Publisher latency (p50/p99), failures and channel pool usage
+    """
+    return {
+        "latency": _publish_latency.snapshot(),
+        "failures": _publish_failures.snapshot(),
+        "channels": get_channel_pool().stats(),
+        "declared_queues": sorted(_declared_queues),
+    }
 
 
 async def consume_messages(queue_name: str, callback):
@@ -98,7 +286,7 @@ async def consume_messages(queue_name: str, callback):
         async with queue.iterator() as queue_iter:
             async for message in queue_iter:
                 try:
-                    payload = json.loads(message.body)
+                    payload = decode_payload(message.body, message.content_type, message.headers or {})
 
                     await callback(payload)
 
@@ -117,7 +305,12 @@ async def close_queue():
     """
     Close RabbitMQ async connection
     """
-    global _queue_connection
+    global _queue_connection, _channel_pool
+
+    if _channel_pool is not None:
+        await _channel_pool.close()
+        _channel_pool = None
+    _declared_queues.clear()
 
     if _queue_connection and not _queue_connection.is_closed:
         await _queue_connection.close()
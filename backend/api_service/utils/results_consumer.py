@@ -0,0 +1,449 @@
+"""
+ASM Result Stream Consumer (ASYNC)
+Applies result chunks from workers to AsmDiscoveryRun and assets as they arrive
+
+Per-job progress lives in one asm_discovery_run_jobs row per job
+(attempt nonce, applied seqs, final seq, status, counts, final summary);
+the run's summary only keeps small counters. Chunks are applied under
+SELECT ... FOR UPDATE on the run row, so redelivered or out-of-order
+chunks never double count.
+
+A rerun of a redelivered job streams under a new attempt nonce with seq
+restarting at 0; its first chunk resets the job's state, and later
+chunks of the abandoned attempt are dropped.
+
+The run is closed once every expected job has its final marker and all
+its chunks. Finished jobs are counted in run.summary["progress"]; job
+summaries and port bitsets are merged into the run only then, so a chunk
+costs the same however many shards the run has.
+
+Undecodable or malformed chunks go straight to asm.results.dead. On a
+transient DB / connection error the chunk is republished to a delayed
+retry queue (asm.results.retry.<d>s, RESULTS_RETRY_DELAYS, dead-lettering
+back to asm.results) and acked at once, so the consumer moves on; the
+retry count travels in the x-retry-count header. After
+RESULTS_MAX_RETRIES retries the chunk is dead-lettered too.
+"""
+
+import asyncio
+import copy
+import logging
+from datetime import datetime, timezone
+
+import aio_pika
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError, OperationalError, InterfaceError
+
+from config.settings import settings
+from models.asm_models import AsmDiscoveryRun, AsmDiscoveryRunJob
+from utils.asset_ingest import canonical_asset, upsert_assets
+from utils.codec import decode_payload
+from utils.database import AsyncSessionLocal
+from utils.metrics import registry
+from utils.portset import HostPortMap
+from utils.queue import get_queue_connection, get_channel_pool, ensure_queue
+
+logger = logging.getLogger(__name__)
+
+RESULTS_QUEUE = "asm.results"
+DEAD_LETTER_QUEUE = f"{RESULTS_QUEUE}.dead"
+
+# Same headers as the workers' retry routing (utils/retry.py), so dlq.py can replay
+RETRY_COUNT_HEADER = "x-retry-count"
+LAST_ERROR_HEADER = "x-last-error"
+ORIGIN_QUEUE_HEADER = "x-origin-queue"
+
+# Superseded attempts remembered per job (to drop their late chunks)
+_MAX_SUPERSEDED = 8
+
+_consumer_task: asyncio.Task | None = None
+
+_chunks_applied = registry.counter("results.chunks_applied")
+_chunks_duplicate = registry.counter("results.chunks_duplicate")
+_chunk_failures = registry.counter("results.failures")
+_chunks_retried = registry.counter("results.retried")
+_chunks_dead = registry.counter("results.dead_lettered")
+_chunks_stale = registry.counter("results.chunks_stale")
+_apply_latency = registry.histogram("results.apply_latency")
+
+
+# ---------------------------------------------------
+# Chunk -> rows
+# ---------------------------------------------------
+def _asset_rows(user_id: str, items: list[dict]) -> list[dict]:
+    rows = []
+    for item in items:
+        stage = item.get("stage")
+        if stage == "discover":
+            rows.append(canonical_asset({
+                "user_id": user_id,
+                "name": item["name"],
+                "type": "domain",
+                "last_seen": item.get("seen_at"),
+            }))
+            if item.get("type") in ("A", "AAAA"):
+                rows.append(canonical_asset({
+                    "user_id": user_id,
+                    "name": item["value"],
+                    "type": "ip",
+                    "last_seen": item.get("seen_at"),
+                }))
+        elif stage == "probe":
+            rows.append(canonical_asset({
+                "user_id": user_id,
+                "name": item["host"],
+                "type": "ip",
+                "last_seen": item.get("seen_at"),
+            }))
+
+    return rows
+
+
+def _count_items(counts: dict, items: list[dict]):
+    for item in items:
+        stage = item.get("stage")
+        if stage == "discover":
+            counts["records"] = counts.get("records", 0) + 1
+        elif stage == "probe":
+            counts["open_ports"] = counts.get("open_ports", 0) + 1
+        elif stage == "fingerprint":
+            counts["services"] = counts.get("services", 0) + 1
+
+
+def _restart_job(job: AsmDiscoveryRunJob, attempt: str | None, run_counts: dict):
+    """
+    Forget an abandoned attempt's partial state (its upserted assets stay)
+    """
+    for key, value in (job.counts or {}).items():
+        run_counts[key] = max(run_counts.get(key, 0) - value, 0)
+    job.superseded = ((job.superseded or []) + [job.attempt])[-_MAX_SUPERSEDED:]
+    job.attempt = attempt
+    job.seqs = []
+    job.final_seq = None
+    job.status = "RUNNING"
+    job.error = None
+    job.counts = {}
+    job.summary = None
+
+
+def _init_job_tracking(session, run: AsmDiscoveryRun, summary: dict, expected: int):
+    """
+    Add the progress counters on a run's first chunk. Runs started while
+    job state lived in summary["jobs"] have it moved to job rows.
+    """
+    legacy = summary.pop("jobs", None) or {}
+    progress = summary.get("progress")
+    if progress is None:
+        progress = summary["progress"] = {"total": expected, "done": 0, "failed": 0}
+        count = True
+    else:
+        count = False
+
+    for job_id, entry in legacy.items():
+        job = AsmDiscoveryRunJob(
+            id=job_id,
+            run_id=run.id,
+            attempt=entry.get("attempt"),
+            superseded=entry.get("superseded"),
+            seqs=entry.get("seqs") or [],
+            final_seq=entry.get("final_seq"),
+            status=entry.get("status") or "RUNNING",
+            error=entry.get("error"),
+            counts=entry.get("counts") or {},
+            summary=entry.get("summary"),
+        )
+        session.add(job)
+        if count and job.done:
+            progress["failed" if job.status == "FAILED" else "done"] += 1
+
+
+async def _close_run(session, run: AsmDiscoveryRun, summary: dict, expected: int, now: datetime):
+    """
+    Last job finished: merge every job's summary (and port bitsets) into the run
+    """
+    jobs = (await session.execute(
+        select(AsmDiscoveryRunJob).where(AsmDiscoveryRunJob.run_id == run.id)
+    )).scalars().all()
+
+    totals = {"assets": 0, "dns_records": 0, "open_ports": 0, "services": 0}
+    # Runs started before job rows existed merged ports into the summary already
+    ports = HostPortMap.deserialize(summary.get("ports"))
+    for job in jobs:
+        job_summary = job.summary or {}
+        for key in totals:
+            totals[key] += int(job_summary.get(key) or 0)
+        if job_summary.get("ports"):
+            ports.update(HostPortMap.deserialize(job_summary["ports"]))
+
+    summary["totals"] = totals
+    summary["ports"] = ports.serialize()
+
+    failed = [job for job in jobs if job.status == "FAILED"]
+    run.status = "FAILED" if failed else "COMPLETED"
+    if failed:
+        run.error_message = (
+            f"{len(failed)} of {expected} jobs failed: {failed[0].error}"
+            if expected > 1 else failed[0].error
+        )
+    run.completed_at = now
+
+
+# ---------------------------------------------------
+# Apply one chunk
+# ---------------------------------------------------
+async def apply_chunk(chunk: dict) -> bool:
+    """
+    Apply one result chunk in a single transaction.
+    Returns False when the chunk was already applied.
+    """
+    run_id = chunk.get("run_id") or chunk["job_id"]
+    job_id = chunk["job_id"]
+    seq = int(chunk["seq"])
+    attempt = chunk.get("attempt")
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            locked_run = (
+                select(AsmDiscoveryRun)
+                .where(AsmDiscoveryRun.id == run_id)
+                .with_for_update()
+            )
+            run = (await session.execute(locked_run)).scalar_one_or_none()
+
+            if run is None:
+                # Another replica may create the run concurrently: insert
+                # if still missing, then lock whichever row won
+                await session.execute(
+                    pg_insert(AsmDiscoveryRun)
+                    .values(
+                        id=run_id,
+                        asm_discovery_id=chunk.get("asm_discovery_id") or "",
+                        user_id=chunk.get("user_id") or "",
+                        triggered_by="API",
+                        run_mode="QUICK",
+                        status="RUNNING",
+                        started_at=now,
+                        summary={},
+                    )
+                    .on_conflict_do_nothing(index_elements=["id"])
+                )
+                run = (await session.execute(locked_run)).scalar_one()
+
+            # JSON columns only track reassignment, so work on a copy
+            summary = copy.deepcopy(run.summary or {})
+            expected = int(summary.get("expected_jobs", 1))
+            if "jobs" in summary or "progress" not in summary:
+                _init_job_tracking(session, run, summary, expected)
+                await session.flush()
+            progress = summary["progress"]
+            counts = summary.setdefault("counts", {})
+
+            # The run row lock above already serializes this run's chunks
+            job = await session.get(AsmDiscoveryRunJob, job_id)
+            if job is None:
+                job = AsmDiscoveryRunJob(
+                    id=job_id, run_id=run.id, attempt=attempt,
+                    seqs=[], status="RUNNING", counts={},
+                )
+                session.add(job)
+            elif attempt != job.attempt:
+                if attempt in (job.superseded or []) or job.done:
+                    # Late chunk of an abandoned attempt, or a rerun of a finished job
+                    _chunks_stale.inc()
+                    return False
+                _restart_job(job, attempt, counts)
+
+            if seq in (job.seqs or []):
+                return False
+            was_done = job.done
+            job.seqs = [*(job.seqs or []), seq]
+
+            if chunk.get("final"):
+                job.final_seq = seq
+                job.status = chunk.get("status", "COMPLETED")
+                job.error = chunk.get("error")
+                # Port bitsets included: merged into the run once it closes
+                job.summary = dict(chunk.get("summary") or {})
+            else:
+                items = chunk.get("items") or []
+                job_counts = dict(job.counts or {})
+                _count_items(counts, items)
+                _count_items(job_counts, items)
+                job.counts = job_counts
+                if run.user_id:
+                    upserted = await upsert_assets(session, _asset_rows(run.user_id, items))
+                    summary["assets_upserted"] = summary.get("assets_upserted", 0) + upserted
+
+            if run.status == "PENDING":
+                run.status = "RUNNING"
+                run.started_at = run.started_at or now
+
+            # Counted once per job, whichever of its chunks arrives last
+            if not was_done and job.done:
+                progress["failed" if job.status == "FAILED" else "done"] += 1
+
+            if progress["done"] + progress["failed"] >= expected and run.status == "RUNNING":
+                await session.flush()
+                await _close_run(session, run, summary, expected, now)
+
+            run.summary = summary
+
+    return True
+
+
+# ---------------------------------------------------
+# Failure handling
+# ---------------------------------------------------
+def _is_transient(error: Exception) -> bool:
+    """
+    Worth retrying: the DB or broker was unreachable, not the chunk bad
+    """
+    if isinstance(error, DBAPIError):
+        return error.connection_invalidated or isinstance(error, (OperationalError, InterfaceError))
+    return isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError, OSError))
+
+
+def _retry_delays() -> list[int]:
+    return [int(d) for d in settings.RESULTS_RETRY_DELAYS.split(",") if d.strip()]
+
+
+def _retry_count(message) -> int:
+    try:
+        return int((message.headers or {}).get(RETRY_COUNT_HEADER, 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+async def _route_failure(message, error: Exception, retryable: bool):
+    """
+    Republish a failed chunk to its next retry tier, or to the dead-letter
+    queue when it is not retryable or out of retries. The caller acks the
+    original delivery afterwards.
+    """
+    retry_count = _retry_count(message)
+    delays = _retry_delays()
+
+    headers = dict(message.headers or {})
+    headers[RETRY_COUNT_HEADER] = retry_count + 1
+    headers[LAST_ERROR_HEADER] = f"{type(error).__name__}: {error}"[:512]
+    headers[ORIGIN_QUEUE_HEADER] = RESULTS_QUEUE
+
+    if retryable and delays and retry_count < settings.RESULTS_MAX_RETRIES:
+        delay = delays[min(retry_count, len(delays) - 1)]
+        target = f"{RESULTS_QUEUE}.retry.{delay}s"
+        arguments = {
+            "x-message-ttl": delay * 1000,
+            "x-dead-letter-exchange": "",
+            "x-dead-letter-routing-key": RESULTS_QUEUE,
+        }
+    else:
+        target = DEAD_LETTER_QUEUE
+        arguments = None
+
+    pool = get_channel_pool()
+    channel = await pool.acquire()
+    failed = True
+    try:
+        await ensure_queue(channel, target, arguments=arguments)
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                headers=headers,
+                content_type=message.content_type,
+                message_id=message.message_id,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=target,
+        )
+        failed = False
+    finally:
+        pool.release(channel, discard=failed)
+
+    if target == DEAD_LETTER_QUEUE:
+        _chunks_dead.inc()
+        logger.warning("Result chunk dead-lettered: %s", headers[LAST_ERROR_HEADER])
+    else:
+        _chunks_retried.inc()
+        logger.warning(
+            "Applying result chunk failed (attempt %d), retrying via %s: %s",
+            retry_count + 1, target, headers[LAST_ERROR_HEADER],
+        )
+
+
+async def _handle_message(message):
+    try:
+        chunk = decode_payload(message.body, message.content_type, message.headers or {})
+        with _apply_latency.time():
+            applied = await apply_chunk(chunk)
+    except Exception as e:
+        _chunk_failures.inc()
+        transient = _is_transient(e)
+        if not transient:
+            # CodecError / malformed chunk: park it
+            logger.exception("Applying result chunk failed permanently")
+        # Not requeued in place: the chunks behind it keep flowing
+        await _route_failure(message, e, retryable=transient)
+        await message.ack()
+        return
+
+    (_chunks_applied if applied else _chunks_duplicate).inc()
+    await message.ack()
+
+
+# ---------------------------------------------------
+# Consume loop
+# ---------------------------------------------------
+async def _consume_loop():
+    while True:
+        try:
+            connection = await get_queue_connection()
+            if not connection:
+                await asyncio.sleep(5)
+                continue
+
+            channel = await connection.channel()
+            await channel.set_qos(prefetch_count=10)
+            queue = await channel.declare_queue(RESULTS_QUEUE, durable=True)
+            logger.info(f"Consuming result chunks from {RESULTS_QUEUE}")
+
+            async with queue.iterator() as queue_iter:
+                async for message in queue_iter:
+                    await _handle_message(message)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Result consumer failed, reconnecting")
+            await asyncio.sleep(5)
+
+
+async def start_results_consumer():
+    """
+    Start the background consumer (call on app startup)
+    """
+    global _consumer_task
+
+    if _consumer_task and not _consumer_task.done():
+        return
+
+    _consumer_task = asyncio.create_task(_consume_loop())
+    logger.info("Results consumer started")
+
+
+async def stop_results_consumer():
+    """
+    Stop the background consumer (call on app shutdown)
+    """
+    global _consumer_task
+
+    if _consumer_task:
+        _consumer_task.cancel()
+        try:
+            await _consumer_task
+        except asyncio.CancelledError:
+            pass
+
+    _consumer_task = None
+    logger.info("Results consumer stopped")
@@ -0,0 +1,159 @@
+"""
+Discovery Schedules
+Parses INTERVAL / CRON schedule values and computes the next fire time
+
+    INTERVAL   "90" (seconds), "15m", "1h30m", "2d", "1w"
+    CRON       5 fields "min hour day-of-month month day-of-week"
+               (*, lists, ranges, */step, jan-dec, sun-sat) or
+               @hourly / @daily / @weekly / @monthly / @yearly
+
+All times are naive UTC, like the rest of the asm tables.
+"""
+
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+MIN_INTERVAL = timedelta(minutes=1)
+
+_INTERVAL_PART = re.compile(r"(\d+)\s*([smhdw])")
+_INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+_CRON_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+_MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1
+)}
+_WEEKDAYS = {d: i for i, d in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+# Give up if nothing fires within this many days (e.g. "0 0 30 2 *")
+_MAX_SEARCH_DAYS = 366 * 5
+
+
+# ---------------------------------------------------
+# INTERVAL
+# ---------------------------------------------------
+def parse_interval(value: str) -> timedelta:
+    text = (value or "").strip().lower()
+    if text.isdigit():
+        seconds = int(text)
+    else:
+        parts = _INTERVAL_PART.findall(text)
+        if not parts or _INTERVAL_PART.sub("", text).strip():
+            raise ValueError(f"Invalid interval: {value!r}")
+        seconds = sum(int(n) * _INTERVAL_UNITS[unit] for n, unit in parts)
+
+    interval = timedelta(seconds=seconds)
+    if interval < MIN_INTERVAL:
+        raise ValueError(f"Interval must be at least {MIN_INTERVAL}: {value!r}")
+    return interval
+
+
+# ---------------------------------------------------
+# CRON
+# ---------------------------------------------------
+def _cron_field(spec: str, lo: int, hi: int, names: dict | None = None) -> frozenset:
+    values = set()
+    for item in spec.split(","):
+        item = item.strip().lower()
+        for name, number in (names or {}).items():
+            item = item.replace(name, str(number))
+
+        base, _, step = item.partition("/")
+        step = int(step) if step else 1
+        if base == "*":
+            start, end = lo, hi
+        elif "-" in base:
+            start, end = (int(v) for v in base.split("-", 1))
+        else:
+            start = int(base)
+            end = hi if step > 1 else start
+
+        if step < 1 or not lo <= start <= end <= hi:
+            raise ValueError(f"Cron field {spec!r} out of range {lo}-{hi}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    def __init__(self, expression: str):
+        text = _CRON_ALIASES.get(expression.strip().lower(), expression)
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+
+        try:
+            self.minutes = _cron_field(fields[0], 0, 59)
+            self.hours = _cron_field(fields[1], 0, 23)
+            self.days = _cron_field(fields[2], 1, 31)
+            self.months = _cron_field(fields[3], 1, 12, _MONTHS)
+            # 7 is also Sunday
+            weekdays = _cron_field(fields[4], 0, 7, _WEEKDAYS)
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression {expression!r}: {e}") from None
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+
+        # Vixie cron: if both day fields are restricted, either may match.
+        # A field starting with "*" (also "*/2") counts as unrestricted.
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+    def _day_matches(self, day: datetime) -> bool:
+        in_month = day.day in self.days
+        in_week = (day.isoweekday() % 7) in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, after: datetime) -> datetime:
+        """
+        First fire time strictly after `after`. Skips whole days / hours
+        that cannot match instead of stepping minute by minute.
+        """
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = moment.replace(hour=0, minute=0)
+
+        for _ in range(_MAX_SEARCH_DAYS):
+            if day.month in self.months and self._day_matches(day):
+                start_hour = moment.hour if day.date() == moment.date() else 0
+                for hour in sorted(h for h in self.hours if h >= start_hour):
+                    start_minute = moment.minute if (day.date() == moment.date() and hour == moment.hour) else 0
+                    for minute in sorted(self.minutes):
+                        if minute >= start_minute:
+                            return day.replace(hour=hour, minute=minute)
+            day += timedelta(days=1)
+
+        raise ValueError("Cron expression never fires")
+
+
+@lru_cache(maxsize=1024)
+def parse_cron(expression: str) -> CronSchedule:
+    return CronSchedule(expression)
+
+
+# ---------------------------------------------------
+# Next fire time
+# ---------------------------------------------------
+def next_fire_time(schedule_type: str, value: str | None, after: datetime) -> datetime | None:
+    """
+    Next run of a discovery after `after`; None for one-shot (QUICK).
+    Raises ValueError for an invalid schedule value.
+    """
+    if schedule_type == "INTERVAL":
+        return after + parse_interval(value)
+    if schedule_type == "CRON":
+        if not value:
+            raise ValueError("CRON schedule needs a cron expression")
+        return parse_cron(value.strip()).next_after(after)
+    return None
+
+
+def validate_schedule(schedule_type: str, value: str | None):
+    next_fire_time(schedule_type, value, datetime.utcnow())
@@ -6,12 +6,27 @@ Runs in background, processes discovery jobs from queue
 
 import asyncio
 import logging
+import signal
 from typing import Dict
+from datetime import datetime, timezone
 import time
 
+from config.settings import settings
+from discovery import DnsEnumerator, PortScanner, ports_for_intensity, fingerprint
+from discovery.dns import load_wordlist, DEFAULT_WORDLIST
+from utils.pipeline import Defer, Pipeline, Stage
+from utils.politeness import get_target_slots, close_target_slots
+from utils.portset import HostPortMap
+from utils.queue import consume_messages, close_queue
+from utils.results import ResultStream
+from utils.targets import TargetSet
+from vulndb import open_index, service_cves
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+JOBS_QUEUE = "asm.jobs"
+
 class ASMWorker:
     """
     Background worker for ASM discovery
@@ -21,51 +36,240 @@ class ASMWorker:
     - No direct API/UI connection
     """
     
-    def __init__(self):
+    def __init__(self, resolver=None):
         self.running = True
-    
-    async def process_discovery_job(self, job_id: str, target: str, scan_type: str):
-        """Process a discovery job - actual hardcore work"""
-        logger.info(f"Processing ASM discovery job {job_id} for target {target}")
-        
-        # TODO: Actual discovery logic
-        # - DNS enumeration
-        # - Port scanning
-        # - Service detection
-        # - Cloud resource discovery
-        # - Subdomain enumeration
-        
-        # Simulate work
-        await asyncio.sleep(5)
-        
-        # Discovered assets
-        discovered_assets = [
-            {
-                "id": f"asset_{job_id}_1",
-                "type": "domain",
-                "identifier": target,
-                "first_seen": "2024-01-01T00:00:00",
-                "last_seen": "2024-01-14T00:00:00",
-                "risk_score": 75,
-                "tags": ["discovered"]
-            }
-        ]
-        
-        # TODO: Save to database
-        logger.info(f"Discovery job {job_id} completed. Found {len(discovered_assets)} assets")
-        return discovered_assets
-    
+        self.dns = DnsEnumerator(resolver=resolver)
+        self.scanner = PortScanner()
+        # Caps how many workers touch one host / 24 at once (shared with the scanner)
+        self.slots = get_target_slots()
+        self.cve_index = open_index(settings.CVE_INDEX_PATH)
+
+    def wordlist_for(self, scan_type: str):
+        """LIGHT: apex only, NORMAL: built-in list, DEEP: DNS_WORDLIST file"""
+        if scan_type == "LIGHT":
+            return None
+        if scan_type == "DEEP":
+            return load_wordlist()
+        return DEFAULT_WORDLIST
+
+    def build_pipeline(self, scan_type: str) -> Pipeline:
+        """
+        discover (DNS) -> probe (ports) -> fingerprint (banners, probes, CVEs)
+        Each address is port scanned as soon as DNS resolves it. Address
+        targets are seeded straight into probe (see seed_stage).
+        """
+        wordlist = self.wordlist_for(scan_type)
+        ports = ports_for_intensity(scan_type)
+        probed = set()
+
+        async def discover(domain):
+            async for rec in self.dns.enumerate(domain, wordlist=wordlist):
+                yield rec
+
+        async def probe(rec):
+            if rec["type"] not in ("A", "AAAA") or rec["value"] in probed:
+                return
+            probed.add(rec["value"])
+            async for result in self.scanner.scan([rec["value"]], ports):
+                yield result
+
+        async def identify(result):
+            # A busy host group is set aside; other hosts' ports go first
+            if self.slots is not None and not await self.slots.try_acquire(result["host"]):
+                raise Defer(settings.POLITENESS_RETRY_DELAY)
+            try:
+                service = await fingerprint(result["host"], result["port"])
+            finally:
+                if self.slots is not None:
+                    self.slots.release(result["host"])
+            if self.cve_index is not None and service["cpe"]:
+                service["cves"] = service_cves(self.cve_index, service)
+            yield service
+
+        queue_size = settings.PIPELINE_QUEUE_SIZE
+        return Pipeline("asm", [
+            Stage("discover", discover, concurrency=1, queue_size=queue_size),
+            Stage("probe", probe, settings.PIPELINE_PROBE_CONCURRENCY, queue_size),
+            Stage("fingerprint", identify, settings.PIPELINE_FINGERPRINT_CONCURRENCY, queue_size),
+        ])
+
+    @staticmethod
+    def seeds(targets: TargetSet):
+        """
+        Domain names (for DNS), then an address record per IP, lazily
+        """
+        for host in targets.hosts():
+            if host in targets.domains:
+                yield host
+            else:
+                yield {"type": "AAAA" if ":" in host else "A", "value": host}
+
+    @staticmethod
+    def seed_stage(seed) -> str:
+        return "discover" if isinstance(seed, str) else "probe"
+
+    async def process_discovery_job(
+        self,
+        job_id: str,
+        target: str | list[str],
+        scan_type: str,
+        stream: ResultStream | None = None,
+    ):
+        """
+        Process a discovery job - actual hardcore work
+
+        `target` is one target or a shard's list of them; all of them seed
+        one pipeline, so DNS, probes and fingerprints overlap across
+        targets. With a ResultStream every pipeline item is published as
+        it is produced and only counters are kept in memory; returns the
+        run summary. Without one, assets are assembled in memory and
+        returned.
+        """
+        label = target if isinstance(target, str) else f"{len(target)} targets"
+        logger.info(f"Processing ASM discovery job {job_id} for {label}")
+        started = time.perf_counter()
+
+        now = datetime.now(timezone.utc).isoformat()
+        assets: Dict[str, dict] = {}
+        hosts: Dict[str, list] = {}
+        names = set()
+        port_map = HostPortMap()
+        counts = {"discover": 0, "probe": 0, "fingerprint": 0}
+
+        # Domains go through DNS; address blocks are fed lazily to the prober
+        targets = TargetSet.parse([target] if isinstance(target, str) else target, strict=False)
+        pipeline = self.build_pipeline(scan_type)
+
+        async for stage, item in pipeline.run(self.seeds(targets), entry=self.seed_stage):
+            counts[stage] += 1
+            if stage == "probe":
+                port_map.add(item["host"], item["port"])
+
+            if stream is not None:
+                if stage == "discover":
+                    names.add(item["name"])
+                elif stage == "probe" and item["host"] in targets:
+                    # Address target (resolved addresses belong to their name)
+                    names.add(item["host"])
+                await stream.add({"stage": stage, "seen_at": now, **item})
+                continue
+
+            if stage == "probe" and item["host"] not in assets and item["host"] in targets:
+                asset = assets[item["host"]] = {
+                    "id": f"asset_{job_id}_{len(assets) + 1}",
+                    "type": "ip",
+                    "identifier": item["host"],
+                    "records": {},
+                    "open_ports": [],
+                    "services": [],
+                    "first_seen": now,
+                    "last_seen": now,
+                    "risk_score": 0,
+                    "tags": ["discovered"],
+                }
+                hosts.setdefault(item["host"], []).append(asset)
+
+            if stage == "discover":
+                asset = assets.setdefault(item["name"], {
+                    "id": f"asset_{job_id}_{len(assets) + 1}",
+                    "type": "domain",
+                    "identifier": item["name"],
+                    "records": {},
+                    "open_ports": [],
+                    "services": [],
+                    "first_seen": now,
+                    "last_seen": now,
+                    "risk_score": 0,
+                    "tags": ["discovered"],
+                })
+                asset["records"].setdefault(item["type"], []).append(item["value"])
+                if item["type"] in ("A", "AAAA"):
+                    hosts.setdefault(item["value"], []).append(asset)
+
+            elif stage == "fingerprint":
+                for asset in hosts.get(item["host"], []):
+                    asset["services"].append(item)
+
+        for host, host_assets in hosts.items():
+            for asset in host_assets:
+                asset["open_ports"] += port_map.ports(host)
+
+        summary = {
+            "target": target,
+            "assets": len(names) if stream is not None else len(assets),
+            "dns_records": counts["discover"],
+            "open_ports": counts["probe"],
+            "services": counts["fingerprint"],
+            "duration_s": round(time.perf_counter() - started, 3),
+            # host -> compact port bitset, merged per run by the API
+            "ports": port_map.serialize(),
+        }
+        logger.info(
+            f"Discovery job {job_id} completed in {summary['duration_s']:.1f}s. "
+            f"Found {summary['assets']} assets"
+        )
+
+        if stream is not None:
+            return summary
+        return list(assets.values())
+
+    async def process_shard(self, job_id: str, targets: list[str], scan_type: str, stream: ResultStream) -> dict:
+        """
+        Run a fan-out sub-job: every target of the shard seeds one
+        pipeline on one stream
+        """
+        # Canonical, de-duplicated blocks (overlapping CIDRs are merged)
+        targets = TargetSet.parse(targets, strict=False).canonical()
+        summary = await self.process_discovery_job(job_id, targets, scan_type, stream=stream)
+        del summary["target"]
+        return {"targets": len(targets), **summary}
+
+    async def handle_job(self, payload: dict):
+        """
+        asm.jobs message:
+            {"job_id", "run_id", "user_id", "asm_discovery_id", "target", "intensity"}
+        Fan-out sub-jobs carry "targets" (one shard) instead of "target".
+        """
+        header = {
+            "job_id": payload["job_id"],
+            "run_id": payload.get("run_id"),
+            "user_id": payload.get("user_id"),
+            "asm_discovery_id": payload.get("asm_discovery_id"),
+        }
+        stream = ResultStream("asm", header)
+        scan_type = payload.get("intensity", "NORMAL")
+
+        try:
+            if "targets" in payload:
+                summary = await self.process_shard(payload["job_id"], payload["targets"], scan_type, stream)
+            else:
+                summary = await self.process_discovery_job(
+                    payload["job_id"], payload["target"], scan_type, stream=stream
+                )
+        except Exception as e:
+            logger.exception(f"Discovery job {payload['job_id']} failed")
+            # Chunks already published stay applied; the marker closes the job
+            await stream.complete("FAILED", error=f"{type(e).__name__}: {e}")
+            return
+
+        await stream.complete("COMPLETED", summary=summary)
+
     async def run(self):
         """Main worker loop"""
         logger.info("ASM Worker started")
-        while self.running:
-            # TODO: Poll queue for jobs
-            # job = await queue.get_job()
-            # if job:
-            #     await self.process_discovery_job(job.id, job.target, job.scan_type)
-            await asyncio.sleep(1)
+
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+
+        try:
+            await consume_messages(JOBS_QUEUE, self.handle_job, stop_event=stop_event)
+        finally:
+            self.running = False
+            await close_target_slots()
+            await close_queue()
 
 if __name__ == "__main__":
     worker = ASMWorker()
     asyncio.run(worker.run())
-
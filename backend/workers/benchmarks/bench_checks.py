@@ -0,0 +1,113 @@
+"""
+Signature check engine benchmark
+Prefiltered engine vs one regex pass per signature, over growing
+signature counts and response sizes
+
+Usage:
+    cd backend/workers
+    python -m benchmarks.bench_checks --signatures 500 5000 --sizes 4096 65536
+"""
+
+import argparse
+import random
+import re
+import string
+import time
+
+from checks import CheckEngine
+from checks.automaton import ahocorasick
+
+
+def synthetic_signatures(count: int) -> list[dict]:
+    rng = random.Random(3)
+    signatures = []
+    for i in range(count):
+        token = "".join(rng.choices(string.ascii_lowercase, k=10))
+        if i % 2:
+            matcher = {"type": "word", "part": "body", "words": [f"x-{token}"]}
+        else:
+            matcher = {"type": "regex", "part": "body", "regex": [f"{token}-v\\d+\\.\\d+"]}
+        signatures.append({
+            "id": f"sig-{i}",
+            "protocol": "http",
+            "ports": rng.choice([None, [80], [443, 8443]]),
+            "matchers": [matcher],
+        })
+    return signatures
+
+
+def synthetic_body(size: int, signatures: list[dict], hits: int) -> str:
+    rng = random.Random(size)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(500)]
+    body = []
+    length = 0
+    while length < size:
+        word = rng.choice(words)
+        body.append(word)
+        length += len(word) + 1
+    # Plant a few real matches
+    for signature in rng.sample(signatures, hits):
+        matcher = signature["matchers"][0]
+        if matcher["type"] == "word":
+            planted = matcher["words"][0]
+        else:
+            planted = matcher["regex"][0].split("-v")[0] + "-v1.2"
+        body.insert(rng.randrange(len(body)), planted)
+    return " ".join(body)
+
+
+def naive(signatures: list[dict], port: int, body: str) -> int:
+    """Every applicable signature runs its own regex over the body"""
+    found = 0
+    for signature in signatures:
+        if signature["ports"] and port not in signature["ports"]:
+            continue
+        matcher = signature["matchers"][0]
+        patterns = matcher["_naive"]
+        if any(p.search(body) for p in patterns):
+            found += 1
+    return found
+
+
+def timed(fn, rounds: int) -> tuple[float, int]:
+    result = fn()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--signatures", type=int, nargs="+", default=[500, 2000, 8000])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4096, 65536])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"automaton: {'pyahocorasick' if ahocorasick else 'pure python'}\n")
+    print(f"{'signatures':>10} {'body bytes':>10} {'compile s':>10} {'naive ms':>10} {'engine ms':>10} {'hits':>6}")
+    for count in args.signatures:
+        signatures = synthetic_signatures(count)
+        for signature in signatures:
+            matcher = signature["matchers"][0]
+            sources = matcher.get("regex") or [re.escape(w) for w in matcher["words"]]
+            matcher["_naive"] = [re.compile(s, re.IGNORECASE) for s in sources]
+
+        start = time.perf_counter()
+        engine = CheckEngine(signatures)
+        compile_time = time.perf_counter() - start
+
+        for size in args.sizes:
+            body = synthetic_body(size, signatures, hits=5)
+            naive_time, naive_hits = timed(lambda: naive(signatures, 80, body), args.rounds)
+            engine_time, findings = timed(lambda: engine.match({"body": body}, 80, "http"), args.rounds)
+            if len(findings) != naive_hits:
+                print(f"  mismatch: naive {naive_hits} engine {len(findings)}")
+            print(
+                f"{count:>10} {size:>10} {compile_time:>10.2f} "
+                f"{naive_time * 1000:>10.2f} {engine_time * 1000:>10.2f} {len(findings):>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
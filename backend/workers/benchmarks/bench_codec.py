@@ -0,0 +1,117 @@
+"""
+Queue codec micro-benchmark
+Compares encode/decode time and message size on ASM/VS-shaped payloads
+
+Usage:
+    cd backend/workers
+    python -m benchmarks.bench_codec --assets 5000
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from utils.codec import available_codecs
+
+
+def asm_result_payload(asset_count: int) -> dict:
+    rng = random.Random(42)
+    return {
+        "asm_discovery_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "run_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "sequence": 7,
+        "final": False,
+        "discovered_assets": [
+            {
+                "type": rng.choice(["domain", "ip", "service"]),
+                "identifier": f"host-{i}.sub{rng.randint(1, 50)}.example.com",
+                "ip": f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                "open_ports": sorted(rng.sample(range(1, 65536), rng.randint(0, 6))),
+                "first_seen": "2024-01-01T00:00:00",
+                "last_seen": "2024-01-14T00:00:00",
+                "risk_score": rng.randint(0, 100),
+                "tags": ["discovered", rng.choice(["cdn", "origin", "mail", "api"])],
+            }
+            for i in range(asset_count)
+        ],
+    }
+
+
+def vs_result_payload(finding_count: int) -> dict:
+    rng = random.Random(7)
+    return {
+        "scan_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "target": "api.company.com",
+        "vulnerabilities": [
+            {
+                "cve": f"CVE-20{rng.randint(10, 24)}-{rng.randint(1000, 49999)}",
+                "severity": rng.choice(["critical", "high", "medium", "low"]),
+                "exploitability_score": round(rng.uniform(0, 10), 1),
+                "port": rng.choice([22, 80, 443, 3306, 8080]),
+                "product": rng.choice(["nginx", "openssh", "mysql", "apache"]),
+                "version": f"{rng.randint(1, 9)}.{rng.randint(0, 30)}.{rng.randint(0, 9)}",
+                "description": "Remote code execution vulnerability " * 3,
+                "remediation": "Update to the latest vendor release",
+            }
+            for _ in range(finding_count)
+        ],
+    }
+
+
+def bench(codec, payload: dict, rounds: int) -> dict:
+    body = codec.encode(payload)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        codec.encode(payload)
+    encode_time = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        codec.decode(body)
+    decode_time = (time.perf_counter() - start) / rounds
+
+    return {
+        "bytes": len(body),
+        "encode_ms": encode_time * 1000,
+        "decode_ms": decode_time * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--assets", type=int, default=5000)
+    parser.add_argument("--findings", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    trigger = {
+        "user_id": "u-1",
+        "asm_discovery_id": "d-1",
+        "asset_type": "domain",
+        "target_source": "MANUAL_ENTRY",
+        "intensity": "NORMAL",
+    }
+
+    # (label, payload, rounds) - small messages need more rounds to time
+    payloads = [
+        (f"asm_results[{args.assets}]", asm_result_payload(args.assets), args.rounds),
+        (f"vs_results[{args.findings}]", vs_result_payload(args.findings), args.rounds),
+        ("asm_trigger", trigger, args.rounds * 1000),
+    ]
+
+    codecs = available_codecs()
+    print(f"{'payload':<22} {'codec':<8} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+    for label, payload, rounds in payloads:
+        for name, codec in codecs.items():
+            result = bench(codec, payload, rounds)
+            print(
+                f"{label:<22} {name:<8} {result['bytes']:>10} "
+                f"{result['encode_ms']:>10.4f} {result['decode_ms']:>10.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
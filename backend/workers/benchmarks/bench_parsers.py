@@ -0,0 +1,165 @@
+"""
+Scanner output parser benchmark
+Streaming (iterparse / incremental JSON) vs whole-document parsing on
+synthetic nmap XML and trivy JSON, plus end-to-end through the ParsePool
+
+Usage:
+    cd backend/workers
+    python -m benchmarks.bench_parsers --hosts 65536 --vulns 200000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from scanners import ParsePool, iter_nmap_xml, iter_trivy_json
+
+PORTS = [22, 25, 53, 80, 110, 143, 443, 445, 3306, 5432, 6379, 8080, 8443]
+PRODUCTS = [("ssh", "OpenSSH", "8.9p1"), ("http", "nginx", "1.24.0"), ("mysql", "MySQL", "8.0.36")]
+
+
+# ---------------------------------------------------
+# Synthetic inputs (written incrementally, never held in memory)
+# ---------------------------------------------------
+def write_nmap_xml(path: str, hosts: int, ports_per_host: int):
+    rng = random.Random(42)
+    with open(path, "w") as fh:
+        fh.write('<?xml version="1.0"?>\n<nmaprun scanner="nmap" args="nmap -sV -oX">\n')
+        for i in range(hosts):
+            ip = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+            fh.write(f'<host><status state="up"/><address addr="{ip}" addrtype="ipv4"/>')
+            fh.write(f'<hostnames><hostname name="h{i}.example.com" type="PTR"/></hostnames><ports>')
+            for port in rng.sample(PORTS, ports_per_host):
+                name, product, version = rng.choice(PRODUCTS)
+                state = "open" if rng.random() < 0.7 else "closed"
+                fh.write(
+                    f'<port protocol="tcp" portid="{port}"><state state="{state}"/>'
+                    f'<service name="{name}" product="{product}" version="{version}">'
+                    f'<cpe>cpe:/a:{product.lower()}:{product.lower()}:{version}</cpe></service></port>'
+                )
+            fh.write("</ports></host>\n")
+        fh.write("</nmaprun>\n")
+
+
+def write_trivy_json(path: str, targets: int, vulns: int):
+    rng = random.Random(7)
+    per_target = max(1, vulns // targets)
+    with open(path, "w") as fh:
+        fh.write('{"SchemaVersion": 2, "ArtifactName": "bench", "ArtifactType": "filesystem", "Results": [')
+        for t in range(targets):
+            if t:
+                fh.write(",")
+            items = [
+                {
+                    "VulnerabilityID": f"CVE-20{rng.randint(10, 24)}-{rng.randint(1000, 49999)}",
+                    "PkgName": f"pkg-{rng.randint(0, 500)}",
+                    "InstalledVersion": "1.2.3",
+                    "FixedVersion": "1.2.4",
+                    "Severity": rng.choice(["CRITICAL", "HIGH", "MEDIUM", "LOW"]),
+                    "Title": "Remote code execution vulnerability " * 2,
+                    "CVSS": {"nvd": {"V3Score": round(rng.uniform(0, 10), 1)}},
+                }
+                for _ in range(per_target)
+            ]
+            json.dump({"Target": f"target-{t}", "Class": "lang-pkgs", "Type": "pip", "Vulnerabilities": items}, fh)
+        fh.write("]}\n")
+
+
+# ---------------------------------------------------
+# Whole-document baselines
+# ---------------------------------------------------
+def load_nmap_xml(path: str) -> int:
+    return sum(1 for port in ET.parse(path).getroot().iter("port") if port.find("state").get("state") == "open")
+
+
+def load_trivy_json(path: str) -> int:
+    with open(path) as fh:
+        return sum(len(r.get("Vulnerabilities") or ()) for r in json.load(fh)["Results"])
+
+
+# ---------------------------------------------------
+# Measurement
+# ---------------------------------------------------
+def measure(fn) -> dict:
+    """Time one run, then a second run under tracemalloc for peak memory"""
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"records": count, "seconds": elapsed, "peak_mb": peak / 2**20}
+
+
+async def through_pool(pool: ParsePool, kind: str, path: str) -> int:
+    count = 0
+    async for _ in pool.stream(kind, path):
+        count += 1
+    return count
+
+
+def report(label: str, result: dict):
+    rate = result["records"] / result["seconds"] if result["seconds"] else 0
+    print(
+        f"{label:<26} {result['records']:>10} {result['seconds']:>9.2f} "
+        f"{rate:>12.0f} {result['peak_mb']:>10.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=65536, help="hosts in the nmap sweep (/16 = 65536)")
+    parser.add_argument("--ports-per-host", type=int, default=4)
+    parser.add_argument("--targets", type=int, default=500, help="trivy Results entries")
+    parser.add_argument("--vulns", type=int, default=200000)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        nmap_path = os.path.join(tmp, "sweep.xml")
+        trivy_path = os.path.join(tmp, "trivy.json")
+        write_nmap_xml(nmap_path, args.hosts, args.ports_per_host)
+        write_trivy_json(trivy_path, args.targets, args.vulns)
+        print(
+            f"nmap {os.path.getsize(nmap_path) / 2**20:.1f} MB, "
+            f"trivy {os.path.getsize(trivy_path) / 2**20:.1f} MB\n"
+        )
+
+        print(f"{'parser':<26} {'records':>10} {'seconds':>9} {'records/s':>12} {'peak MB':>10}")
+
+        # End to end first, so the children fork from a small parent:
+        # parse in children, consume on the event loop
+        pool = ParsePool(workers=args.workers)
+        try:
+            for kind, path in (("nmap", nmap_path), ("trivy", trivy_path)):
+                start = time.perf_counter()
+                count = asyncio.run(through_pool(pool, kind, path))
+                elapsed = time.perf_counter() - start
+                rate = count / elapsed if elapsed else 0
+                print(f"{'pool ' + kind:<26} {count:>10} {elapsed:>9.2f} {rate:>12.0f} {'-':>10}")
+        finally:
+            pool.close()
+
+        report("nmap full ET.parse", measure(lambda: load_nmap_xml(nmap_path)))
+        report("nmap iterparse", measure(lambda: sum(1 for _ in iter_nmap_xml(nmap_path))))
+        report("trivy full json.load", measure(lambda: load_trivy_json(trivy_path)))
+        report("trivy streaming", measure(lambda: sum(1 for _ in iter_trivy_json(trivy_path))))
+
+    # ru_maxrss is KiB on Linux
+    parent = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"\nmax RSS: parent {parent:.1f} MB (includes baselines), largest child {children:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+Response signature checks used by the VS worker
+"""
+
+from .engine import CheckEngine, load_engine, load_signatures, regex_anchor
+
+__all__ = [
+    "CheckEngine",
+    "load_engine",
+    "load_signatures",
+    "regex_anchor",
+]
@@ -0,0 +1,91 @@
+"""
+Aho-Corasick Multi-Pattern Automaton
+One pass over the text finds every occurrence of every pattern
+
+Uses pyahocorasick (C) when installed, otherwise a pure-Python automaton
+with the same interface. Both are picklable, so compiled rule sets can
+be cached on disk.
+"""
+
+from collections import deque
+
+try:
+    import ahocorasick
+except ImportError:  # optional
+    ahocorasick = None
+
+
+class PyAutomaton:
+    """
+    Dict-based goto/fail automaton. Outputs are merged along fail links
+    at build time so the scan loop does no extra walking.
+    """
+
+    def __init__(self):
+        self._goto: list[dict] = [{}]
+        self._out: list[list] = [[]]
+        self._fail: list[int] = [0]
+
+    def add(self, pattern: str, value):
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._out.append([])
+                self._fail.append(0)
+            state = nxt
+        self._out[state].append(value)
+
+    def build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_values(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                yield from out[state]
+
+
+class CAutomaton:
+    """
+    pyahocorasick wrapper exposing the PyAutomaton interface
+    """
+
+    def __init__(self):
+        self._automaton = ahocorasick.Automaton()
+        self._values: dict[str, list] = {}
+
+    def add(self, pattern: str, value):
+        self._values.setdefault(pattern, []).append(value)
+
+    def build(self):
+        for pattern, values in self._values.items():
+            self._automaton.add_word(pattern, values)
+        self._automaton.make_automaton()
+
+    def iter_values(self, text: str):
+        if not self._values:
+            return
+        for _, values in self._automaton.iter(text):
+            yield from values
+
+
+def new_automaton():
+    return CAutomaton() if ahocorasick is not None else PyAutomaton()
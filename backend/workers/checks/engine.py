@@ -0,0 +1,302 @@
+"""
+Signature Check Engine
+Aho-Corasick prefilter + full evaluation of candidate signatures only
+
+    response -> lowercased text -> automaton(protocol, port) -> candidate ids
+                                                     -> word/regex matchers
+
+Each signature contributes literal "anchors" of which at least one must
+appear for it to possibly match. One automaton pass over the response
+yields the candidates; only those run their regexes. Signatures without
+a usable anchor are evaluated on every response of their port/protocol.
+
+Signature (JSON):
+    {
+      "id": "git-config-exposed", "name": "...", "severity": "high",
+      "protocol": "http", "ports": [80, 443],          # omitted = any port
+      "condition": "and",                              # across matchers
+      "matchers": [
+        {"type": "word", "part": "body", "words": ["[core]"], "condition": "or"},
+        {"type": "regex", "part": "body", "regex": ["repositoryformatversion\\s*=\\s*\\d"]}
+      ]
+    }
+Parts: body, header, banner, all. Matching is case-insensitive.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+
+from .automaton import new_automaton
+
+logger = logging.getLogger(__name__)
+
+ENGINE_VERSION = 1
+MIN_ANCHOR = 3
+PARTS = ("body", "header", "banner", "all")
+
+
+# ---------------------------------------------------
+# Anchor extraction
+# ---------------------------------------------------
+def regex_anchor(pattern: str) -> str | None:
+    """
+    Longest literal run that every match of `pattern` must contain.
+    Conservative: top-level alternation or nothing literal -> None.
+    """
+    runs, current = [], []
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            if depth == 0 and not escaped.isalnum():
+                current.append(escaped)
+            else:
+                runs.append("".join(current))
+                current = []
+            i += 2
+            continue
+        if char == "[":
+            # Skip the whole class
+            runs.append("".join(current))
+            current = []
+            i = pattern.find("]", i + 2) + 1 or len(pattern)
+            continue
+        if char == "(":
+            depth += 1
+            runs.append("".join(current))
+            current = []
+        elif char == ")":
+            depth -= 1
+        elif char == "|":
+            if depth == 0:
+                return None
+        elif char in "?*{":
+            # The preceding atom is optional
+            if current:
+                current.pop()
+            runs.append("".join(current))
+            current = []
+            if char == "{":
+                i = pattern.find("}", i) + 1 or len(pattern)
+                continue
+        elif char in "+.^$":
+            runs.append("".join(current))
+            current = []
+        elif depth == 0:
+            current.append(char)
+        i += 1
+    runs.append("".join(current))
+
+    best = max(runs, key=len)
+    return best.lower() if len(best) >= MIN_ANCHOR else None
+
+
+def _matcher_anchors(matcher: dict) -> set | None:
+    if matcher["type"] == "word":
+        words = [w.lower() for w in matcher["words"]]
+        if matcher.get("condition", "or") == "and":
+            best = max(words, key=len)
+            return {best} if len(best) >= MIN_ANCHOR else None
+        return set(words) if all(len(w) >= MIN_ANCHOR for w in words) else None
+
+    anchors = set()
+    for pattern in matcher["regex"]:
+        anchor = regex_anchor(pattern)
+        if anchor is None:
+            return None
+        anchors.add(anchor)
+    if matcher.get("condition", "or") == "and":
+        return {max(anchors, key=len)}
+    return anchors
+
+
+def signature_anchors(signature: dict) -> set | None:
+    """
+    Literals of which at least one appears in any matching response
+    """
+    per_matcher = [_matcher_anchors(m) for m in signature["matchers"]]
+    if signature.get("condition", "and") == "and":
+        usable = [a for a in per_matcher if a]
+        if not usable:
+            return None
+        # Fewest, longest anchors = fewest false candidates
+        return min(usable, key=lambda a: (len(a), -min(map(len, a))))
+    if any(a is None for a in per_matcher):
+        return None
+    return set().union(*per_matcher)
+
+
+# ---------------------------------------------------
+# Full evaluation
+# ---------------------------------------------------
+def _part_text(response: dict, part: str) -> str:
+    if part == "all":
+        return "\n".join(response.get(p) or "" for p in ("header", "body", "banner"))
+    return response.get(part) or ""
+
+
+def _eval_matcher(matcher: dict, response: dict) -> bool:
+    text = _part_text(response, matcher.get("part", "body"))
+    if matcher["type"] == "word":
+        haystack = text.lower()
+        hits = (w in haystack for w in matcher["_words"])
+    else:
+        hits = (regex.search(text) for regex in matcher["_regex"])
+    if matcher.get("condition", "or") == "and":
+        return all(hits)
+    return any(hits)
+
+
+def evaluate(signature: dict, response: dict) -> bool:
+    results = (_eval_matcher(m, response) for m in signature["matchers"])
+    if signature.get("condition", "and") == "and":
+        return all(results)
+    return any(results)
+
+
+# ---------------------------------------------------
+# Engine
+# ---------------------------------------------------
+class CheckEngine:
+    """
+    Compiled signature set. Automatons are built per (protocol, port):
+    signatures listing that port plus every any-port signature of the
+    protocol, so a response is only scanned against rules that apply.
+    """
+
+    def __init__(self, signatures: list[dict]):
+        self.signatures = signatures
+        self._groups: dict[tuple, dict] = {}
+        self._compile()
+
+    @staticmethod
+    def _prepare(signature: dict) -> dict:
+        for matcher in signature["matchers"]:
+            if matcher.get("part", "body") not in PARTS:
+                raise ValueError(f"{signature['id']}: unknown part {matcher.get('part')}")
+            if matcher["type"] == "word":
+                matcher["_words"] = [w.lower() for w in matcher["words"]]
+            elif matcher["type"] == "regex":
+                matcher["_regex"] = [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in matcher["regex"]]
+            else:
+                raise ValueError(f"{signature['id']}: unknown matcher type {matcher['type']}")
+        signature["_anchors"] = signature_anchors(signature)
+        return signature
+
+    def _compile(self):
+        by_protocol: dict[str, dict] = {}
+        for index, signature in enumerate(self.signatures):
+            self._prepare(signature)
+            ports = by_protocol.setdefault(signature.get("protocol", "tcp"), {})
+            for port in signature.get("ports") or (None,):
+                ports.setdefault(port, []).append(index)
+
+        for protocol, ports in by_protocol.items():
+            any_port = ports.get(None, [])
+            for port, indexes in ports.items():
+                members = indexes if port is None else indexes + any_port
+                self._groups[(protocol, port)] = self._build_group(members)
+
+        unanchored = sum(1 for s in self.signatures if s["_anchors"] is None)
+        logger.info(
+            "Compiled %d signatures into %d groups (%d without anchors)",
+            len(self.signatures), len(self._groups), unanchored,
+        )
+
+    def _build_group(self, members: list[int]) -> dict:
+        automaton = new_automaton()
+        always = []
+        for index in members:
+            anchors = self.signatures[index]["_anchors"]
+            if anchors is None:
+                always.append(index)
+                continue
+            for anchor in anchors:
+                automaton.add(anchor, index)
+        automaton.build()
+        return {"automaton": automaton, "always": always}
+
+    def candidates(self, response: dict, port: int, protocol: str) -> set[int]:
+        group = self._groups.get((protocol, port)) or self._groups.get((protocol, None))
+        if group is None:
+            return set()
+        text = _part_text(response, "all").lower()
+        found = set(group["always"])
+        found.update(group["automaton"].iter_values(text))
+        return found
+
+    def match(self, response: dict, port: int, protocol: str) -> list[dict]:
+        """
+        response: {"body": str, "header": str, "banner": str}
+        """
+        findings = []
+        for index in sorted(self.candidates(response, port, protocol)):
+            signature = self.signatures[index]
+            if evaluate(signature, response):
+                findings.append({
+                    "source": "checks",
+                    "kind": "vulnerability",
+                    "check_id": signature["id"],
+                    "title": signature.get("name", signature["id"]),
+                    "severity": signature.get("severity", "info"),
+                    "port": port,
+                    "protocol": protocol,
+                })
+        return findings
+
+
+# ---------------------------------------------------
+# Loading + disk cache
+# ---------------------------------------------------
+def _signature_files(path: str) -> list[str]:
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "**", "*.json"), recursive=True))
+    return [path]
+
+
+def load_signatures(path: str) -> list[dict]:
+    signatures = []
+    for filename in _signature_files(path):
+        with open(filename) as fh:
+            data = json.load(fh)
+        signatures += data["signatures"] if isinstance(data, dict) else data
+    return signatures
+
+
+def load_engine(path: str, cache_dir: str | None = None) -> CheckEngine:
+    """
+    Compile the signatures under `path`, reusing a pickled engine from
+    `cache_dir` when neither the signature files nor the engine changed.
+    """
+    digest = hashlib.sha256(f"engine:{ENGINE_VERSION}".encode())
+    for filename in _signature_files(path):
+        with open(filename, "rb") as fh:
+            digest.update(filename.encode())
+            digest.update(fh.read())
+
+    cache_path = os.path.join(cache_dir, f"checks-{digest.hexdigest()[:16]}.pkl") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as fh:
+                engine = pickle.load(fh)
+            logger.info("Loaded %d compiled signatures from %s", len(engine.signatures), cache_path)
+            return engine
+        except Exception:
+            logger.warning("Compiled signature cache %s unreadable, recompiling", cache_path)
+
+    engine = CheckEngine(load_signatures(path))
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            pickle.dump(engine, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    return engine
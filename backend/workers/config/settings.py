@@ -35,10 +35,113 @@ class Settings:
     RABBITMQ_PORT: int = int(os.getenv("RABBITMQ_PORT", "5672"))
     RABBITMQ_USER: str = os.getenv("RABBITMQ_USER", "guest")
     RABBITMQ_PASSWORD: str = os.getenv("RABBITMQ_PASSWORD", "guest")
+    QUEUE_CHANNEL_POOL_SIZE: int = int(os.getenv("QUEUE_CHANNEL_POOL_SIZE", "8"))
+    QUEUE_PUBLISHER_CONFIRMS: bool = (
+        os.getenv("QUEUE_PUBLISHER_CONFIRMS", "True").lower() == "true"
+    )
+    QUEUE_CONFIRM_BATCH_SIZE: int = int(os.getenv("QUEUE_CONFIRM_BATCH_SIZE", "100"))
+    QUEUE_CODEC: str = os.getenv("QUEUE_CODEC", "orjson")   # json | orjson | msgpack
+    QUEUE_PREFETCH_COUNT: int = int(os.getenv("QUEUE_PREFETCH_COUNT", "32"))
+    QUEUE_CONSUMER_CONCURRENCY: int = int(os.getenv("QUEUE_CONSUMER_CONCURRENCY", "16"))
+    QUEUE_DRAIN_TIMEOUT: float = float(os.getenv("QUEUE_DRAIN_TIMEOUT", "30"))
+    QUEUE_RETRY_DELAYS: str = os.getenv("QUEUE_RETRY_DELAYS", "5,30,120,600")
+    QUEUE_MAX_RETRIES: int = int(os.getenv("QUEUE_MAX_RETRIES", "5"))
+
+    # -------------------- Dedup ---------------------
+    DEDUP_TTL: int = int(os.getenv("DEDUP_TTL", "86400"))          # completed marker
+    DEDUP_LEASE: int = int(os.getenv("DEDUP_LEASE", "900"))        # in-progress marker
+    DEDUP_LRU_SIZE: int = int(os.getenv("DEDUP_LRU_SIZE", "10000"))
+
+    # Lane weights for asm.triggers priority lanes (lane:weight,...)
+    ASM_TRIGGER_LANE_WEIGHTS: str = os.getenv(
+        "ASM_TRIGGER_LANE_WEIGHTS",
+        "interactive:6,standard:3,bulk:1"
+    )
     
     #--------------- Micro-services Urls ---------------
     ASM_MICROSERVICE: str  = os.getenv("ASM_MICROSERVICE")
+
+    # -------------------- HTTP client -----------------
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "30"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "200"))
+    HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "50"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_MAX_PER_HOST: int = int(os.getenv("HTTP_MAX_PER_HOST", "50"))
+    HTTP_ENABLE_HTTP2: bool = os.getenv("HTTP_ENABLE_HTTP2", "True").lower() == "true"
+    HTTP_RETRIES: int = int(os.getenv("HTTP_RETRIES", "3"))
+    HTTP_BACKOFF_BASE: float = float(os.getenv("HTTP_BACKOFF_BASE", "0.2"))
+    HTTP_BACKOFF_MAX: float = float(os.getenv("HTTP_BACKOFF_MAX", "5"))
    
+    # -------------------- Discovery -----------------
+    DNS_CONCURRENCY: int = int(os.getenv("DNS_CONCURRENCY", "200"))
+    DNS_TIMEOUT: float = float(os.getenv("DNS_TIMEOUT", "3"))
+    DNS_NAMESERVERS: str = os.getenv("DNS_NAMESERVERS", "")   # comma separated, empty = system
+    DNS_WORDLIST: Optional[str] = os.getenv("DNS_WORDLIST")
+
+    PORTSCAN_CONCURRENCY: int = int(os.getenv("PORTSCAN_CONCURRENCY", "500"))
+    PORTSCAN_GLOBAL_RATE: float = float(os.getenv("PORTSCAN_GLOBAL_RATE", "2000"))      # probes/s
+    PORTSCAN_PER_TARGET_RATE: float = float(os.getenv("PORTSCAN_PER_TARGET_RATE", "200"))
+    PORTSCAN_TIMEOUT: float = float(os.getenv("PORTSCAN_TIMEOUT", "2.0"))
+    PORTSCAN_MIN_TIMEOUT: float = float(os.getenv("PORTSCAN_MIN_TIMEOUT", "0.1"))
+    PORTSCAN_HOST_STATE: int = int(os.getenv("PORTSCAN_HOST_STATE", "4096"))   # hosts with rate/RTT state kept
+    FINGERPRINT_TIMEOUT: float = float(os.getenv("FINGERPRINT_TIMEOUT", "3"))
+    FINGERPRINT_PROBES_PATH: str = os.getenv("FINGERPRINT_PROBES_PATH", "/usr/share/nmap/nmap-service-probes")
+    FINGERPRINT_MAX_RARITY: int = int(os.getenv("FINGERPRINT_MAX_RARITY", "7"))   # nmap --version-intensity
+    FINGERPRINT_MAX_PROBES: int = int(os.getenv("FINGERPRINT_MAX_PROBES", "8"))    # active probes per port
+    FINGERPRINT_CACHE_SIZE: int = int(os.getenv("FINGERPRINT_CACHE_SIZE", "100000"))
+
+    # Discovery pipeline stage concurrency
+    PIPELINE_PROBE_CONCURRENCY: int = int(os.getenv("PIPELINE_PROBE_CONCURRENCY", "32"))
+    PIPELINE_FINGERPRINT_CONCURRENCY: int = int(os.getenv("PIPELINE_FINGERPRINT_CONCURRENCY", "64"))
+    PIPELINE_QUEUE_SIZE: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "1000"))
+
+    # -------------------- Result cache --------------
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "True").lower() == "true"
+    CACHE_REDIS: bool = os.getenv("CACHE_REDIS", "True").lower() == "true"    # shared tier
+    CACHE_LRU_SIZE: int = int(os.getenv("CACHE_LRU_SIZE", "100000"))          # entries per namespace
+    CACHE_REDIS_RETRY: float = float(os.getenv("CACHE_REDIS_RETRY", "30"))
+    DNS_CACHE_MIN_TTL: int = int(os.getenv("DNS_CACHE_MIN_TTL", "30"))
+    DNS_CACHE_MAX_TTL: int = int(os.getenv("DNS_CACHE_MAX_TTL", "3600"))
+    DNS_CACHE_DEFAULT_TTL: int = int(os.getenv("DNS_CACHE_DEFAULT_TTL", "300"))    # answers without a TTL
+    DNS_CACHE_NEGATIVE_TTL: int = int(os.getenv("DNS_CACHE_NEGATIVE_TTL", "60"))   # NXDOMAIN / no answer
+    PROBE_CACHE_TTL: int = int(os.getenv("PROBE_CACHE_TTL", "300"))
+
+    # -------------------- Politeness ----------------
+    POLITENESS_ENABLED: bool = os.getenv("POLITENESS_ENABLED", "True").lower() == "true"
+    POLITENESS_MAX_HOLDERS: int = int(os.getenv("POLITENESS_MAX_HOLDERS", "2"))   # worker processes per target
+    POLITENESS_GROUP: str = os.getenv("POLITENESS_GROUP", "/24")                  # host | /24
+    POLITENESS_LEASE: float = float(os.getenv("POLITENESS_LEASE", "30"))
+    POLITENESS_LINGER: float = float(os.getenv("POLITENESS_LINGER", "1.0"))       # keep an idle lease this long
+    POLITENESS_RETRY_DELAY: float = float(os.getenv("POLITENESS_RETRY_DELAY", "0.5"))
+    POLITENESS_WAIT_TIMEOUT: float = float(os.getenv("POLITENESS_WAIT_TIMEOUT", "600"))   # hold() gives up after
+
+    # -------------------- Results -------------------
+    RESULTS_CHUNK_SIZE: int = int(os.getenv("RESULTS_CHUNK_SIZE", "500"))
+    RESULTS_FLUSH_INTERVAL: float = float(os.getenv("RESULTS_FLUSH_INTERVAL", "5"))
+
+    # -------------------- Scanner output parsing ----
+    PARSE_POOL_WORKERS: int = int(os.getenv("PARSE_POOL_WORKERS", "0"))      # 0 = CPU count
+    PARSE_BATCH_SIZE: int = int(os.getenv("PARSE_BATCH_SIZE", "500"))
+    PARSE_QUEUE_DEPTH: int = int(os.getenv("PARSE_QUEUE_DEPTH", "8"))         # batches in flight per file
+
+    # -------------------- Vulnerability data ------
+    CVE_INDEX_PATH: str = os.getenv("CVE_INDEX_PATH", "data/cve.idx")     # built by vulndb.build
+    CHECKS_PATH: str = os.getenv("CHECKS_PATH", "checks/signatures")        # file or directory of JSON signatures
+    CHECKS_CACHE_DIR: str = os.getenv("CHECKS_CACHE_DIR", "data/checks-cache")
+
+    # -------------------- Supervisor ----------------
+    SUPERVISOR_POLL_INTERVAL: float = float(os.getenv("SUPERVISOR_POLL_INTERVAL", "5"))
+    SUPERVISOR_SCALE_UP_BACKLOG: int = int(os.getenv("SUPERVISOR_SCALE_UP_BACKLOG", "50"))
+    SUPERVISOR_SCALE_DOWN_BACKLOG: int = int(os.getenv("SUPERVISOR_SCALE_DOWN_BACKLOG", "5"))
+    SUPERVISOR_SCALE_UP_TICKS: int = int(os.getenv("SUPERVISOR_SCALE_UP_TICKS", "2"))
+    SUPERVISOR_SCALE_DOWN_TICKS: int = int(os.getenv("SUPERVISOR_SCALE_DOWN_TICKS", "12"))
+    SUPERVISOR_COOLDOWN: float = float(os.getenv("SUPERVISOR_COOLDOWN", "30"))
+    ASM_TRIGGER_MIN_PROCS: int = int(os.getenv("ASM_TRIGGER_MIN_PROCS", "1"))
+    ASM_TRIGGER_MAX_PROCS: int = int(os.getenv("ASM_TRIGGER_MAX_PROCS", "0"))   # 0 = CPU count
+    ASM_WORKER_MIN_PROCS: int = int(os.getenv("ASM_WORKER_MIN_PROCS", "1"))
+    ASM_WORKER_MAX_PROCS: int = int(os.getenv("ASM_WORKER_MAX_PROCS", "0"))     # 0 = CPU count
+    ASM_WORKER_DRAIN_TIMEOUT: float = float(os.getenv("ASM_WORKER_DRAIN_TIMEOUT", "3600"))   # longest asm.jobs run
+
     APP_NAME: str = "CyberSentinel Worker Service"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
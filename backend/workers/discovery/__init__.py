@@ -0,0 +1,24 @@
+"""
+Discovery engines used by the ASM worker
+"""
+
+from .dns import DnsEnumerator, StaticResolver, SystemResolver, AioDnsResolver
+from .ports import PortScanner, TokenBucket, ports_for_intensity
+from .fingerprint import fingerprint, grab_banner, send_probe, ServiceFingerprinter, get_fingerprinter
+from .service_probes import ProbeDatabase
+
+__all__ = [
+    "DnsEnumerator",
+    "StaticResolver",
+    "SystemResolver",
+    "AioDnsResolver",
+    "PortScanner",
+    "TokenBucket",
+    "ports_for_intensity",
+    "fingerprint",
+    "grab_banner",
+    "send_probe",
+    "ServiceFingerprinter",
+    "get_fingerprinter",
+    "ProbeDatabase",
+]
@@ -0,0 +1,282 @@
+"""
+Async DNS / Subdomain Enumeration
+Bounded-concurrency resolution with a pluggable resolver
+"""
+
+import asyncio
+import logging
+import secrets
+import socket
+import time
+
+from config.settings import settings
+from utils.cache import TieredCache, get_cache
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+RECORD_TYPES = ("A", "AAAA", "CNAME", "MX", "TXT")
+ADDRESS_TYPES = ("A", "AAAA", "CNAME")
+
+# Small built-in wordlist used when DNS_WORDLIST is not set
+DEFAULT_WORDLIST = (
+    "www", "mail", "api", "app", "dev", "staging", "test", "admin", "portal",
+    "vpn", "remote", "webmail", "smtp", "ns1", "ns2", "cdn", "static", "assets",
+    "blog", "shop", "docs", "status", "git", "jenkins", "ci", "auth", "sso",
+    "m", "beta", "old", "backup", "db", "internal", "intranet", "support",
+)
+
+_lookups = registry.counter("dns.lookups")
+_errors = registry.counter("dns.errors")
+_latency = registry.histogram("dns.latency")
+
+
+def record(name: str, rtype: str, value: str, ttl: int | None = None) -> dict:
+    return {"name": name, "type": rtype, "value": value, "ttl": ttl}
+
+
+def cache_ttl(records: list[dict]) -> int:
+    """
+    Answer TTL (lowest record TTL) clamped to DNS_CACHE_MIN/MAX_TTL;
+    empty answers are cached for DNS_CACHE_NEGATIVE_TTL
+    """
+    if not records:
+        return settings.DNS_CACHE_NEGATIVE_TTL
+    ttls = [r["ttl"] for r in records if r.get("ttl") is not None]
+    ttl = min(ttls) if ttls else settings.DNS_CACHE_DEFAULT_TTL
+    return min(max(ttl, settings.DNS_CACHE_MIN_TTL), settings.DNS_CACHE_MAX_TTL)
+
+
+# ---------------------------------------------------
+# Resolvers
+# resolve(name, rtype) -> list[record]; [] for NXDOMAIN / no answer
+# ---------------------------------------------------
+class StaticResolver:
+    """
+    In-memory zone, used as a local stand-in resolver.
+
+    zone = {"www.example.com": {"A": ["192.0.2.1"]},
+            "*.wild.com": {"A": ["192.0.2.9"]}}
+    """
+
+    def __init__(self, zone: dict, ttl: int = 300, delay: float = 0.0):
+        self.zone = {name.lower().rstrip("."): types for name, types in zone.items()}
+        self.ttl = ttl
+        self.delay = delay
+        self.queries = 0
+
+    async def resolve(self, name: str, rtype: str) -> list[dict]:
+        self.queries += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        name = name.lower().rstrip(".")
+        entry = self.zone.get(name)
+        if entry is None:
+            parent = name.split(".", 1)[1] if "." in name else ""
+            entry = self.zone.get(f"*.{parent}")
+        if entry is None:
+            return []
+        return [record(name, rtype, value, self.ttl) for value in entry.get(rtype, [])]
+
+
+class SystemResolver:
+    """
+    getaddrinfo() in the loop's executor. A/AAAA only, no TTLs.
+    Fallback when dnspython is not installed.
+    """
+
+    async def resolve(self, name: str, rtype: str) -> list[dict]:
+        family = {"A": socket.AF_INET, "AAAA": socket.AF_INET6}.get(rtype)
+        if family is None:
+            return []
+
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(name, None, family=family, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            return []
+        values = sorted({info[4][0] for info in infos})
+        return [record(name, rtype, value) for value in values]
+
+
+class AioDnsResolver:
+    """
+    dnspython async resolver (all record types, real TTLs)
+    """
+
+    def __init__(self, nameservers: list[str] | None = None, timeout: float | None = None):
+        import dns.asyncresolver
+        import dns.exception
+        import dns.resolver
+
+        self._dns = dns
+        self.resolver = dns.asyncresolver.Resolver()
+        if nameservers:
+            self.resolver.nameservers = nameservers
+        self.timeout = timeout or settings.DNS_TIMEOUT
+
+    async def resolve(self, name: str, rtype: str) -> list[dict]:
+        dns = self._dns
+        try:
+            answer = await self.resolver.resolve(name, rtype, lifetime=self.timeout)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return []
+
+        ttl = answer.rrset.ttl if answer.rrset is not None else None
+        values = []
+        for rdata in answer:
+            if rtype == "MX":
+                values.append(f"{rdata.preference} {rdata.exchange.to_text().rstrip('.')}")
+            elif rtype == "TXT":
+                values.append(b"".join(rdata.strings).decode(errors="replace"))
+            else:
+                values.append(rdata.to_text().rstrip("."))
+        return [record(name, rtype, value, ttl) for value in values]
+
+
+def default_resolver():
+    nameservers = [ns for ns in settings.DNS_NAMESERVERS.split(",") if ns.strip()]
+    try:
+        return AioDnsResolver(nameservers=nameservers or None)
+    except ImportError:
+        logger.warning("dnspython not installed, using system resolver (A/AAAA only)")
+        return SystemResolver()
+
+
+def load_wordlist(path: str | None = None) -> list[str]:
+    path = path or settings.DNS_WORDLIST
+    if not path:
+        return list(DEFAULT_WORDLIST)
+    with open(path) as fh:
+        return [line.strip().lower() for line in fh if line.strip() and not line.startswith("#")]
+
+
+# ---------------------------------------------------
+# Enumerator
+# ---------------------------------------------------
+class DnsEnumerator:
+    """
+    Resolves (name, record type) pairs with at most `concurrency` lookups
+    in flight. A fixed set of worker coroutines pulls from a queue, so
+    memory stays flat no matter how many names are queued.
+
+    Answers (including NXDOMAIN / no answer, not errors) are cached per
+    (record type, name) in the shared "dns" cache for their TTL.
+    """
+
+    def __init__(
+        self,
+        resolver=None,
+        concurrency: int | None = None,
+        timeout: float | None = None,
+        cache: TieredCache | None = None,
+    ):
+        self.resolver = resolver or default_resolver()
+        self.concurrency = concurrency or settings.DNS_CONCURRENCY
+        self.timeout = timeout or settings.DNS_TIMEOUT
+        self.cache = cache or get_cache("dns")
+
+    async def _resolve(self, name: str, rtype: str) -> list[dict]:
+        _lookups.inc()
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(self.resolver.resolve(name, rtype), self.timeout)
+        finally:
+            _latency.observe(time.perf_counter() - start)
+
+    async def lookup(self, name: str, rtype: str) -> list[dict]:
+        try:
+            if self.cache is None:
+                return await self._resolve(name, rtype)
+            return await self.cache.get_or_compute(
+                f"{rtype}:{name.lower().rstrip('.')}",
+                lambda: self._resolve(name, rtype),
+                cache_ttl,
+            )
+        except Exception as e:
+            _errors.inc()
+            logger.debug("DNS %s %s failed: %s", rtype, name, e)
+            return []
+
+    async def resolve_many(self, queries):
+        """
+        Async generator: yields the records of each (name, rtype) query as
+        soon as it resolves, in completion order.
+        """
+        pending: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        done = object()
+
+        async def feed():
+            for query in queries:
+                await pending.put(query)
+            for _ in range(self.concurrency):
+                await pending.put(done)
+
+        async def work():
+            while True:
+                query = await pending.get()
+                if query is done:
+                    await results.put(done)
+                    return
+                await results.put(await self.lookup(*query))
+
+        tasks = [asyncio.create_task(feed())]
+        tasks += [asyncio.create_task(work()) for _ in range(self.concurrency)]
+
+        try:
+            finished = 0
+            while finished < self.concurrency:
+                item = await results.get()
+                if item is done:
+                    finished += 1
+                    continue
+                for rec in item:
+                    yield rec
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def detect_wildcard(self, domain: str, probes: int = 2) -> set[str]:
+        """
+        Resolve random labels under `domain`. Any answer means a wildcard;
+        returns the wildcard answer values (empty set when there is none).
+        """
+        names = [f"{secrets.token_hex(8)}.{domain}" for _ in range(probes)]
+        values = set()
+        async for rec in self.resolve_many((n, t) for n in names for t in ADDRESS_TYPES):
+            values.add(rec["value"])
+        return values
+
+    async def enumerate(
+        self,
+        domain: str,
+        wordlist=None,
+        record_types=RECORD_TYPES,
+    ):
+        """
+        Async generator of records for `domain` and its subdomains.
+
+        The apex is resolved for every record type. Brute-forcing
+        `wordlist` labels is skipped entirely when the zone has wildcard
+        DNS, since every guess would "resolve".
+        """
+        domain = domain.lower().strip().rstrip(".")
+
+        async for rec in self.resolve_many((domain, t) for t in record_types):
+            yield rec
+
+        if not wordlist:
+            return
+
+        wildcard = await self.detect_wildcard(domain)
+        if wildcard:
+            registry.counter("dns.wildcard_zones").inc()
+            logger.info("Wildcard DNS on %s (%s), skipping brute force", domain, sorted(wildcard))
+            return
+
+        names = (f"{label}.{domain}" for label in wordlist)
+        subdomain_types = [t for t in record_types if t in ADDRESS_TYPES]
+        async for rec in self.resolve_many((n, t) for n in names for t in subdomain_types):
+            yield rec
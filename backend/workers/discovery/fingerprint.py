@@ -0,0 +1,216 @@
+"""
+Service Fingerprinting
+Banner grab on open ports, then nmap-style active probes
+
+With a probe database (FINGERPRINT_PROBES_PATH, nmap-service-probes
+format) the NULL-probe banner is matched first; if that is not a hard
+match, the probes registered for the port are sent, then the rest by
+rarity up to FINGERPRINT_MAX_RARITY. Once a softmatch names the service,
+only probes that can hard match that service are sent. Probes are sent
+over TLS on their sslports. Raw responses are cached per (ip, port,
+probe) in the shared "probe" cache (empty ones, i.e. timeouts, are not)
+and results per (ip, port, banner hash). Without a database only the
+banner is returned.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import ssl
+from collections import OrderedDict
+
+from config.settings import settings
+from utils.cache import TieredCache, get_cache
+from utils.metrics import registry
+from .service_probes import ProbeDatabase
+
+logger = logging.getLogger(__name__)
+
+_cache_hits = registry.counter("fingerprint.cache_hits")
+_cache_misses = registry.counter("fingerprint.cache_misses")
+_probes_sent = registry.counter("fingerprint.probes_sent")
+
+
+async def grab_banner(host: str, port: int, timeout: float | None = None, size: int = 512) -> bytes:
+    """
+    Connect and read whatever the service sends first (SSH, SMTP, FTP...).
+    Returns b"" for services that wait for the client to speak.
+    """
+    return await send_probe(host, port, b"", timeout, size)
+
+
+_tls_context: ssl.SSLContext | None = None
+
+
+def tls_context() -> ssl.SSLContext:
+    """
+    Client context for probing: any certificate is accepted
+    """
+    global _tls_context
+
+    if _tls_context is None:
+        _tls_context = ssl.create_default_context()
+        _tls_context.check_hostname = False
+        _tls_context.verify_mode = ssl.CERT_NONE
+    return _tls_context
+
+
+async def send_probe(
+    host: str, port: int, payload: bytes, timeout: float | None = None, size: int = 4096, tls: bool = False
+) -> bytes:
+    """
+    Connect (TLS handshake included with `tls`), send `payload` (if any)
+    and read the first response
+    """
+    timeout = timeout or settings.FINGERPRINT_TIMEOUT
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=tls_context() if tls else None), timeout
+        )
+    except (OSError, asyncio.TimeoutError):
+        return b""
+
+    try:
+        if payload:
+            writer.write(payload)
+            await writer.drain()
+        return await asyncio.wait_for(reader.read(size), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return b""
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+class ServiceFingerprinter:
+    def __init__(
+        self,
+        database: ProbeDatabase | None,
+        max_rarity: int | None = None,
+        max_probes: int | None = None,
+        cache_size: int | None = None,
+        response_cache: TieredCache | None = None,
+    ):
+        self.database = database
+        self.response_cache = response_cache or get_cache("probe")
+        self.max_rarity = max_rarity or settings.FINGERPRINT_MAX_RARITY
+        self.max_probes = max_probes or settings.FINGERPRINT_MAX_PROBES
+        self.cache_size = cache_size or settings.FINGERPRINT_CACHE_SIZE
+        self._cache: OrderedDict = OrderedDict()
+
+    def _cached(self, key):
+        result = self._cache.get(key)
+        if result is None:
+            _cache_misses.inc()
+            return None
+        _cache_hits.inc()
+        self._cache.move_to_end(key)
+        return result
+
+    def _store(self, key, result: dict):
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _send(
+        self, host: str, port: int, name: str, payload: bytes,
+        timeout: float | None = None, size: int = 4096, tls: bool = False,
+    ) -> bytes:
+        if self.response_cache is None:
+            return await send_probe(host, port, payload, timeout, size, tls)
+
+        async def send() -> str:
+            # latin-1 maps bytes 1:1, so the response survives JSON
+            return (await send_probe(host, port, payload, timeout, size, tls)).decode("latin-1")
+
+        # No response (timeout, reset) may be transient: not cached
+        response = await self.response_cache.get_or_compute(
+            f"{host}:{port}:{name}{':tls' if tls else ''}",
+            send,
+            lambda response: settings.PROBE_CACHE_TTL if response else 0,
+        )
+        return response.encode("latin-1")
+
+    async def identify(self, host: str, port: int) -> dict:
+        banner = await self._send(host, port, "NULL", b"", size=512)
+        key = (host, port, hashlib.blake2b(banner, digest_size=8).digest())
+
+        cached = self._cached(key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        result = {
+            "host": host,
+            "port": port,
+            "banner": banner.decode(errors="replace").strip(),
+            "service": None,
+            "product": None,
+            "version": None,
+            "cpe": [],
+            "method": "banner",
+        }
+        if self.database is not None:
+            result.update(await self._probe(host, port, banner))
+
+        self._store(key, result)
+        return result
+
+    async def _probe(self, host: str, port: int, banner: bytes) -> dict:
+        database = self.database
+        soft = None
+
+        if banner and database.null_probe is not None:
+            matched = database.match(database.null_probe, banner)
+            if matched:
+                fields, is_soft = matched
+                if not is_soft:
+                    return {**fields, "method": "NULL"}
+                soft = {**fields, "method": "NULL"}
+
+        for probe in database.plan(port, self.max_rarity, self.max_probes):
+            # After a softmatch, only probes that can confirm that service
+            service = soft["service"] if soft else None
+            if service is not None and not database.can_identify(probe, service):
+                continue
+            timeout = min(probe.wait_ms / 1000, settings.FINGERPRINT_TIMEOUT)
+            _probes_sent.inc()
+            response = await self._send(
+                host, port, probe.name, probe.payload, timeout, tls=probe.tls_for(port)
+            )
+            if not response:
+                continue
+            matched = database.match(probe, response, service)
+            if not matched:
+                continue
+            fields, is_soft = matched
+            if not is_soft:
+                return {**fields, "method": probe.name}
+            soft = soft or {**fields, "method": probe.name}
+
+        return soft or {}
+
+
+# Process-wide fingerprinter (singleton)
+_fingerprinter: ServiceFingerprinter | None = None
+
+
+def get_fingerprinter() -> ServiceFingerprinter:
+    global _fingerprinter
+
+    if _fingerprinter is None:
+        path = settings.FINGERPRINT_PROBES_PATH
+        database = None
+        if path and os.path.exists(path):
+            database = ProbeDatabase.load(path)
+        else:
+            logger.warning("Probe database %s not found, fingerprinting banners only", path)
+        _fingerprinter = ServiceFingerprinter(database)
+    return _fingerprinter
+
+
+async def fingerprint(host: str, port: int) -> dict:
+    return await get_fingerprinter().identify(host, port)
@@ -0,0 +1,306 @@
+"""
+Async TCP Connect Port Scanner
+Global + per-target token buckets, adaptive per-target timeouts
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+
+from config.settings import settings
+from utils.cache import TieredCache, get_cache
+from utils.metrics import registry
+from utils.politeness import TargetSlots, get_target_slots
+
+logger = logging.getLogger(__name__)
+
+# Port sets per discovery intensity
+LIGHT_PORTS = (
+    21, 22, 23, 25, 53, 80, 110, 143, 443, 445,
+    993, 995, 1433, 3306, 3389, 5432, 6379, 8080, 8443, 9200,
+)
+NORMAL_PORTS = tuple(sorted(set(LIGHT_PORTS) | {
+    7, 9, 13, 26, 37, 79, 81, 88, 106, 111, 113, 119, 135, 139, 144, 179, 199,
+    389, 427, 444, 465, 513, 514, 515, 543, 544, 548, 554, 587, 631, 646, 873,
+    990, 1025, 1026, 1027, 1028, 1029, 1110, 1521, 1720, 1723, 1755, 1900,
+    2000, 2001, 2049, 2121, 2375, 2376, 2717, 3000, 3128, 3986, 4899, 5000,
+    5009, 5051, 5060, 5101, 5190, 5357, 5601, 5631, 5666, 5672, 5800, 5900,
+    6000, 6001, 6443, 6646, 7070, 8000, 8008, 8009, 8081, 8088, 8888, 9000,
+    9090, 9100, 9443, 9999, 10000, 11211, 15672, 27017, 32768, 49152, 49153,
+    49154, 49155, 49156, 49157,
+}))
+DEEP_PORTS = range(1, 65536)
+
+PORTS_BY_INTENSITY = {
+    "LIGHT": LIGHT_PORTS,
+    "NORMAL": NORMAL_PORTS,
+    "DEEP": DEEP_PORTS,
+}
+
+_probes = registry.counter("ports.probes")
+_open = registry.counter("ports.open")
+_timeouts = registry.counter("ports.timeouts")
+_rtt = registry.histogram("ports.rtt")
+_deferred = registry.counter("ports.deferred")
+
+
+def ports_for_intensity(intensity: str):
+    return PORTS_BY_INTENSITY.get(intensity, NORMAL_PORTS)
+
+
+# ---------------------------------------------------
+# Token bucket
+# ---------------------------------------------------
+class TokenBucket:
+    """
+    `rate` tokens per second, up to `burst` banked
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# ---------------------------------------------------
+# Adaptive timeout
+# ---------------------------------------------------
+class RttEstimator:
+    """
+    TCP-style smoothed RTT: timeout = srtt + 4 * rttvar, clamped
+    """
+
+    def __init__(self, initial: float, minimum: float, maximum: float):
+        self.srtt = None
+        self.rttvar = None
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def observe(self, rtt: float):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    @property
+    def timeout(self) -> float:
+        if self.srtt is None:
+            return self.initial
+        return min(self.maximum, max(self.minimum, self.srtt + 4 * self.rttvar))
+
+
+# ---------------------------------------------------
+# Scanner
+# ---------------------------------------------------
+class PortScanner:
+    """
+    Connect scan of (host, port) pairs. At most `concurrency` connects in
+    flight; every probe takes a token from the global bucket and from
+    the target's own bucket, so total and per-host rates are both
+    capped and a DEEP scan's duration is ~ports / per-target rate.
+
+    Open / closed results are cached per (ip, port) in the shared "probe"
+    cache for PROBE_CACHE_TTL; filtered (timeouts) are always re-probed.
+
+    With target slots, a pair whose host group is at its cross-worker
+    limit is set aside for POLITENESS_RETRY_DELAY while the other hosts'
+    pairs are probed.
+
+    The connect cap is shared by every scan() running on the scanner, and
+    per-host buckets / RTT estimates are kept for the PORTSCAN_HOST_STATE
+    most recently probed hosts, so a long-lived scanner stays bounded.
+    """
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        global_rate: float | None = None,
+        per_target_rate: float | None = None,
+        cache: TieredCache | None = None,
+        slots: TargetSlots | None = None,
+    ):
+        self.cache = cache or get_cache("probe")
+        self.slots = slots or get_target_slots()
+        self.concurrency = concurrency or settings.PORTSCAN_CONCURRENCY
+        self.global_bucket = TokenBucket(global_rate or settings.PORTSCAN_GLOBAL_RATE)
+        self.per_target_rate = per_target_rate or settings.PORTSCAN_PER_TARGET_RATE
+        self.host_state_size = settings.PORTSCAN_HOST_STATE
+        self._connects = asyncio.Semaphore(self.concurrency)
+        self._target_buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._rtts: OrderedDict[str, RttEstimator] = OrderedDict()
+
+    def _host_state(self, states: OrderedDict, host: str, factory):
+        """
+        LRU lookup; a host evicted mid-scan simply starts a fresh state
+        """
+        state = states.get(host)
+        if state is None:
+            state = states[host] = factory()
+            while len(states) > self.host_state_size:
+                states.popitem(last=False)
+        else:
+            states.move_to_end(host)
+        return state
+
+    def _bucket(self, host: str) -> TokenBucket:
+        return self._host_state(self._target_buckets, host, lambda: TokenBucket(self.per_target_rate))
+
+    def _estimator(self, host: str) -> RttEstimator:
+        return self._host_state(self._rtts, host, lambda: RttEstimator(
+            initial=settings.PORTSCAN_TIMEOUT,
+            minimum=settings.PORTSCAN_MIN_TIMEOUT,
+            maximum=settings.PORTSCAN_TIMEOUT,
+        ))
+
+    async def probe(self, host: str, port: int) -> dict:
+        if self.cache is None:
+            return await self._connect(host, port)
+        return await self.cache.get_or_compute(
+            f"{host}:{port}:tcp",
+            lambda: self._connect(host, port),
+            lambda result: settings.PROBE_CACHE_TTL if result["state"] != "filtered" else 0,
+        )
+
+    async def _connect(self, host: str, port: int) -> dict:
+        async with self._connects:
+            return await self._connect_once(host, port)
+
+    async def _connect_once(self, host: str, port: int) -> dict:
+        await self._bucket(host).acquire()
+        await self.global_bucket.acquire()
+
+        estimator = self._estimator(host)
+        timeout = estimator.timeout
+        _probes.inc()
+        start = time.perf_counter()
+
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        except asyncio.TimeoutError:
+            _timeouts.inc()
+            return {"host": host, "port": port, "state": "filtered", "rtt": None}
+        except ConnectionRefusedError:
+            # RST is a real round trip: feeds the timeout estimate too
+            estimator.observe(time.perf_counter() - start)
+            return {"host": host, "port": port, "state": "closed", "rtt": None}
+        except OSError:
+            return {"host": host, "port": port, "state": "filtered", "rtt": None}
+
+        rtt = time.perf_counter() - start
+        estimator.observe(rtt)
+        _rtt.observe(rtt)
+        _open.inc()
+
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return {"host": host, "port": port, "state": "open", "rtt": round(rtt, 6)}
+
+    async def scan(self, targets, ports, only_open: bool = True):
+        """
+        Async generator: yields probe results as they complete.
+        Ports are interleaved across targets so per-target buckets don't
+        serialize the scan on one host. Only as many workers as there are
+        pairs are started, so a one-host scan does not spawn
+        PORTSCAN_CONCURRENCY tasks.
+        """
+        targets = list(dict.fromkeys(targets))
+        ports = list(ports)
+        workers = max(1, min(self.concurrency, len(targets) * len(ports)))
+
+        def pairs():
+            for port in ports:
+                for host in targets:
+                    yield host, port
+
+        pending: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        results: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        done = object()
+
+        async def feed():
+            for pair in pairs():
+                await pending.put(pair)
+            for _ in range(workers):
+                await pending.put(done)
+
+        # (retry_at, pair) for busy target groups, in retry order
+        deferred: deque = deque()
+        loop = asyncio.get_running_loop()
+
+        async def next_pair(fed: bool):
+            """
+            (pair or done, fed); fed once this worker has taken its end marker
+            """
+            while True:
+                if deferred and (fed or deferred[0][0] <= loop.time()):
+                    retry_at, pair = deferred.popleft()
+                    if retry_at > loop.time():
+                        await asyncio.sleep(retry_at - loop.time())
+                    return pair, fed
+                if fed:
+                    return done, fed
+                try:
+                    pair = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    if deferred:
+                        await asyncio.sleep(min(deferred[0][0] - loop.time(), settings.POLITENESS_RETRY_DELAY))
+                        continue
+                    pair = await pending.get()
+                if pair is done:
+                    # Feed finished; drain what is still deferred first
+                    fed = True
+                    continue
+                return pair, fed
+
+        async def work():
+            fed = False
+            while True:
+                pair, fed = await next_pair(fed)
+                if pair is done:
+                    await results.put(done)
+                    return
+                host = pair[0]
+                if self.slots is not None and not await self.slots.try_acquire(host):
+                    _deferred.inc()
+                    deferred.append((loop.time() + settings.POLITENESS_RETRY_DELAY, pair))
+                    continue
+                try:
+                    result = await self.probe(*pair)
+                finally:
+                    if self.slots is not None:
+                        self.slots.release(host)
+                await results.put(result)
+
+        tasks = [asyncio.create_task(feed())]
+        tasks += [asyncio.create_task(work()) for _ in range(workers)]
+
+        try:
+            finished = 0
+            while finished < workers:
+                result = await results.get()
+                if result is done:
+                    finished += 1
+                elif not only_open or result["state"] == "open":
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,324 @@
+"""
+nmap-service-probes Database
+Parses probes and match rules once; orders probes per port by rarity
+
+    Probe TCP GetRequest q|GET / HTTP/1.0\r\n\r\n|
+    rarity 1
+    ports 80,443,8000-8010
+    match http m|^HTTP/1\.[01] \d\d\d .*\r\nServer: nginx/([\d.]+)|s p/nginx/ v/$1/ cpe:/a:igor_sysoev:nginx:$1/
+
+Only TCP probes are loaded (the port scanner is a TCP connect scan).
+Patterns that fail to compile under Python's re are skipped and counted.
+"""
+
+import heapq
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = {"p": "product", "v": "version", "i": "info", "h": "hostname", "o": "os", "d": "device"}
+_REGEX_META = set(".^$*+?{}[]()|\\")
+_TEMPLATE = re.compile(r"\$(\d)|\$P\((\d)\)|\$SUBST\((\d),\"([^\"]*)\",\"([^\"]*)\"\)|\$I\((\d),\"([<>])\"\)")
+
+_ESCAPES = {"0": b"\0", "r": b"\r", "n": b"\n", "t": b"\t", "a": b"\a", "f": b"\f", "v": b"\v", "\\": b"\\"}
+
+
+# ---------------------------------------------------
+# Parsing helpers
+# ---------------------------------------------------
+def _unescape(payload: str) -> bytes:
+    out = bytearray()
+    i = 0
+    while i < len(payload):
+        char = payload[i]
+        if char == "\\" and i + 1 < len(payload):
+            nxt = payload[i + 1]
+            if nxt == "x" and i + 3 < len(payload):
+                out.append(int(payload[i + 2:i + 4], 16))
+                i += 4
+                continue
+            out += _ESCAPES.get(nxt, nxt.encode("latin-1"))
+            i += 2
+            continue
+        out += char.encode("latin-1")
+        i += 1
+    return bytes(out)
+
+
+def _delimited(text: str, start: int) -> tuple[str, int]:
+    """
+    text[start] is the delimiter; returns (body, index after closing delimiter)
+    """
+    delimiter = text[start]
+    end = text.index(delimiter, start + 1)
+    return text[start + 1:end], end + 1
+
+
+def _parse_ports(spec: str) -> set[int]:
+    ports = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            ports.update(range(int(lo), int(hi) + 1))
+        elif part:
+            ports.add(int(part))
+    return ports
+
+
+def _top_level_alternation(pattern: str) -> bool:
+    depth = 0
+    escaped = in_class = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
+def _first_bytes(pattern: str, ignore_case: bool) -> set[int] | None:
+    """
+    Bytes a ^-anchored pattern must start with, or None if unknown
+    """
+    if not pattern.startswith("^") or len(pattern) < 2 or _top_level_alternation(pattern):
+        return None
+    char, rest = pattern[1], pattern[2:]
+    if char == "\\":
+        if rest[:1] == "x" and len(rest) >= 3:
+            value, rest = int(rest[1:3], 16), rest[3:]
+        elif rest[:1] and not rest[0].isalnum():
+            value, rest = ord(rest[0]), rest[1:]
+        else:
+            return None
+    elif char in _REGEX_META:
+        return None
+    else:
+        value = ord(char) & 0xFF
+    if rest[:1] in ("?", "*", "{"):
+        return None
+
+    values = {value}
+    if ignore_case and chr(value).isalpha():
+        values |= {ord(chr(value).lower()), ord(chr(value).upper())}
+    return values
+
+
+class MatchRule:
+    def __init__(self, service: str, regex, template: dict, soft: bool, first_bytes: set[int] | None):
+        self.service = service
+        self.regex = regex
+        self.template = template
+        self.soft = soft
+        self.first_bytes = first_bytes
+
+    def render(self, match) -> dict:
+        def substitute(value: str) -> str:
+            def replace(m):
+                group = m.group(1) or m.group(2) or m.group(3) or m.group(6)
+                raw = match.group(int(group)) or b""
+                if m.group(2):
+                    raw = bytes(b for b in raw if 32 <= b < 127)
+                elif m.group(3):
+                    raw = raw.replace(m.group(4).encode("latin-1"), m.group(5).encode("latin-1"))
+                elif m.group(6):
+                    return str(int.from_bytes(raw, "big" if m.group(7) == ">" else "little"))
+                return raw.decode("latin-1")
+            return _TEMPLATE.sub(replace, value)
+
+        rendered = {field: substitute(value) for field, value in self.template.items() if field != "cpe"}
+        rendered["cpe"] = [substitute(cpe) for cpe in self.template.get("cpe", ())]
+        return rendered
+
+
+class Probe:
+    def __init__(self, name: str, payload: bytes):
+        self.name = name
+        self.payload = payload
+        self.rarity = 5
+        self.ports: set[int] = set()
+        self.sslports: set[int] = set()
+        self.wait_ms = 5000
+        self.fallback: list[str] = []
+        self.rules: list[MatchRule] = []
+
+        # First-byte index over rules, built by finalize()
+        self._by_first_byte: dict[int, list[int]] = {}
+        self._unindexed: list[int] = []
+        # Services this probe's own rules can hard match
+        self.services: set[str] = set()
+
+    def tls_for(self, port: int) -> bool:
+        """
+        sslports are spoken to over TLS (plaintext wins if listed in both)
+        """
+        return port in self.sslports and port not in self.ports
+
+    def finalize(self):
+        self.services = {rule.service for rule in self.rules if not rule.soft}
+        for position, rule in enumerate(self.rules):
+            if rule.first_bytes is None:
+                self._unindexed.append(position)
+            else:
+                for value in rule.first_bytes:
+                    self._by_first_byte.setdefault(value, []).append(position)
+
+    def candidate_rules(self, response: bytes):
+        """
+        Rules that can match `response`, in file order (first match wins)
+        """
+        if not response:
+            return (self.rules[i] for i in self._unindexed)
+        indexed = self._by_first_byte.get(response[0], ())
+        return (self.rules[i] for i in heapq.merge(indexed, self._unindexed))
+
+
+def _parse_match(line: str, soft: bool) -> MatchRule | None:
+    service, rest = line.split(" ", 1)
+    if not rest.startswith("m"):
+        return None
+    pattern, position = _delimited(rest, 1)
+
+    flags = 0
+    while position < len(rest) and rest[position] in "is":
+        flags |= re.IGNORECASE if rest[position] == "i" else re.DOTALL
+        position += 1
+
+    template: dict = {}
+    tail = rest[position:].strip()
+    while tail:
+        if tail.startswith("cpe:"):
+            value, end = _delimited(tail, 4)
+            template.setdefault("cpe", []).append("cpe:/" + value)
+            tail = tail[end:].lstrip("a").strip()
+        elif tail[0] in _FIELDS and len(tail) > 1:
+            value, end = _delimited(tail, 1)
+            template[_FIELDS[tail[0]]] = value
+            tail = tail[end:].strip()
+        else:
+            break
+
+    regex = re.compile(pattern.encode("latin-1"), flags)
+    return MatchRule(service, regex, template, soft, _first_bytes(pattern, bool(flags & re.IGNORECASE)))
+
+
+# ---------------------------------------------------
+# Database
+# ---------------------------------------------------
+class ProbeDatabase:
+    def __init__(self, probes: list[Probe]):
+        self.probes = probes
+        self.by_name = {probe.name: probe for probe in probes}
+        self.null_probe = self.by_name.get("NULL")
+
+        self._port_index: dict[int, list[Probe]] = {}
+        for probe in sorted(probes, key=lambda p: p.rarity):
+            for port in probe.ports | probe.sslports:
+                self._port_index.setdefault(port, []).append(probe)
+        self._by_rarity = sorted(
+            (p for p in probes if p.name != "NULL"), key=lambda p: p.rarity
+        )
+        self._plans: dict[tuple, list[Probe]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "ProbeDatabase":
+        probes: list[Probe] = []
+        probe = None
+        skipped = 0
+
+        with open(path, encoding="latin-1") as fh:
+            for raw in fh:
+                line = raw.rstrip("\n")
+                if not line or line.startswith("#"):
+                    continue
+                directive, _, rest = line.partition(" ")
+
+                if directive == "Probe":
+                    protocol, name, payload = rest.split(" ", 2)
+                    if protocol != "TCP":
+                        probe = None
+                        continue
+                    body, _ = _delimited(payload, 1)
+                    probe = Probe(name, _unescape(body))
+                    probes.append(probe)
+                elif probe is None:
+                    continue
+                elif directive in ("match", "softmatch"):
+                    try:
+                        rule = _parse_match(rest, soft=directive == "softmatch")
+                    except (re.error, ValueError, IndexError):
+                        skipped += 1
+                        continue
+                    if rule is not None:
+                        probe.rules.append(rule)
+                elif directive == "rarity":
+                    probe.rarity = int(rest)
+                elif directive == "ports":
+                    probe.ports = _parse_ports(rest)
+                elif directive == "sslports":
+                    probe.sslports = _parse_ports(rest)
+                elif directive == "totalwaitms":
+                    probe.wait_ms = int(rest)
+                elif directive == "fallback":
+                    probe.fallback = [name.strip() for name in rest.split(",")]
+
+        for probe in probes:
+            probe.finalize()
+        logger.info(
+            "Loaded %d probes, %d match rules from %s (%d patterns skipped)",
+            len(probes), sum(len(p.rules) for p in probes), path, skipped,
+        )
+        return cls(probes)
+
+    def plan(self, port: int, max_rarity: int, limit: int) -> list[Probe]:
+        """
+        Probes to try on `port` (excluding NULL): those registered for the
+        port first, then the rest by rarity, capped at `limit`.
+        """
+        key = (port, max_rarity, limit)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = [p for p in self._port_index.get(port, ()) if p.name != "NULL"]
+            plan += [p for p in self._by_rarity if p.rarity <= max_rarity and p not in plan]
+            plan = self._plans[key] = plan[:limit]
+        return plan
+
+    def _with_fallbacks(self, probe: Probe) -> list[Probe]:
+        return [probe] + [self.by_name[n] for n in probe.fallback if n in self.by_name]
+
+    def can_identify(self, probe: Probe, service: str) -> bool:
+        """
+        Whether `probe` (or a fallback) has a hard match rule for `service`
+        """
+        return any(service in candidate.services for candidate in self._with_fallbacks(probe))
+
+    def match(self, probe: Probe, response: bytes, service: str | None = None) -> tuple[dict, bool] | None:
+        """
+        (fields, soft) for the first hard match among the probe's rules and
+        its fallbacks; a soft match is returned only if no hard match exists.
+        With `service` (after a softmatch) only that service's rules are tried.
+        """
+        soft = None
+        for candidate in self._with_fallbacks(probe):
+            for rule in candidate.candidate_rules(response):
+                if service is not None and rule.service != service:
+                    continue
+                found = rule.regex.search(response)
+                if found is None:
+                    continue
+                result = {"service": rule.service, **rule.render(found)}
+                if not rule.soft:
+                    return result, False
+                soft = soft or result
+        return (soft, True) if soft else None
@@ -0,0 +1,137 @@
+"""
+Dead-Letter Queue CLI
+Inspect and replay messages parked in <queue>.dead
+
+Usage:
+    python dlq.py stats  asm.triggers
+    python dlq.py list   asm.triggers --limit 20
+    python dlq.py replay asm.triggers --limit 100
+    python dlq.py purge  asm.triggers
+"""
+
+import argparse
+import asyncio
+
+import aio_pika
+from utils.queue import get_queue_connection, close_queue
+from utils.codec import decode_payload, schema_version, CodecError
+from utils.retry import (
+    dead_letter_queue_name,
+    retry_delays,
+    retry_queue_name,
+    RETRY_COUNT_HEADER,
+    LAST_ERROR_HEADER,
+)
+
+
+async def _open_dead_queue(channel, queue_name: str):
+    return await channel.declare_queue(dead_letter_queue_name(queue_name), durable=True)
+
+
+# ---------------------------------------------------
+# Commands
+# ---------------------------------------------------
+async def cmd_stats(channel, args):
+    names = [args.queue]
+    names += [retry_queue_name(args.queue, d) for d in retry_delays()]
+    names.append(dead_letter_queue_name(args.queue))
+
+    connection = await get_queue_connection()
+    for name in names:
+        # A passive declare of a missing queue closes the channel,
+        # so each lookup gets its own
+        probe = await connection.channel()
+        try:
+            queue = await probe.declare_queue(name, passive=True)
+            count = queue.declaration_result.message_count
+        except aio_pika.exceptions.ChannelClosed:
+            count = "-"
+        finally:
+            if not probe.is_closed:
+                await probe.close()
+        print(f"{name:<40} {count}")
+
+
+async def cmd_list(channel, args):
+    queue = await _open_dead_queue(channel, args.queue)
+
+    # Messages are fetched without ack and returned when the channel closes
+    for index in range(args.limit):
+        message = await queue.get(no_ack=False, fail=False)
+        if message is None:
+            break
+
+        headers = message.headers or {}
+        try:
+            body = decode_payload(message.body, message.content_type)
+        except CodecError:
+            body = message.body[:200]
+
+        print(f"#{index + 1} retries={headers.get(RETRY_COUNT_HEADER, 0)} "
+              f"schema=v{schema_version(headers)} "
+              f"error={headers.get(LAST_ERROR_HEADER, '')}")
+        print(f"    {body}")
+
+
+async def cmd_replay(channel, args):
+    queue = await _open_dead_queue(channel, args.queue)
+    replayed = 0
+
+    for _ in range(args.limit):
+        message = await queue.get(no_ack=False, fail=False)
+        if message is None:
+            break
+
+        headers = dict(message.headers or {})
+        headers[RETRY_COUNT_HEADER] = 0
+
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                headers=headers,
+                content_type=message.content_type,
+                message_id=message.message_id,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=args.queue,
+        )
+        await message.ack()
+        replayed += 1
+
+    print(f"Replayed {replayed} messages to {args.queue}")
+
+
+async def cmd_purge(channel, args):
+    queue = await _open_dead_queue(channel, args.queue)
+    result = await queue.purge()
+    print(f"Purged {result.message_count} messages from {queue.name}")
+
+
+COMMANDS = {
+    "stats": cmd_stats,
+    "list": cmd_list,
+    "replay": cmd_replay,
+    "purge": cmd_purge,
+}
+
+
+async def main(args):
+    connection = await get_queue_connection()
+    if not connection:
+        print("Queue not available")
+        return
+
+    channel = await connection.channel()
+    try:
+        await COMMANDS[args.command](channel, args)
+    finally:
+        await channel.close()
+        await close_queue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and replay dead-lettered messages")
+    parser.add_argument("command", choices=COMMANDS.keys())
+    parser.add_argument("queue", help="work queue name, e.g. asm.triggers")
+    parser.add_argument("--limit", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,16 @@
+"""
+Scanner output parsers used by the VS worker
+"""
+
+from .nmap import iter_nmap_xml
+from .trivy import iter_trivy_json, iter_json_array
+from .parse_pool import ParsePool, get_parse_pool, close_parse_pool
+
+__all__ = [
+    "iter_nmap_xml",
+    "iter_trivy_json",
+    "iter_json_array",
+    "ParsePool",
+    "get_parse_pool",
+    "close_parse_pool",
+]
@@ -0,0 +1,70 @@
+"""
+Streaming nmap XML Parser
+iterparse over <host> elements; memory stays flat regardless of sweep size
+"""
+
+import xml.etree.ElementTree as ET
+
+
+def _host_record(host) -> tuple[str | None, list[str]]:
+    address = None
+    for addr in host.iter("address"):
+        if addr.get("addrtype") in ("ipv4", "ipv6"):
+            address = addr.get("addr")
+            break
+    hostnames = [h.get("name") for h in host.iter("hostname") if h.get("name")]
+    return address, hostnames
+
+
+def _port_record(port, host: str, hostnames: list[str]) -> dict:
+    service = port.find("service")
+    service = service if service is not None else ET.Element("service")
+    state = port.find("state")
+    return {
+        "source": "nmap",
+        "kind": "service",
+        "host": host,
+        "hostnames": hostnames,
+        "port": int(port.get("portid")),
+        "protocol": port.get("protocol", "tcp"),
+        "state": state.get("state") if state is not None else "unknown",
+        "service": service.get("name"),
+        "product": service.get("product"),
+        "version": service.get("version"),
+        "tunnel": service.get("tunnel"),
+        "cpe": [cpe.text for cpe in service.findall("cpe") if cpe.text],
+        "scripts": {
+            script.get("id"): script.get("output", "")
+            for script in port.findall("script")
+        },
+    }
+
+
+def iter_nmap_xml(path: str, only_open: bool = True):
+    """
+    Yield one normalized record per port of every scanned host.
+
+    Each <host> is cleared from the tree as soon as it is processed and
+    detached from the root, so a /16 sweep parses in constant memory.
+    """
+    context = ET.iterparse(path, events=("start", "end"))
+    root = None
+
+    for event, elem in context:
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+        if elem.tag != "host":
+            continue
+
+        host, hostnames = _host_record(elem)
+        if host is not None:
+            for port in elem.iter("port"):
+                record = _port_record(port, host, hostnames)
+                if only_open and record["state"] != "open":
+                    continue
+                yield record
+
+        elem.clear()
+        root.clear()
@@ -0,0 +1,149 @@
+"""
+Scanner Output Parse Pool
+Parses nmap/trivy output in worker processes, streams records back in batches
+
+    parent (event loop)                 child process
+    stream(kind, path) <-- batches -- parser(path) -> batch -> queue.put
+                       (bounded queue = backpressure)
+
+The event loop never runs the parser, and at most PARSE_QUEUE_DEPTH
+batches per file are held in memory between the two sides.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+
+from config.settings import settings
+from utils.metrics import registry
+from .nmap import iter_nmap_xml
+from .trivy import iter_trivy_json
+
+logger = logging.getLogger(__name__)
+
+PARSERS = {
+    "nmap": iter_nmap_xml,
+    "trivy": iter_trivy_json,
+}
+
+_records_parsed = registry.counter("parse.records")
+_parse_latency = registry.histogram("parse.file_latency")
+
+
+def _parse_to_queue(kind: str, path: str, out, stop, batch_size: int) -> int:
+    """
+    Runs in the child: push batches until done or the reader goes away
+    """
+    total = 0
+    batch = []
+
+    def push(items) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(items, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for record in PARSERS[kind](path):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                if not push(batch):
+                    return total
+                total += len(batch)
+                batch = []
+        if batch and push(batch):
+            total += len(batch)
+    finally:
+        push(None)
+    return total
+
+
+class ParsePool:
+    """
+    Process pool + manager shared by every file parsed in this worker.
+    Created lazily on first use.
+    """
+
+    def __init__(self, workers: int | None = None, batch_size: int | None = None, queue_depth: int | None = None):
+        self.workers = workers or settings.PARSE_POOL_WORKERS or os.cpu_count() or 1
+        self.batch_size = batch_size or settings.PARSE_BATCH_SIZE
+        self.queue_depth = queue_depth or settings.PARSE_QUEUE_DEPTH
+        self._executor: ProcessPoolExecutor | None = None
+        self._manager = None
+
+    def _ensure(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            self._manager = multiprocessing.Manager()
+
+    async def stream(self, kind: str, path: str):
+        """
+        Async generator of normalized records parsed from `path`
+        """
+        if kind not in PARSERS:
+            raise ValueError(f"Unknown scanner output kind: {kind}")
+        self._ensure()
+
+        loop = asyncio.get_running_loop()
+        out = self._manager.Queue(maxsize=self.queue_depth)
+        stop = self._manager.Event()
+        started = loop.time()
+
+        future = loop.run_in_executor(
+            self._executor, _parse_to_queue, kind, str(path), out, stop, self.batch_size
+        )
+
+        try:
+            while True:
+                try:
+                    batch = await asyncio.to_thread(out.get, True, 0.5)
+                except queue.Empty:
+                    if future.done():
+                        break  # child died before its end marker
+                    continue
+                if batch is None:
+                    break
+                _records_parsed.inc(len(batch))
+                for record in batch:
+                    yield record
+
+            # Surface parser errors (and BrokenProcessPool)
+            total = await future
+            _parse_latency.observe(loop.time() - started)
+            logger.info("Parsed %d %s records from %s", total, kind, path)
+        finally:
+            # Reader stopped early: let the child stop pushing
+            stop.set()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._manager.shutdown()
+        self._executor = None
+        self._manager = None
+
+
+# Process-wide pool (singleton)
+_parse_pool: ParsePool | None = None
+
+
+def get_parse_pool() -> ParsePool:
+    global _parse_pool
+
+    if _parse_pool is None:
+        _parse_pool = ParsePool()
+    return _parse_pool
+
+
+def close_parse_pool():
+    global _parse_pool
+
+    if _parse_pool is not None:
+        _parse_pool.close()
+    _parse_pool = None
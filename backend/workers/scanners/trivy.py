@@ -0,0 +1,115 @@
+"""
+Streaming trivy JSON Parser
+Walks the top-level "Results" array one element at a time
+"""
+
+import json
+
+try:
+    import ijson
+except ImportError:  # optional
+    ijson = None
+
+_SEVERITIES = {"CRITICAL", "HIGH", "MEDIUM", "LOW", "UNKNOWN"}
+
+
+def iter_json_array(fh, key: str, chunk_size: int = 1 << 16):
+    """
+    Yield the elements of the top-level array `key` from a text stream
+    without loading the whole document.
+
+    Stdlib fallback for when ijson is not installed: scans for the key,
+    then raw_decode()s one element at a time from a sliding buffer.
+    Assumes `key` does not appear as a string earlier in the document,
+    which holds for trivy (Results is the last top-level field).
+    """
+    decoder = json.JSONDecoder()
+    marker = f'"{key}"'
+    buf = ""
+
+    # Seek to the key
+    while True:
+        index = buf.find(marker)
+        if index >= 0:
+            buf = buf[index + len(marker):]
+            break
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            return
+        buf = buf[-len(marker):] + chunk
+
+    # Seek to the opening bracket
+    while True:
+        stripped = buf.lstrip().lstrip(":").lstrip()
+        if stripped:
+            if stripped[0] != "[":
+                return  # "Results": null
+            buf = stripped[1:]
+            break
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            return
+        buf = chunk
+
+    read_size = chunk_size
+    while True:
+        buf = buf.lstrip()
+        if buf.startswith(","):
+            buf = buf[1:].lstrip()
+        if buf.startswith("]"):
+            return
+
+        try:
+            item, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            # Element spans past the buffer; grow reads so huge elements
+            # do not get re-decoded once per 64 KiB
+            chunk = fh.read(read_size)
+            if not chunk:
+                raise
+            buf += chunk
+            read_size *= 2
+            continue
+
+        read_size = chunk_size
+        buf = buf[end:]
+        yield item
+
+
+def _cvss_score(vuln: dict) -> float | None:
+    scores = [
+        entry.get("V3Score") or entry.get("V2Score")
+        for entry in (vuln.get("CVSS") or {}).values()
+    ]
+    scores = [score for score in scores if score is not None]
+    return max(scores) if scores else None
+
+
+def _vuln_record(result: dict, vuln: dict) -> dict:
+    severity = (vuln.get("Severity") or "UNKNOWN").upper()
+    return {
+        "source": "trivy",
+        "kind": "vulnerability",
+        "target": result.get("Target"),
+        "class": result.get("Class"),
+        "type": result.get("Type"),
+        "package": vuln.get("PkgName"),
+        "installed_version": vuln.get("InstalledVersion"),
+        "fixed_version": vuln.get("FixedVersion"),
+        "vuln_id": vuln.get("VulnerabilityID"),
+        "severity": (severity if severity in _SEVERITIES else "UNKNOWN").lower(),
+        "title": vuln.get("Title"),
+        "cvss_score": _cvss_score(vuln),
+    }
+
+
+def iter_trivy_json(path: str):
+    """
+    Yield one normalized record per vulnerability in a trivy JSON report.
+    Peak memory is bounded by the largest single Result (one target).
+    """
+    with open(path, "rb" if ijson else "r", encoding=None if ijson else "utf-8") as fh:
+        results = ijson.items(fh, "Results.item", use_float=True) if ijson else iter_json_array(fh, "Results")
+        for result in results:
+            for vuln in result.get("Vulnerabilities") or ():
+                yield _vuln_record(result, vuln)
@@ -0,0 +1,310 @@
+"""
+Worker Process Supervisor
+Runs N consumer processes per worker pool and scales N with queue depth
+
+- Polls ready-message depth and consumer count of each pool's queues
+- Scales between min/max processes on backlog per consuming process,
+  with hysteresis (separate up/down thresholds, sustained for several
+  polls, plus a cooldown)
+- Restarts crashed children with exponential backoff
+- SIGTERM/SIGINT stops children gracefully (they drain in-flight work,
+  for up to the pool's drain timeout)
+
+Run:
+    cd backend/workers
+    python3 supervisor.py
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+
+from config.settings import settings
+from utils.queue import get_queue_connection, close_queue
+from utils.metrics import registry, report_metrics
+from triggers.asm_trigger import lane_weights
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WORKERS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class WorkerPool:
+    """
+    A group of identical child processes running one worker module
+    """
+
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        queues: list[str],
+        min_procs: int,
+        max_procs: int,
+        drain_timeout: float | None = None,
+    ):
+        self.name = name
+        self.module = module
+        self.queues = queues
+        self.min_procs = max(1, min_procs)
+        self.max_procs = max(self.min_procs, max_procs)
+        # How long a stopped child may finish in-flight work (its QUEUE_DRAIN_TIMEOUT)
+        self.drain_timeout = drain_timeout or settings.QUEUE_DRAIN_TIMEOUT
+
+        self.processes: dict[int, asyncio.subprocess.Process] = {}
+        self._stopping: set[int] = set()
+        self._monitors: set[asyncio.Task] = set()
+        self._shutting_down = False
+        self._restarting = 0
+
+        # Hysteresis state
+        self.up_ticks = 0
+        self.down_ticks = 0
+        self.last_scaled_at = 0.0
+        self.crashes = 0
+
+        self.size_gauge = registry.gauge(f"supervisor.{name}.processes")
+        self.depth_gauge = registry.gauge(f"supervisor.{name}.queue_depth")
+        self.restarts = registry.counter(f"supervisor.{name}.restarts")
+
+    @property
+    def size(self) -> int:
+        # Children waiting out a restart backoff still count
+        return len(self.processes) - len(self._stopping) + self._restarting
+
+    async def spawn(self):
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", self.module,
+            cwd=WORKERS_DIR,
+            env={**os.environ, "QUEUE_DRAIN_TIMEOUT": str(self.drain_timeout)},
+        )
+        self.processes[proc.pid] = proc
+        self.size_gauge.set(self.size)
+        logger.info("[%s] started pid=%d (%d running)", self.name, proc.pid, self.size)
+
+        monitor = asyncio.create_task(self._monitor(proc, time.monotonic()))
+        self._monitors.add(monitor)
+        monitor.add_done_callback(self._monitors.discard)
+
+    async def _monitor(self, proc, started_at: float):
+        returncode = await proc.wait()
+        self.processes.pop(proc.pid, None)
+
+        if proc.pid in self._stopping:
+            self._stopping.discard(proc.pid)
+            self.size_gauge.set(self.size)
+            logger.info("[%s] pid=%d stopped", self.name, proc.pid)
+            return
+
+        # Unexpected exit: restart with backoff, reset after a healthy run
+        if time.monotonic() - started_at > 60:
+            self.crashes = 0
+        self.crashes += 1
+        self.restarts.inc()
+        delay = min(30, 2 ** (self.crashes - 1))
+        logger.warning(
+            "[%s] pid=%d exited with %s, restarting in %ds",
+            self.name, proc.pid, returncode, delay,
+        )
+
+        self._restarting += 1
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._restarting -= 1
+        if not self._shutting_down:
+            await self.spawn()
+
+    def stop_one(self) -> bool:
+        """
+        Ask the newest child to drain and exit; False when none is running
+        (children waiting out a restart backoff cannot be stopped)
+        """
+        running = [pid for pid in self.processes if pid not in self._stopping]
+        if not running:
+            return False
+        pid = running[-1]
+        self._stopping.add(pid)
+        self.processes[pid].send_signal(signal.SIGTERM)
+        self.size_gauge.set(self.size)
+        logger.info("[%s] stopping pid=%d (%d running)", self.name, pid, self.size)
+        return True
+
+    async def shutdown(self, timeout: float | None = None):
+        timeout = timeout or self.drain_timeout + 5
+        self._shutting_down = True
+        for pid, proc in list(self.processes.items()):
+            if pid not in self._stopping:
+                self._stopping.add(pid)
+                proc.send_signal(signal.SIGTERM)
+
+        if self._monitors:
+            done, pending = await asyncio.wait(set(self._monitors), timeout=timeout)
+            for proc in list(self.processes.values()):
+                logger.warning("[%s] pid=%d did not exit, killing", self.name, proc.pid)
+                proc.kill()
+            for task in pending:
+                task.cancel()
+
+
+class Supervisor:
+    def __init__(self, pools: list[WorkerPool]):
+        self.pools = pools
+        self.stop_event = asyncio.Event()
+        self._channel = None
+
+    async def _get_channel(self):
+        if self._channel is None or self._channel.is_closed:
+            connection = await get_queue_connection()
+            if not connection:
+                return None
+            self._channel = await connection.channel()
+        return self._channel
+
+    async def queue_depth(self, pool: WorkerPool) -> tuple[int, int] | None:
+        """
+        Total ready messages and consumers across the pool's queues
+        """
+        channel = await self._get_channel()
+        if channel is None:
+            return None
+
+        ready = consumers = 0
+        for queue_name in pool.queues:
+            queue = await channel.declare_queue(queue_name, durable=True)
+            ready += queue.declaration_result.message_count
+            consumers += queue.declaration_result.consumer_count
+        return ready, consumers
+
+    def desired_size(self, pool: WorkerPool, ready: int, consumers: int) -> int:
+        """
+        Hysteresis on backlog per consuming process: scale up when it stays
+        above the high watermark for SCALE_UP_TICKS polls, down when it
+        stays below the low watermark for SCALE_DOWN_TICKS polls, never
+        within COOLDOWN.
+
+        Utilization comes from the broker's consumer count: children still
+        starting (or whose consumer died) are not capacity, so the backlog
+        is spread over consuming children only, and a scale-up adds what
+        is missing on top of them instead of assuming every child works.
+        """
+        # Each child consumes every queue of its pool
+        consuming = min(pool.size, consumers // max(len(pool.queues), 1))
+        backlog = ready / max(consuming, 1)
+
+        if backlog > settings.SUPERVISOR_SCALE_UP_BACKLOG:
+            pool.up_ticks += 1
+            pool.down_ticks = 0
+        elif backlog < settings.SUPERVISOR_SCALE_DOWN_BACKLOG and consuming >= pool.size:
+            # Not while children are missing: their work is just delayed
+            pool.down_ticks += 1
+            pool.up_ticks = 0
+        else:
+            pool.up_ticks = pool.down_ticks = 0
+
+        if time.monotonic() - pool.last_scaled_at < settings.SUPERVISOR_COOLDOWN:
+            return pool.size
+
+        if pool.up_ticks >= settings.SUPERVISOR_SCALE_UP_TICKS:
+            # Enough consumers to bring backlog back under the high watermark
+            needed = -(-ready // settings.SUPERVISOR_SCALE_UP_BACKLOG)
+            return min(pool.max_procs, pool.size + max(1, needed - consuming))
+
+        if pool.down_ticks >= settings.SUPERVISOR_SCALE_DOWN_TICKS:
+            return max(pool.min_procs, pool.size - 1)
+
+        return pool.size
+
+    async def scale(self, pool: WorkerPool):
+        while pool.size < pool.min_procs:
+            await pool.spawn()
+
+        if not pool.queues or pool.min_procs == pool.max_procs:
+            return
+
+        try:
+            depth = await self.queue_depth(pool)
+        except Exception:
+            logger.exception("[%s] queue depth poll failed", pool.name)
+            self._channel = None
+            return
+        if depth is None:
+            return
+
+        ready, consumers = depth
+        pool.depth_gauge.set(ready)
+
+        target = self.desired_size(pool, ready, consumers)
+        if target == pool.size:
+            return
+
+        logger.info(
+            "[%s] ready=%d consumers=%d scaling %d -> %d",
+            pool.name, ready, consumers, pool.size, target,
+        )
+        while pool.size < target:
+            await pool.spawn()
+        while pool.size > target:
+            if not pool.stop_one():
+                break
+
+        pool.last_scaled_at = time.monotonic()
+        pool.up_ticks = pool.down_ticks = 0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop_event.set)
+
+        reporter = asyncio.create_task(report_metrics(prefix="supervisor."))
+        logger.info("Supervisor started: %s", ", ".join(p.name for p in self.pools))
+
+        try:
+            while not self.stop_event.is_set():
+                for pool in self.pools:
+                    await self.scale(pool)
+                try:
+                    await asyncio.wait_for(
+                        self.stop_event.wait(), timeout=settings.SUPERVISOR_POLL_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            reporter.cancel()
+            logger.info("Supervisor stopping children")
+            await asyncio.gather(
+                *(pool.shutdown() for pool in self.pools)
+            )
+            await close_queue()
+
+
+def default_pools() -> list[WorkerPool]:
+    cpus = os.cpu_count() or 1
+    return [
+        WorkerPool(
+            "asm_trigger",
+            "triggers.asm_trigger",
+            queues=list(lane_weights()),
+            min_procs=settings.ASM_TRIGGER_MIN_PROCS,
+            max_procs=settings.ASM_TRIGGER_MAX_PROCS or cpus,
+        ),
+        WorkerPool(
+            "asm_worker",
+            "asm_worker",
+            queues=["asm.jobs"],
+            min_procs=settings.ASM_WORKER_MIN_PROCS,
+            max_procs=settings.ASM_WORKER_MAX_PROCS or cpus,
+            # Discoveries run for minutes: let a scaled-down child finish its job
+            drain_timeout=settings.ASM_WORKER_DRAIN_TIMEOUT,
+        ),
+        # Prototype without a queue yet: keep exactly one running
+        WorkerPool("vs_worker", "vs_worker", queues=[], min_procs=1, max_procs=1),
+    ]
+
+
+if __name__ == "__main__":
+    asyncio.run(Supervisor(default_pools()).run())
@@ -0,0 +1,13 @@
+"""
+Workers test setup: modules import `config`, `utils`, `discovery` from
+the workers directory, and must not reach out to Redis or Postgres.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/test")
+os.environ.setdefault("CACHE_ENABLED", "False")
+os.environ.setdefault("POLITENESS_ENABLED", "False")
@@ -0,0 +1,37 @@
+"""
+TieredCache's Redis tier, against an in-memory stand-in
+"""
+
+import asyncio
+
+from utils import cache
+
+
+class FakeRedis:
+    def __init__(self, data: dict):
+        self.data = data
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_unreadable_redis_entry_is_a_miss_and_dropped(monkeypatch):
+    redis = FakeRedis({"cache:test:a": b"{not json", "cache:test:b": b"[1, 2]"})
+
+    async def get_redis():
+        return redis
+
+    monkeypatch.setattr(cache, "get_redis", get_redis)
+    tiered = cache.TieredCache("test", lru_size=8)
+
+    async def main():
+        return await tiered.get("a"), await tiered.get("b")
+
+    assert asyncio.run(main()) == ((False, None), (False, None))
+    assert redis.data == {}
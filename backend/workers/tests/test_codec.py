@@ -0,0 +1,49 @@
+"""
+Queue payload codecs: round trips and schema version checks
+"""
+
+import pytest
+
+from utils.codec import (
+    SCHEMA_VERSION,
+    SCHEMA_VERSION_HEADER,
+    CodecError,
+    available_codecs,
+    decode_payload,
+    encode_payload,
+)
+
+CODECS = sorted(available_codecs())
+
+
+@pytest.mark.parametrize("name", CODECS)
+def test_round_trip(name):
+    message = {"job_id": "j1", "ports": [22, 443], "nested": {"ok": True}}
+    body, content_type, headers = encode_payload(message, name)
+
+    assert headers == {SCHEMA_VERSION_HEADER: SCHEMA_VERSION}
+    assert decode_payload(body, content_type, headers) == message
+
+
+@pytest.mark.parametrize("name", [name for name in CODECS if name != "msgpack"])
+def test_int_keys_are_stringified_like_json(name):
+    body, content_type, headers = encode_payload({"counts": {443: 2}}, name)
+
+    assert decode_payload(body, content_type, headers) == {"counts": {"443": 2}}
+
+
+def test_unversioned_messages_decode_as_legacy():
+    assert decode_payload(b'{"a": 1}', None, {}) == {"a": 1}
+
+
+@pytest.mark.parametrize("version", [SCHEMA_VERSION + 1, -1, "v2"])
+def test_unknown_schema_version_is_rejected(version):
+    body, content_type, _ = encode_payload({"a": 1}, "json")
+
+    with pytest.raises(CodecError):
+        decode_payload(body, content_type, {SCHEMA_VERSION_HEADER: version})
+
+
+def test_unsupported_content_type_is_rejected():
+    with pytest.raises(CodecError):
+        decode_payload(b"\x00", "application/x-unknown")
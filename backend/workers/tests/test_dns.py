@@ -0,0 +1,225 @@
+"""
+DnsEnumerator against the in-memory StaticResolver
+"""
+
+import asyncio
+import time
+
+from config.settings import settings
+from discovery.dns import DnsEnumerator, StaticResolver, cache_ttl, record
+from utils.cache import TieredCache
+
+ZONE = {
+    "example.com": {"A": ["192.0.2.1"], "MX": ["10 mail.example.com"], "TXT": ["v=spf1 -all"]},
+    "www.example.com": {"A": ["192.0.2.10"], "AAAA": ["2001:db8::10"]},
+    "api.example.com": {"CNAME": ["lb.example.net"]},
+    "wild.com": {"A": ["192.0.2.50"]},
+    "*.wild.com": {"A": ["192.0.2.99"]},
+}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def collect(agen) -> list[dict]:
+    return [rec async for rec in agen]
+
+
+def enumerator(resolver, **kwargs) -> DnsEnumerator:
+    return DnsEnumerator(resolver=resolver, concurrency=kwargs.pop("concurrency", 8), **kwargs)
+
+
+# ---------------------------------------------------
+# enumerate
+# ---------------------------------------------------
+def test_enumerate_apex_only_without_wordlist():
+    records = run(collect(enumerator(StaticResolver(ZONE)).enumerate("Example.COM.")))
+
+    assert {(r["name"], r["type"], r["value"]) for r in records} == {
+        ("example.com", "A", "192.0.2.1"),
+        ("example.com", "MX", "10 mail.example.com"),
+        ("example.com", "TXT", "v=spf1 -all"),
+    }
+
+
+def test_enumerate_brute_forces_wordlist():
+    records = run(collect(
+        enumerator(StaticResolver(ZONE)).enumerate("example.com", wordlist=["www", "api", "nope"])
+    ))
+    names = {(r["name"], r["type"]) for r in records}
+
+    assert ("www.example.com", "A") in names
+    assert ("www.example.com", "AAAA") in names
+    assert ("api.example.com", "CNAME") in names
+    assert not any(r["name"] == "nope.example.com" for r in records)
+    # Subdomains only get address-type lookups
+    assert not any(r["name"] != "example.com" and r["type"] in ("MX", "TXT") for r in records)
+
+
+def test_enumerate_skips_brute_force_on_wildcard_zone():
+    resolver = StaticResolver(ZONE)
+    records = run(collect(enumerator(resolver).enumerate("wild.com", wordlist=["www", "api", "mail"])))
+
+    assert [(r["name"], r["value"]) for r in records] == [("wild.com", "192.0.2.50")]
+
+
+def test_detect_wildcard():
+    dns = enumerator(StaticResolver(ZONE))
+
+    assert run(dns.detect_wildcard("wild.com")) == {"192.0.2.99"}
+    assert run(dns.detect_wildcard("example.com")) == set()
+
+
+# ---------------------------------------------------
+# resolve_many
+# ---------------------------------------------------
+class CountingResolver(StaticResolver):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def resolve(self, name, rtype):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            return await super().resolve(name, rtype)
+        finally:
+            self.in_flight -= 1
+
+
+def test_resolve_many_yields_every_answer():
+    queries = [(name, "A") for name in ZONE] + [("missing.example.com", "A")]
+    records = run(collect(enumerator(StaticResolver(ZONE)).resolve_many(queries)))
+
+    assert sorted(r["value"] for r in records) == ["192.0.2.1", "192.0.2.10", "192.0.2.50", "192.0.2.99"]
+
+
+def test_resolve_many_bounds_concurrency():
+    zone = {f"h{i}.example.com": {"A": [f"10.0.0.{i}"]} for i in range(100)}
+    resolver = CountingResolver(zone, delay=0.001)
+    queries = ((name, "A") for name in zone)
+
+    records = run(collect(enumerator(resolver, concurrency=5).resolve_many(queries)))
+
+    assert len(records) == 100
+    assert resolver.queries == 100
+    assert resolver.peak <= 5
+
+
+def test_resolve_many_with_no_queries():
+    assert run(collect(enumerator(StaticResolver(ZONE)).resolve_many([]))) == []
+
+
+# ---------------------------------------------------
+# NXDOMAIN / errors
+# ---------------------------------------------------
+class FailingResolver:
+    def __init__(self):
+        self.queries = 0
+
+    async def resolve(self, name, rtype):
+        self.queries += 1
+        raise OSError("resolver unreachable")
+
+
+class SlowResolver:
+    async def resolve(self, name, rtype):
+        await asyncio.sleep(1)
+        return [record(name, rtype, "192.0.2.1")]
+
+
+def test_nxdomain_is_an_empty_answer():
+    assert run(enumerator(StaticResolver(ZONE)).lookup("nope.example.com", "A")) == []
+    # Name exists, type does not (NoAnswer)
+    assert run(enumerator(StaticResolver(ZONE)).lookup("api.example.com", "A")) == []
+
+
+def test_resolver_errors_and_timeouts_are_empty_answers():
+    assert run(enumerator(FailingResolver()).lookup("example.com", "A")) == []
+    assert run(enumerator(SlowResolver(), timeout=0.01).lookup("example.com", "A")) == []
+
+
+# ---------------------------------------------------
+# Cache TTLs
+# ---------------------------------------------------
+def local_cache() -> TieredCache:
+    return TieredCache("dns-test", lru_size=100, use_redis=False)
+
+
+def expires_in(cache: TieredCache, key: str) -> float:
+    return cache._local[key][0] - time.time()
+
+
+def test_cache_ttl_clamps_record_ttls():
+    assert cache_ttl([]) == settings.DNS_CACHE_NEGATIVE_TTL
+    assert cache_ttl([record("a", "A", "1.1.1.1")]) == settings.DNS_CACHE_DEFAULT_TTL
+    assert cache_ttl([record("a", "A", "1.1.1.1", 1)]) == settings.DNS_CACHE_MIN_TTL
+    assert cache_ttl([record("a", "A", "1.1.1.1", 10 ** 6)]) == settings.DNS_CACHE_MAX_TTL
+    assert cache_ttl([
+        record("a", "A", "1.1.1.1", 600),
+        record("a", "A", "1.1.1.2", 120),
+    ]) == 120
+
+
+def test_answers_are_cached_for_their_ttl():
+    resolver = StaticResolver(ZONE, ttl=120)
+    cache = local_cache()
+    dns = enumerator(resolver, cache=cache)
+
+    first = run(dns.lookup("www.example.com", "A"))
+    second = run(dns.lookup("WWW.example.com.", "A"))
+
+    assert first == second
+    assert resolver.queries == 1
+    assert 110 < expires_in(cache, "A:www.example.com") <= 120
+
+
+def test_nxdomain_is_cached_for_the_negative_ttl():
+    resolver = StaticResolver(ZONE)
+    cache = local_cache()
+    dns = enumerator(resolver, cache=cache)
+
+    run(dns.lookup("nope.example.com", "A"))
+    run(dns.lookup("nope.example.com", "A"))
+
+    assert resolver.queries == 1
+    ttl = settings.DNS_CACHE_NEGATIVE_TTL
+    assert ttl - 10 < expires_in(cache, "A:nope.example.com") <= ttl
+
+
+def test_errors_are_not_cached():
+    resolver = FailingResolver()
+    dns = enumerator(resolver, cache=local_cache())
+
+    run(dns.lookup("example.com", "A"))
+    run(dns.lookup("example.com", "A"))
+
+    assert resolver.queries == 2
+
+
+def test_expired_answers_are_resolved_again():
+    resolver = StaticResolver(ZONE)
+    cache = local_cache()
+    dns = enumerator(resolver, cache=cache)
+
+    run(dns.lookup("www.example.com", "A"))
+    expires_at, value = cache._local["A:www.example.com"]
+    cache._local["A:www.example.com"] = (time.time() - 1, value)
+    run(dns.lookup("www.example.com", "A"))
+
+    assert resolver.queries == 2
+
+
+def test_concurrent_lookups_share_one_query():
+    resolver = StaticResolver(ZONE, delay=0.01)
+    dns = enumerator(resolver, cache=local_cache())
+
+    async def lookups():
+        return await asyncio.gather(*(dns.lookup("www.example.com", "A") for _ in range(10)))
+
+    answers = run(lookups())
+
+    assert resolver.queries == 1
+    assert all(answer == answers[0] for answer in answers)
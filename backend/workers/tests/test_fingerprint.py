@@ -0,0 +1,177 @@
+"""
+ServiceFingerprinter against local listeners and a small probe database
+"""
+
+import asyncio
+import shutil
+import ssl
+import subprocess
+
+import pytest
+
+from config.settings import settings
+from discovery.fingerprint import ServiceFingerprinter
+from discovery.service_probes import ProbeDatabase
+
+HOST = "127.0.0.1"
+
+PROBES = r"""
+Probe TCP NULL q||
+softmatch ftp m|^220 |
+
+Probe TCP GetRequest q|GET / HTTP/1.0\r\n\r\n|
+rarity 1
+match http m|^HTTP/1\.[01] \d\d\d| p/generic http/
+
+Probe TCP Help q|HELP\r\n|
+rarity 2
+match ftp m|^220 TestFTPd ([\d.]+)| p/TestFTPd/ v/$1/ cpe:/a:test:ftpd:$1/
+
+Probe TCP TLSHello q|HELLO\r\n|
+rarity 3
+sslports 9443
+match echo m|^HELLO| p/tls echo/
+"""
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture(autouse=True)
+def short_timeout(monkeypatch):
+    # Silent services cost one timeout per probe
+    monkeypatch.setattr(settings, "FINGERPRINT_TIMEOUT", 0.5)
+
+
+@pytest.fixture
+def database(tmp_path) -> ProbeDatabase:
+    path = tmp_path / "nmap-service-probes"
+    path.write_text(PROBES)
+    return ProbeDatabase.load(str(path))
+
+
+class RecordingCache:
+    """Stand-in for TieredCache: records the TTL each response got"""
+
+    def __init__(self):
+        self.ttls = {}
+
+    async def get_or_compute(self, key, compute, ttl_for):
+        value = await compute()
+        self.ttls[key] = ttl_for(value)
+        return value
+
+
+async def serve(handler, tls: ssl.SSLContext | None = None):
+    server = await asyncio.start_server(handler, HOST, 0, ssl=tls)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def ftp_like(received: list):
+    """Greets a silent client with a bare 220; answers HELP with its version"""
+
+    async def handler(reader, writer):
+        try:
+            data = await asyncio.wait_for(reader.read(100), 0.2)
+        except asyncio.TimeoutError:
+            writer.write(b"220 \r\n")
+            await writer.drain()
+            data = await reader.read(100)
+        received.append(data)
+        if data.startswith(b"HELP"):
+            writer.write(b"220 TestFTPd 2.3.4\r\n")
+            await writer.drain()
+        writer.close()
+
+    return handler
+
+
+# ---------------------------------------------------
+# Softmatch
+# ---------------------------------------------------
+def test_softmatch_restricts_probes_to_that_service(database):
+    async def main():
+        received = []
+        server, port = await serve(ftp_like(received))
+        fingerprinter = ServiceFingerprinter(database, max_rarity=9, max_probes=10, response_cache=RecordingCache())
+        try:
+            return await fingerprinter.identify(HOST, port), received
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    result, received = run(main())
+
+    assert result["service"] == "ftp"
+    assert result["version"] == "2.3.4"
+    assert result["method"] == "Help"
+    # GetRequest has no ftp rule, so it was never sent
+    assert not any(data.startswith(b"GET") for data in received)
+
+
+# ---------------------------------------------------
+# Response cache TTL
+# ---------------------------------------------------
+def test_empty_responses_are_not_cached(database):
+    async def main():
+        async def silent(reader, writer):
+            await reader.read(100)
+            writer.close()
+
+        server, port = await serve(silent)
+        cache = RecordingCache()
+        fingerprinter = ServiceFingerprinter(database, max_rarity=9, max_probes=10, response_cache=cache)
+        try:
+            await fingerprinter.identify(HOST, port)
+        finally:
+            server.close()
+            await server.wait_closed()
+        return cache.ttls
+
+    ttls = run(main())
+
+    assert ttls and set(ttls.values()) == {0}
+
+
+# ---------------------------------------------------
+# sslports
+# ---------------------------------------------------
+@pytest.fixture
+def server_tls(tmp_path) -> ssl.SSLContext:
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl not installed")
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", str(key), "-out", str(cert)],
+        check=True, capture_output=True,
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def test_sslports_probes_are_sent_over_tls(database, server_tls):
+    async def echo(reader, writer):
+        writer.write(await reader.read(100))
+        await writer.drain()
+        writer.close()
+
+    async def main():
+        server, port = await serve(echo, tls=server_tls)
+        # Registered as an sslport of TLSHello for this test
+        database.by_name["TLSHello"].sslports = {port}
+        cache = RecordingCache()
+        fingerprinter = ServiceFingerprinter(database, max_rarity=9, max_probes=10, response_cache=cache)
+        try:
+            return await fingerprinter.identify(HOST, port), cache.ttls, port
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    result, ttls, port = run(main())
+
+    assert result["service"] == "echo"
+    assert result["method"] == "TLSHello"
+    assert f"{HOST}:{port}:TLSHello:tls" in ttls
@@ -0,0 +1,33 @@
+"""
+ASM trigger lanes, and the utils modules the API keeps an identical copy of
+"""
+
+import os
+
+import pytest
+
+from utils.lanes import ASM_TRIGGER_LANES, asm_trigger_lane, asm_trigger_queue
+
+WORKERS_UTILS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utils")
+API_UTILS = os.path.join(os.path.dirname(os.path.dirname(WORKERS_UTILS)), "api_service", "utils")
+
+
+@pytest.mark.parametrize("intensity, schedule_type, triggered_by, lane", [
+    ("NORMAL", "QUICK", "API", "interactive"),
+    ("DEEP", "QUICK", "API", "standard"),
+    ("LIGHT", "CRON", "CRON", "standard"),
+    ("NORMAL", "INTERVAL", "CRON", "bulk"),
+    # First run of a scheduled discovery: the user just created it
+    ("NORMAL", "INTERVAL", "API", "interactive"),
+    ("DEEP", "CRON", "API", "standard"),
+])
+def test_lane_routing(intensity, schedule_type, triggered_by, lane):
+    assert asm_trigger_lane(intensity, schedule_type, triggered_by) == lane
+    assert asm_trigger_queue(intensity, schedule_type, triggered_by) == ASM_TRIGGER_LANES[lane]
+
+
+@pytest.mark.parametrize("module", ["lanes.py", "codec.py", "portset.py", "targets.py"])
+def test_shared_module_matches_api_copy(module):
+    with open(os.path.join(WORKERS_UTILS, module), "rb") as ours, \
+            open(os.path.join(API_UTILS, module), "rb") as theirs:
+        assert ours.read() == theirs.read(), f"utils/{module} differs from the API's copy"
@@ -0,0 +1,140 @@
+"""
+Pipeline seeding / deferral and politeness slot waits, without Redis
+"""
+
+import asyncio
+
+import pytest
+
+from config.settings import settings
+from utils.pipeline import Defer, Pipeline, Stage
+from utils.politeness import TargetSlots
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def collect(agen) -> list[tuple]:
+    return [item async for item in agen]
+
+
+def doubler(name: str, concurrency: int = 1) -> Stage:
+    async def handler(item):
+        yield item * 2
+    return Stage(name, handler, concurrency=concurrency)
+
+
+# ---------------------------------------------------
+# Seeding
+# ---------------------------------------------------
+def test_items_flow_through_every_stage():
+    pipeline = Pipeline("test", [doubler("a"), doubler("b", concurrency=3)])
+    emitted = run(collect(pipeline.run([1, 2, 3])))
+
+    assert sorted(item for stage, item in emitted if stage == "a") == [2, 4, 6]
+    assert sorted(item for stage, item in emitted if stage == "b") == [4, 8, 12]
+
+
+def test_entry_routes_seeds_past_early_stages():
+    pipeline = Pipeline("test", [doubler("a"), doubler("b")])
+    entry = lambda seed: "b" if seed > 10 else "a"
+    emitted = run(collect(pipeline.run([1, 100], entry=entry)))
+
+    assert sorted(emitted) == [("a", 2), ("b", 4), ("b", 200)]
+
+
+# ---------------------------------------------------
+# Defer
+# ---------------------------------------------------
+def test_deferred_items_retry_after_others():
+    attempts = {}
+
+    async def handler(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        if item == "busy" and attempts[item] < 3:
+            raise Defer(0.01)
+        yield item
+
+    pipeline = Pipeline("test", [Stage("s", handler, concurrency=1)])
+    emitted = run(collect(pipeline.run(["busy", "a", "b"])))
+
+    # The busy item did not block the worker, and was not dropped
+    assert [item for _, item in emitted] == ["a", "b", "busy"]
+    assert attempts["busy"] == 3
+
+
+def test_deferral_after_end_marker_is_still_drained():
+    deferred_once = set()
+
+    async def handler(item):
+        if item not in deferred_once:
+            deferred_once.add(item)
+            raise Defer(0.01)
+        yield item
+
+    pipeline = Pipeline("test", [doubler("a"), Stage("s", handler, concurrency=4)])
+    emitted = run(collect(pipeline.run(range(20))))
+
+    assert sorted(item for stage, item in emitted if stage == "s") == [n * 2 for n in range(20)]
+
+
+# ---------------------------------------------------
+# Politeness waits
+# ---------------------------------------------------
+class FullSlots(TargetSlots):
+    """Every group is at its limit"""
+
+    async def _acquire_remote(self, group: str) -> bool:
+        return False
+
+
+def test_hold_raises_when_no_slot_frees_up():
+    async def main():
+        slots = FullSlots(lease=1, linger=0.1)
+        with pytest.raises(TimeoutError):
+            async with slots.hold("10.0.0.1", timeout=0.05):
+                pytest.fail("entered without a slot")
+
+    run(main())
+
+
+def test_hold_releases_on_exit():
+    async def main():
+        slots = TargetSlots(lease=1, linger=0.1)
+        async with slots.hold("10.0.0.1", timeout=0.05):
+            assert slots._leases["10.0.0.0/24"].refs == 1
+        assert slots._leases["10.0.0.0/24"].refs == 0
+        await slots.close()
+
+    run(main())
+
+
+class CountingFullSlots(FullSlots):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.asked = 0
+
+    async def _acquire_remote(self, group: str) -> bool:
+        self.asked += 1
+        return False
+
+
+def test_denial_is_remembered_per_group(monkeypatch):
+    monkeypatch.setattr(settings, "POLITENESS_RETRY_DELAY", 0.05)
+
+    async def main():
+        slots = CountingFullSlots(lease=1, linger=0.1)
+        results = [await slots.try_acquire(f"10.0.0.{n}") for n in range(1, 200)]
+        asked_once = slots.asked
+        # Another group still asks Redis
+        await slots.try_acquire("10.0.1.1")
+        asked_other = slots.asked
+        await asyncio.sleep(0.06)
+        await slots.try_acquire("10.0.0.1")
+        return results, asked_once, asked_other, slots.asked
+
+    results, asked_once, asked_other, asked_after = run(main())
+
+    assert not any(results)
+    assert (asked_once, asked_other, asked_after) == (1, 2, 3)
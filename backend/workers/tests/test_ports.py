@@ -0,0 +1,197 @@
+"""
+PortScanner against local listening sockets
+"""
+
+import asyncio
+import socket
+import time
+
+import pytest
+
+from config.settings import settings
+from discovery.ports import PortScanner, TokenBucket
+
+HOST = "127.0.0.1"
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def collect(agen) -> list[dict]:
+    return [result async for result in agen]
+
+
+def free_port() -> int:
+    """
+    A port nothing listens on (bound, then released): connects are refused
+    """
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def listeners(count: int):
+    servers = [
+        await asyncio.start_server(lambda reader, writer: writer.close(), HOST, 0)
+        for _ in range(count)
+    ]
+    return servers, [server.sockets[0].getsockname()[1] for server in servers]
+
+
+async def close_all(servers):
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+
+def scanner(**kwargs) -> PortScanner:
+    kwargs.setdefault("global_rate", 10000)
+    kwargs.setdefault("per_target_rate", 10000)
+    return PortScanner(**kwargs)
+
+
+# ---------------------------------------------------
+# Port states
+# ---------------------------------------------------
+def test_open_and_closed_ports():
+    async def main():
+        servers, open_ports = await listeners(3)
+        closed = free_port()
+        try:
+            return await collect(scanner().scan([HOST], [*open_ports, closed], only_open=False)), open_ports, closed
+        finally:
+            await close_all(servers)
+
+    results, open_ports, closed = run(main())
+    states = {r["port"]: r["state"] for r in results}
+
+    assert states == {**{port: "open" for port in open_ports}, closed: "closed"}
+    assert all(r["rtt"] is not None for r in results if r["state"] == "open")
+
+
+def test_only_open_by_default():
+    async def main():
+        servers, open_ports = await listeners(2)
+        try:
+            return await collect(scanner().scan([HOST], [*open_ports, free_port()])), open_ports
+        finally:
+            await close_all(servers)
+
+    results, open_ports = run(main())
+
+    assert sorted(r["port"] for r in results) == sorted(open_ports)
+    assert {r["state"] for r in results} == {"open"}
+
+
+def test_timeouts_are_filtered(monkeypatch):
+    async def never_connects(host, port):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(settings, "PORTSCAN_TIMEOUT", 0.05)
+    monkeypatch.setattr(asyncio, "open_connection", never_connects)
+
+    started = time.monotonic()
+    results = run(collect(scanner().scan([HOST], [1, 2, 3], only_open=False)))
+
+    assert {r["state"] for r in results} == {"filtered"}
+    assert len(results) == 3
+    assert time.monotonic() - started < 1
+
+
+def test_unreachable_is_filtered(monkeypatch):
+    async def unreachable(host, port):
+        raise OSError("Network is unreachable")
+
+    monkeypatch.setattr(asyncio, "open_connection", unreachable)
+
+    results = run(collect(scanner().scan([HOST], [80], only_open=False)))
+
+    assert results == [{"host": HOST, "port": 80, "state": "filtered", "rtt": None}]
+
+
+def test_duplicate_targets_are_scanned_once():
+    async def main():
+        servers, open_ports = await listeners(1)
+        try:
+            return await collect(scanner().scan([HOST, HOST], open_ports))
+        finally:
+            await close_all(servers)
+
+    assert len(run(main())) == 1
+
+
+# ---------------------------------------------------
+# Rate limits
+# ---------------------------------------------------
+def test_token_bucket_rate():
+    async def main():
+        bucket = TokenBucket(rate=50)
+        started = time.monotonic()
+        for _ in range(75):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # 50 banked, the other 25 at 50/s
+    assert run(main()) == pytest.approx(0.5, abs=0.2)
+
+
+def test_per_target_bucket_caps_probe_rate():
+    ports = [free_port() for _ in range(30)]
+
+    started = time.monotonic()
+    results = run(collect(scanner(per_target_rate=20).scan([HOST], ports, only_open=False)))
+    elapsed = time.monotonic() - started
+
+    assert len(results) == 30
+    # 20 banked, 10 more at 20/s
+    assert elapsed >= 0.4
+
+
+def test_global_bucket_caps_across_targets():
+    ports = [free_port() for _ in range(10)]
+    hosts = ["127.0.0.1", "127.0.0.2", "127.0.0.3"]
+
+    started = time.monotonic()
+    results = run(collect(scanner(global_rate=20).scan(hosts, ports, only_open=False)))
+    elapsed = time.monotonic() - started
+
+    assert len(results) == 30
+    assert elapsed >= 0.4
+
+
+# ---------------------------------------------------
+# Bounded state / workers
+# ---------------------------------------------------
+def test_host_state_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "PORTSCAN_HOST_STATE", 4)
+    hosts = [f"127.0.0.{i}" for i in range(1, 11)]
+    port = free_port()
+
+    async def main():
+        scan = scanner()
+        await collect(scan.scan(hosts, [port], only_open=False))
+        return scan
+
+    scan = run(main())
+
+    assert list(scan._target_buckets) == hosts[-4:]
+    assert list(scan._rtts) == hosts[-4:]
+
+
+def test_small_scans_start_few_workers():
+    peak = 0
+
+    async def main():
+        nonlocal peak
+        servers, open_ports = await listeners(2)
+        try:
+            async for _ in scanner(concurrency=500).scan([HOST], open_ports, only_open=False):
+                peak = max(peak, len(asyncio.all_tasks()))
+        finally:
+            await close_all(servers)
+
+    run(main())
+
+    # main + feed + one worker per pair
+    assert peak <= 4
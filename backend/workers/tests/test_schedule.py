@@ -0,0 +1,42 @@
+"""
+The API's cron schedules (api_service/utils/schedule.py, stdlib only)
+"""
+
+import importlib.util
+import os
+from datetime import datetime
+
+import pytest
+
+SCHEDULE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "api_service", "utils", "schedule.py",
+)
+
+# Loaded by path: the workers have their own `utils` package
+_spec = importlib.util.spec_from_file_location("api_schedule", SCHEDULE_PATH)
+schedule = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(schedule)
+
+# A Saturday
+AFTER = datetime(2026, 10, 17, 12, 0)
+
+
+@pytest.mark.parametrize("expression, fires", [
+    # Both day fields restricted: either matches (Mon 19th, or the 20th)
+    ("0 0 20 * 1", datetime(2026, 10, 19)),
+    # A "*/step" day field counts as unrestricted, so both must match:
+    # the first odd-numbered Tuesday, not Mon 19th
+    ("0 0 */2 * 2", datetime(2026, 10, 27)),
+    # The first 1st on a Sun/Tue/Thu/Sat, not Sun 18th
+    ("0 0 1 * */2", datetime(2026, 11, 1)),
+    ("0 0 * * 1", datetime(2026, 10, 19)),
+    ("@monthly", datetime(2026, 11, 1)),
+])
+def test_day_of_month_and_day_of_week(expression, fires):
+    assert schedule.parse_cron(expression).next_after(AFTER) == fires
+
+
+def test_invalid_cron_is_rejected():
+    with pytest.raises(ValueError):
+        schedule.parse_cron("0 0 32 * *")
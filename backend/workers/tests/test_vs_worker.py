@@ -0,0 +1,80 @@
+"""
+VSScannerWorker live path: port scan -> fingerprint -> CVE index, on 127.0.0.1
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+import vs_worker
+from discovery.fingerprint import ServiceFingerprinter
+from discovery.ports import PortScanner
+from discovery.service_probes import ProbeDatabase
+
+# The package re-exports a fingerprint() function under the module's name
+fingerprint_module = importlib.import_module("discovery.fingerprint")
+
+HOST = "127.0.0.1"
+
+PROBES = r"""
+Probe TCP NULL q||
+match ftp m|^220 TestFTPd ([\d.]+)| p/TestFTPd/ v/$1/ cpe:/a:test:ftpd:$1/
+"""
+
+
+class StaticIndex:
+    """Stand-in for CveIndex: one vulnerable CPE"""
+
+    def lookup_cpe(self, cpe: str) -> list[dict]:
+        if cpe != "cpe:/a:test:ftpd:2.3.4":
+            return []
+        return [{"cve": "CVE-2011-2523", "severity": "critical", "cvss_score": 9.8}]
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch):
+    path = tmp_path / "nmap-service-probes"
+    path.write_text(PROBES)
+    monkeypatch.setattr(fingerprint_module, "_fingerprinter", ServiceFingerprinter(ProbeDatabase.load(str(path))))
+
+    worker = vs_worker.VSScannerWorker()
+    worker.cve_index = StaticIndex()
+    worker.scanner = PortScanner(global_rate=10000, per_target_rate=10000)
+    return worker
+
+
+def test_live_scan_correlates_fingerprinted_services(worker, monkeypatch):
+    async def main():
+        async def ftp(reader, writer):
+            writer.write(b"220 TestFTPd 2.3.4\r\n")
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(ftp, HOST, 0)
+        port = server.sockets[0].getsockname()[1]
+        monkeypatch.setattr(vs_worker, "ports_for_intensity", lambda _: [port])
+        try:
+            return await worker.process_scan_job("scan-1", HOST, "LIGHT"), port
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    findings, port = asyncio.run(main())
+
+    assert findings == [{
+        "source": "cve_index",
+        "kind": "vulnerability",
+        "host": HOST,
+        "port": port,
+        "cpe": "cpe:/a:test:ftpd:2.3.4",
+        "vuln_id": "CVE-2011-2523",
+        "severity": "critical",
+        "cvss_score": 9.8,
+    }]
+
+
+def test_live_scan_without_services_finds_nothing(worker, monkeypatch):
+    monkeypatch.setattr(vs_worker, "ports_for_intensity", lambda _: [])
+
+    assert asyncio.run(worker.process_scan_job("scan-2", HOST, "LIGHT")) == []
@@ -1,25 +1,58 @@
 import asyncio
-import httpx
-from utils.queue import consume_messages
+import signal
+from utils.queue import consume_lanes
+from utils.http_client import request_with_retry, close_http_client
+from utils.lanes import ASM_TRIGGER_LANES
+from utils.metrics import report_metrics
+from utils.dedup import Deduplicator
+from utils.redis_client import close_redis
 from config.settings import settings
 
-QUEUE_NAME = "asm.triggers"
+# Drops redeliveries of a trigger that already ran
+dedup = Deduplicator("asm.triggers")
+
+
+def lane_weights() -> dict[str, int]:
+    """
+    Parse ASM_TRIGGER_LANE_WEIGHTS into {queue_name: weight}
+    """
+    weights = {}
+    for item in settings.ASM_TRIGGER_LANE_WEIGHTS.split(","):
+        lane, _, weight = item.strip().partition(":")
+        if lane in ASM_TRIGGER_LANES and int(weight or 1) > 0:
+            weights[ASM_TRIGGER_LANES[lane]] = int(weight or 1)
+    return weights
 
 
 # ---------------------------------------------------
-# Call ASM microservice
+# Dedup key
 # ---------------------------------------------------
-async def run_asm_task(payload: dict):
-    try:
-        url = f"{settings.ASM_MICROSERVICE}/discovery/start"
+def dedup_key(payload: dict) -> str | None:
+    """
+    asm_discovery_id + run_nonce; legacy messages without a nonce are
+    not deduplicated
+    """
+    nonce = payload.get("run_nonce")
+    if not nonce:
+        return None
+    return f"{payload.get('asm_discovery_id')}:{nonce}"
 
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
 
-            print("[ASM_RUNNER] ASM service triggered")
+# ---------------------------------------------------
+# Call ASM microservice
+# ---------------------------------------------------
+async def run_asm_task(payload: dict, key: str | None = None):
+    url = f"{settings.ASM_MICROSERVICE}/discovery/start"
+    # Lets the service drop a start it already accepted (same run)
+    headers = {"Idempotency-Key": key} if key else None
+
+    try:
+        # POST: only retried in-process if it was never sent
+        await request_with_retry("POST", url, json=payload, headers=headers)
+        print("[ASM_RUNNER] ASM service triggered")
     except Exception as e:
-        print("Error in Running Message  ::",e)        
+        print("Error in Running Message  ::", e)
+        raise   # consumer routes it to the delayed retry queue
 
 
 # ---------------------------------------------------   
@@ -27,15 +60,44 @@ async def run_asm_task(payload: dict):
 # ---------------------------------------------------
 async def handle_message(payload: dict):
     print("[ASM_CONSUMER] Received:", payload)
-    await run_asm_task(payload)
+
+    key = dedup_key(payload)
+    if key is None:
+        await run_asm_task(payload)
+        return
+
+    if not await dedup.claim(key):
+        print("[ASM_CONSUMER] Duplicate delivery skipped:", key)
+        return
+
+    try:
+        await run_asm_task(payload, key)
+    except Exception:
+        await dedup.release(key)
+        raise
+
+    await dedup.complete(key)
 
 
 # ---------------------------------------------------
 # Start consumer
 # ---------------------------------------------------
 async def start_asm_consumer():
-    print("[ASM_CONSUMER] Starting consumer:", QUEUE_NAME)
-    await consume_messages(QUEUE_NAME, handle_message)
+    lanes = lane_weights()
+    print("[ASM_CONSUMER] Starting consumer:", lanes)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    reporter = asyncio.create_task(report_metrics())
+    try:
+        await consume_lanes(lanes, handle_message, stop_event=stop_event)
+    finally:
+        reporter.cancel()
+        await close_http_client()
+        await close_redis()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,200 @@
+"""
+Two-tier Result Cache
+In-process LRU with per-entry expiry in front of Redis (shared by all workers)
+
+get_or_compute(key, compute, ttl_for) checks the LRU, then Redis, and
+only then runs compute(). Concurrent callers for the same key in one
+process share a single compute, so overlapping jobs do the network work
+once. Redis values carry their absolute expiry, so an entry promoted to
+the LRU never outlives the TTL it was stored with (e.g. a DNS TTL).
+
+Redis errors fail open to the local tier; after a failed connect Redis
+is skipped for CACHE_REDIS_RETRY seconds instead of on every lookup.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from config.settings import settings
+from utils.metrics import registry
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCache:
+    def __init__(self, namespace: str, lru_size: int | None = None, use_redis: bool = True):
+        self.namespace = namespace
+        self.lru_size = lru_size or settings.CACHE_LRU_SIZE
+        self.use_redis = use_redis
+
+        # key -> (expires_at wall clock, value)
+        self._local: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._redis_retry_at = 0.0
+
+        self._local_hits = registry.counter(f"cache.{namespace}.local_hits")
+        self._redis_hits = registry.counter(f"cache.{namespace}.redis_hits")
+        self._misses = registry.counter(f"cache.{namespace}.misses")
+        self._coalesced = registry.counter(f"cache.{namespace}.coalesced")
+        self._evictions = registry.counter(f"cache.{namespace}.evictions")
+        self._size = registry.gauge(f"cache.{namespace}.size")
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    # ---------------------------------------------------
+    # Local tier
+    # ---------------------------------------------------
+    def _get_local(self, key: str):
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return entry
+
+    def _put_local(self, key: str, value, expires_at: float):
+        self._local[key] = (expires_at, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.lru_size:
+            self._local.popitem(last=False)
+            self._evictions.inc()
+        self._size.set(len(self._local))
+
+    # ---------------------------------------------------
+    # Redis tier
+    # ---------------------------------------------------
+    async def _redis(self):
+        if not self.use_redis or time.monotonic() < self._redis_retry_at:
+            return None
+        redis = await get_redis()
+        if redis is None:
+            self._redis_retry_at = time.monotonic() + settings.CACHE_REDIS_RETRY
+        return redis
+
+    async def _get_redis(self, key: str):
+        redis = await self._redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(self._redis_key(key))
+        except Exception as e:
+            logger.warning("Cache read failed for %s: %s", key, e)
+            return None
+        if raw is None:
+            return None
+        try:
+            entry = json.loads(raw)
+            return entry["e"], entry["v"]
+        except (ValueError, KeyError, TypeError) as e:
+            # Corrupt or foreign value: drop it and treat it as a miss
+            logger.warning("Discarding unreadable cache entry %s: %s", key, e)
+            try:
+                await redis.delete(self._redis_key(key))
+            except Exception:
+                pass
+            return None
+
+    async def _put_redis(self, key: str, value, ttl: float, expires_at: float):
+        redis = await self._redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(
+                self._redis_key(key),
+                json.dumps({"e": expires_at, "v": value}),
+                ex=max(int(ttl), 1),
+            )
+        except Exception as e:
+            logger.warning("Cache write failed for %s: %s", key, e)
+
+    # ---------------------------------------------------
+    # API
+    # ---------------------------------------------------
+    async def get(self, key: str):
+        """
+        (hit, value); values must be JSON-serializable
+        """
+        entry = self._get_local(key)
+        if entry is not None:
+            self._local_hits.inc()
+            return True, entry[1]
+
+        entry = await self._get_redis(key)
+        if entry is not None and entry[0] > time.time():
+            self._redis_hits.inc()
+            self._put_local(key, entry[1], entry[0])
+            return True, entry[1]
+
+        self._misses.inc()
+        return False, None
+
+    async def set(self, key: str, value, ttl: float):
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self._put_local(key, value, expires_at)
+        await self._put_redis(key, value, ttl, expires_at)
+
+    async def get_or_compute(self, key: str, compute, ttl_for):
+        """
+        Cached value for `key`, or await compute() and store it for
+        ttl_for(value) seconds (0 = do not cache)
+        """
+        hit, value = await self.get(key)
+        if hit:
+            return value
+
+        while (pending := self._inflight.get(key)) is not None:
+            self._coalesced.inc()
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The computing caller was cancelled, not us: take over
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved: there may be no waiters
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(value)
+        await self.set(key, value, ttl_for(value))
+        return value
+
+    def clear(self):
+        self._local.clear()
+        self._size.set(0)
+
+
+# Process-wide caches by namespace
+_caches: dict[str, TieredCache] = {}
+
+
+def get_cache(namespace: str) -> TieredCache | None:
+    """
+    Shared cache for `namespace`, or None when CACHE_ENABLED is off
+    """
+    if not settings.CACHE_ENABLED:
+        return None
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = _caches[namespace] = TieredCache(namespace, use_redis=settings.CACHE_REDIS)
+    return cache
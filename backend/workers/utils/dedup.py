@@ -0,0 +1,117 @@
+"""
+Idempotent Consumer Deduplication
+In-process LRU in front of Redis SET NX markers
+"""
+
+import logging
+from collections import OrderedDict
+
+from config.settings import settings
+from utils.metrics import registry
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PROCESSING = "processing"
+DONE = "done"
+
+
+class DuplicateInProgress(Exception):
+    """
+    Another delivery of the same job is still running. Raised so the
+    consumer sends this copy to the delayed retry queue: if the first
+    holder crashed, its lease expires and the retry gets to run.
+    """
+
+
+class Deduplicator:
+    """
+    claim(key) -> True   first delivery, go ahead
+               -> False  already completed, ack and skip
+               raises DuplicateInProgress while another copy holds the lease
+
+    Call complete(key) on success or release(key) on failure so the retry
+    is not mistaken for a duplicate.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: int | None = None,
+        lease: int | None = None,
+        lru_size: int | None = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl or settings.DEDUP_TTL
+        self.lease = lease or settings.DEDUP_LEASE
+        self.lru_size = lru_size or settings.DEDUP_LRU_SIZE
+
+        self._done: OrderedDict[str, bool] = OrderedDict()
+        self._running: set[str] = set()
+
+        self._local_hits = registry.counter(f"dedup.{namespace}.local_hits")
+        self._redis_hits = registry.counter(f"dedup.{namespace}.redis_hits")
+        self._claims = registry.counter(f"dedup.{namespace}.claims")
+
+    def _redis_key(self, key: str) -> str:
+        return f"dedup:{self.namespace}:{key}"
+
+    def _remember(self, key: str):
+        self._done[key] = True
+        self._done.move_to_end(key)
+        while len(self._done) > self.lru_size:
+            self._done.popitem(last=False)
+
+    async def claim(self, key: str) -> bool:
+        if key in self._done:
+            self._done.move_to_end(key)
+            self._local_hits.inc()
+            return False
+        if key in self._running:
+            raise DuplicateInProgress(key)
+
+        redis = await get_redis()
+        if redis is not None:
+            try:
+                claimed = await redis.set(
+                    self._redis_key(key), PROCESSING, nx=True, ex=self.lease
+                )
+                if not claimed:
+                    state = await redis.get(self._redis_key(key))
+                    if state == DONE:
+                        self._redis_hits.inc()
+                        self._remember(key)
+                        return False
+                    if state == PROCESSING:
+                        raise DuplicateInProgress(key)
+                    # Marker expired between SET and GET: treat as first
+            except DuplicateInProgress:
+                raise
+            except Exception as e:
+                # Fail open: a duplicate run is better than a lost job
+                logger.warning("Dedup check failed for %s: %s", key, e)
+
+        self._running.add(key)
+        self._claims.inc()
+        return True
+
+    async def complete(self, key: str):
+        self._running.discard(key)
+        self._remember(key)
+
+        redis = await get_redis()
+        if redis is not None:
+            try:
+                await redis.set(self._redis_key(key), DONE, ex=self.ttl)
+            except Exception as e:
+                logger.warning("Dedup complete failed for %s: %s", key, e)
+
+    async def release(self, key: str):
+        self._running.discard(key)
+
+        redis = await get_redis()
+        if redis is not None:
+            try:
+                await redis.delete(self._redis_key(key))
+            except Exception as e:
+                logger.warning("Dedup release failed for %s: %s", key, e)
@@ -0,0 +1,148 @@
+"""
+Shared HTTP Client (ASYNC)
+One pooled httpx.AsyncClient per process, reused across messages
+"""
+
+import asyncio
+import logging
+import random
+import time
+from urllib.parse import urlsplit
+
+import httpx
+from config.settings import settings
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Process-wide client (singleton)
+_http_client: httpx.AsyncClient | None = None
+
+# Per-host connection limits
+_host_slots: dict[str, asyncio.Semaphore] = {}
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+# Safe to resend whatever happened to the first attempt
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Failures before the request left this process: safe for any method
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# The server refused the request without processing it
+UNPROCESSED_STATUS_CODES = {429}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# ---------------------------------------------------
+# Get client
+# ---------------------------------------------------
+async def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+
+    if _http_client and not _http_client.is_closed:
+        return _http_client
+
+    http2 = settings.HTTP_ENABLE_HTTP2 and _http2_available()
+
+    _http_client = httpx.AsyncClient(
+        http2=http2,
+        timeout=settings.HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+    logger.info("HTTP client created (http2=%s)", http2)
+    return _http_client
+
+
+def _host_slot(host: str) -> asyncio.Semaphore:
+    slot = _host_slots.get(host)
+    if slot is None:
+        slot = asyncio.Semaphore(settings.HTTP_MAX_PER_HOST)
+        _host_slots[host] = slot
+    return slot
+
+
+def _backoff(attempt: int) -> float:
+    """
+    Full-jitter exponential backoff
+    """
+    ceiling = min(settings.HTTP_BACKOFF_MAX, settings.HTTP_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+# ---------------------------------------------------
+# Request with retry
+# ---------------------------------------------------
+async def request_with_retry(
+    method: str,
+    url: str,
+    retries: int | None = None,
+    idempotent: bool | None = None,
+    **kwargs,
+) -> httpx.Response:
+    """
+    Send a request on the shared client.
+    Idempotent requests (by method, or `idempotent=True`) retry transport
+    errors and 429/502/503/504 with jittered backoff. Others only retry
+    when the request was never sent (connect errors) or refused with 429,
+    so a timed-out POST is not repeated. The last error (or response
+    status) is raised.
+    """
+    retries = settings.HTTP_RETRIES if retries is None else retries
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    retry_statuses = RETRY_STATUS_CODES if idempotent else UNPROCESSED_STATUS_CODES
+    host = urlsplit(url).netloc
+    latency = registry.histogram(f"http.{host}.latency")
+    retried = registry.counter(f"http.{host}.retries")
+    errors = registry.counter(f"http.{host}.errors")
+
+    client = await get_http_client()
+
+    for attempt in range(retries + 1):
+        start = time.perf_counter()
+        try:
+            async with _host_slot(host):
+                response = await client.request(method, url, **kwargs)
+            latency.observe(time.perf_counter() - start)
+
+            if response.status_code in retry_statuses and attempt < retries:
+                logger.warning("%s %s -> %d, retrying", method, url, response.status_code)
+            else:
+                response.raise_for_status()
+                return response
+
+        except httpx.TransportError as e:
+            latency.observe(time.perf_counter() - start)
+            errors.inc()
+            if attempt >= retries or not (idempotent or isinstance(e, UNSENT_ERRORS)):
+                raise
+            logger.warning("%s %s failed (%s), retrying", method, url, e)
+
+        retried.inc()
+        await asyncio.sleep(_backoff(attempt))
+
+
+# ---------------------------------------------------
+# Close client
+# ---------------------------------------------------
+async def close_http_client():
+    global _http_client
+
+    if _http_client and not _http_client.is_closed:
+        await _http_client.aclose()
+
+    _http_client = None
+    _host_slots.clear()
+    logger.info("HTTP client closed")
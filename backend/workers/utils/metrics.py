@@ -0,0 +1,169 @@
+"""
+In-process Metrics (counters, gauges, latency histograms)
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds (last bucket is +Inf)
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+# ---------------------------------------------------
+# Counter
+# ---------------------------------------------------
+class Counter:
+    """
+    Monotonically increasing counter
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def snapshot(self) -> int:
+        return self.value
+
+
+# ---------------------------------------------------
+# Gauge
+# ---------------------------------------------------
+class Gauge:
+    """
+    Point-in-time value that can go up and down
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def snapshot(self):
+        return self.value
+
+
+# ---------------------------------------------------
+# Latency Histogram
+# ---------------------------------------------------
+class LatencyHistogram:
+    """
+    Bucketed latency histogram plus a sliding window of recent
+    samples used for p50/p99 readouts
+    """
+
+    def __init__(self, name: str, window: int = 2048, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples: deque = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self._samples.append(seconds)
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def percentile(self, pct: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> dict:
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.bucket_counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "buckets": buckets,
+        }
+
+
+# ---------------------------------------------------
+# Registry
+# ---------------------------------------------------
+class MetricsRegistry:
+    """
+    Get-or-create registry so modules can share metrics by name
+    """
+
+    def __init__(self):
+        self._metrics: dict = {}
+
+    def _get(self, name: str, kind, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = kind(name, **kwargs)
+            self._metrics[name] = metric
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get(name, Counter)
+
+    def gauge(self, name: str) -> Gauge:
+        return self._get(name, Gauge)
+
+    def histogram(self, name: str, **kwargs) -> LatencyHistogram:
+        return self._get(name, LatencyHistogram, **kwargs)
+
+    def snapshot(self, prefix: str = "") -> dict:
+        return {
+            name: metric.snapshot()
+            for name, metric in sorted(self._metrics.items())
+            if name.startswith(prefix)
+        }
+
+
+registry = MetricsRegistry()
+
+
+# ---------------------------------------------------
+# Periodic reporter (workers have no HTTP endpoint)
+# ---------------------------------------------------
+async def report_metrics(interval: float = 30.0, prefix: str = ""):
+    """
+    Log a registry snapshot every `interval` seconds until cancelled
+    """
+    while True:
+        await asyncio.sleep(interval)
+        logger.info("metrics %s", registry.snapshot(prefix))
@@ -0,0 +1,188 @@
+"""
+Streaming Staged Pipeline (ASYNC)
+
+    seeds -> [stage 1] -> queue -> [stage 2] -> queue -> [stage 3]
+                  \                    \                    \
+                   +--------------------+--------------------+--> results
+
+Every stage runs `concurrency` workers reading from a bounded input
+queue; a full queue blocks the upstream stage (backpressure). Each item
+a stage produces is both passed downstream and emitted to the caller,
+so partial results are visible while later stages are still running.
+Seeds enter the first stage, or the stage `entry(seed)` names, so one
+pipeline can take inputs that skip early stages. A handler that raises
+Defer has its item set aside and retried later, while the worker moves
+on to other items.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+# Longest a worker with deferred items waits on its queue between checks
+_DEFER_POLL = 0.1
+
+
+class Defer(Exception):
+    """
+    Raised by a handler (before it yields) to retry the item after `delay`
+    """
+
+    def __init__(self, delay: float):
+        super().__init__(delay)
+        self.delay = delay
+
+
+class Stage:
+    """
+    handler signature:
+        async def handler(item):   # async generator
+            yield output
+    """
+
+    def __init__(self, name: str, handler, concurrency: int = 1, queue_size: int = 100):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size
+
+
+class Pipeline:
+    def __init__(self, name: str, stages: list[Stage], emit_queue_size: int = 1000):
+        self.name = name
+        self.stages = stages
+        self.emit_queue_size = emit_queue_size
+
+    def _metrics(self, stage: Stage) -> dict:
+        prefix = f"pipeline.{self.name}.{stage.name}"
+        return {
+            "processed": registry.counter(f"{prefix}.processed"),
+            "produced": registry.counter(f"{prefix}.produced"),
+            "errors": registry.counter(f"{prefix}.errors"),
+            "deferred": registry.counter(f"{prefix}.deferred"),
+            "queued": registry.gauge(f"{prefix}.queued"),
+            "busy": registry.gauge(f"{prefix}.busy"),
+            "latency": registry.histogram(f"{prefix}.latency"),
+        }
+
+    async def run(self, seeds, entry=None):
+        """
+        Async generator yielding (stage_name, item) for every item any
+        stage produces, in production order. `entry(seed)` returns the
+        name of the stage a seed starts at (default: the first).
+        """
+        queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        emitted: asyncio.Queue = asyncio.Queue(maxsize=self.emit_queue_size)
+        metrics = [self._metrics(stage) for stage in self.stages]
+        remaining = [stage.concurrency for stage in self.stages]
+
+        async def put(index: int, item):
+            await queues[index].put(item)
+            metrics[index]["queued"].set(queues[index].qsize())
+
+        async def close(index: int):
+            if index == len(self.stages):
+                await emitted.put(_END)
+                return
+            for _ in range(self.stages[index].concurrency):
+                await queues[index].put(_END)
+
+        index_of = {stage.name: index for index, stage in enumerate(self.stages)}
+
+        async def feed():
+            # A later stage is only closed after stage 0 drains, which
+            # happens after every seed has been put
+            for seed in seeds:
+                await put(index_of[entry(seed)] if entry else 0, seed)
+            await close(0)
+
+        # Per stage: heap of (retry_at, n, item) set aside by Defer
+        deferred = [[] for _ in self.stages]
+        order = itertools.count()
+        loop = asyncio.get_running_loop()
+
+        async def next_item(index: int, fed: bool):
+            """
+            (item or _END, fed); fed once this worker has taken its end
+            marker. A fed worker drains what is still deferred before
+            leaving, so every deferred item is retried by a live worker.
+            """
+            queue, waiting = queues[index], deferred[index]
+            while True:
+                if waiting and (fed or waiting[0][0] <= loop.time()):
+                    retry_at, _, item = heapq.heappop(waiting)
+                    if retry_at > loop.time():
+                        await asyncio.sleep(retry_at - loop.time())
+                    return item, fed
+                if fed:
+                    return _END, fed
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    if waiting:
+                        await asyncio.sleep(min(waiting[0][0] - loop.time(), _DEFER_POLL))
+                        continue
+                    item = await queue.get()
+                metrics[index]["queued"].set(queue.qsize())
+                if item is _END:
+                    fed = True
+                    continue
+                return item, fed
+
+        async def work(index: int):
+            stage = self.stages[index]
+            stage_metrics = metrics[index]
+            is_last = index == len(self.stages) - 1
+            fed = False
+
+            while True:
+                item, fed = await next_item(index, fed)
+                if item is _END:
+                    break
+
+                stage_metrics["busy"].inc()
+                start = time.perf_counter()
+                try:
+                    async for output in stage.handler(item):
+                        stage_metrics["produced"].inc()
+                        await emitted.put((stage.name, output))
+                        if not is_last:
+                            await put(index + 1, output)
+                except Defer as defer:
+                    stage_metrics["deferred"].inc()
+                    heapq.heappush(deferred[index], (loop.time() + defer.delay, next(order), item))
+                    continue
+                except Exception:
+                    stage_metrics["errors"].inc()
+                    logger.exception("Pipeline %s stage %s failed", self.name, stage.name)
+                finally:
+                    stage_metrics["busy"].dec()
+                    stage_metrics["latency"].observe(time.perf_counter() - start)
+                stage_metrics["processed"].inc()
+
+            # Last worker out closes the next stage
+            remaining[index] -= 1
+            if remaining[index] == 0:
+                await close(index + 1)
+
+        tasks = [asyncio.create_task(feed())]
+        for index, stage in enumerate(self.stages):
+            tasks += [asyncio.create_task(work(index)) for _ in range(stage.concurrency)]
+
+        try:
+            while True:
+                item = await emitted.get()
+                if item is _END:
+                    break
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,325 @@
+"""
+Per-target Politeness
+Redis-backed distributed semaphore capping how many worker processes
+probe one target (host or /24, POLITENESS_GROUP) at the same time
+
+Each target group is a sorted set of holder tokens scored by lease
+expiry; acquire drops expired leases and adds this process if fewer
+than POLITENESS_MAX_HOLDERS remain. A process holds one lease per group
+however many of its coroutines use it (refcounted locally); leases in
+use are renewed in the background, idle ones are released after
+POLITENESS_LINGER. A crashed worker's leases expire after POLITENESS_LEASE.
+
+A denied group is remembered for POLITENESS_RETRY_DELAY: try_acquire()
+fails locally until then instead of asking Redis again for every pair.
+try_acquire() never waits, so callers can move on to another target;
+acquire() / hold() wait with backoff, up to POLITENESS_WAIT_TIMEOUT for
+hold(). Without Redis the limit is not enforced.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from config.settings import settings
+from utils.metrics import registry
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] group key; ARGV token, limit, lease ms. Returns 1 if held.
+_ACQUIRE = """
+local now = redis.call('TIME')
+local now_ms = now[1] * 1000 + math.floor(now[2] / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now_ms)
+if not redis.call('ZSCORE', KEYS[1], ARGV[1])
+   and redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now_ms + tonumber(ARGV[3]), ARGV[1])
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[3]))
+return 1
+"""
+
+# Extend only if still held (XX); returns 0 when the lease was lost
+_RENEW = """
+local now = redis.call('TIME')
+local now_ms = now[1] * 1000 + math.floor(now[2] / 1000)
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', now_ms + tonumber(ARGV[2]), ARGV[1])
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[2]))
+return 1
+"""
+
+_granted = registry.counter("politeness.granted")
+_denied = registry.counter("politeness.denied")
+_lost = registry.counter("politeness.leases_lost")
+_held_gauge = registry.gauge("politeness.leases_held")
+
+# Expired denials are pruned once this many groups are remembered
+_DENIED_PRUNE = 1024
+
+
+def target_group(host: str, group: str | None = None) -> str:
+    """
+    Semaphore key for a host: the host itself, or its /24 (/64 for IPv6)
+    when POLITENESS_GROUP is "/24". Names are always grouped by name.
+    """
+    group = group or settings.POLITENESS_GROUP
+    if group != "/24":
+        return host
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return host.lower()
+    prefix = 24 if address.version == 4 else 64
+    return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+
+class _Lease:
+    __slots__ = ("refs", "idle_since", "renew_at")
+
+    def __init__(self, renew_at: float):
+        self.refs = 0
+        self.idle_since = None
+        self.renew_at = renew_at
+
+
+class TargetSlots:
+    def __init__(
+        self,
+        namespace: str = "probe",
+        limit: int | None = None,
+        lease: float | None = None,
+        linger: float | None = None,
+        group: str | None = None,
+    ):
+        self.namespace = namespace
+        self.limit = limit or settings.POLITENESS_MAX_HOLDERS
+        self.lease = lease or settings.POLITENESS_LEASE
+        self.linger = linger or settings.POLITENESS_LINGER
+        self.group = group or settings.POLITENESS_GROUP
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._leases: dict[str, _Lease] = {}
+        self._pending: dict[str, asyncio.Future] = {}
+        # group -> monotonic time until which it is assumed full
+        self._denied_until: dict[str, float] = {}
+        self._maintainer: asyncio.Task | None = None
+        self._redis_retry_at = 0.0
+
+    def _key(self, group: str) -> str:
+        return f"sem:{self.namespace}:{group}"
+
+    async def _redis(self):
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        redis = await get_redis()
+        if redis is None:
+            self._redis_retry_at = time.monotonic() + settings.CACHE_REDIS_RETRY
+        return redis
+
+    async def _acquire_remote(self, group: str) -> bool:
+        redis = await self._redis()
+        if redis is None:
+            return True
+        try:
+            return bool(await redis.eval(
+                _ACQUIRE, 1, self._key(group), self.token, self.limit, int(self.lease * 1000)
+            ))
+        except Exception as e:
+            # Fail open: scanning without the cap beats not scanning
+            logger.warning("Politeness acquire failed for %s: %s", group, e)
+            return True
+
+    def _deny(self, group: str):
+        now = time.monotonic()
+        if len(self._denied_until) >= _DENIED_PRUNE:
+            self._denied_until = {g: t for g, t in self._denied_until.items() if t > now}
+        self._denied_until[group] = now + settings.POLITENESS_RETRY_DELAY
+
+    # ---------------------------------------------------
+    # Acquire / release
+    # ---------------------------------------------------
+    async def try_acquire(self, host: str) -> bool:
+        """
+        Take a slot for `host`'s group without waiting; False when the
+        group is at its limit (or was, less than POLITENESS_RETRY_DELAY
+        ago). Pair every True with release(host).
+        """
+        group = target_group(host, self.group)
+        lease = self._leases.get(group)
+
+        if lease is None:
+            if self._denied_until.get(group, 0) > time.monotonic():
+                _denied.inc()
+                return False
+
+            # One Redis round trip per group even with many coroutines asking
+            granted = None
+            while granted is None and (pending := self._pending.get(group)) is not None:
+                try:
+                    granted = await asyncio.shield(pending)
+                except asyncio.CancelledError:
+                    if not pending.cancelled():
+                        raise
+                    # The asking coroutine was cancelled, not us: ask again
+
+            if granted is None:
+                pending = self._pending[group] = asyncio.get_running_loop().create_future()
+                try:
+                    granted = await self._acquire_remote(group)
+                except asyncio.CancelledError:
+                    pending.cancel()
+                    raise
+                finally:
+                    self._pending.pop(group, None)
+                pending.set_result(granted)
+
+            if not granted:
+                self._deny(group)
+                _denied.inc()
+                return False
+            self._denied_until.pop(group, None)
+            lease = self._leases.get(group)
+            if lease is None:
+                lease = self._leases[group] = _Lease(time.monotonic() + self.lease / 2)
+                _held_gauge.set(len(self._leases))
+                self._ensure_maintainer()
+
+        lease.refs += 1
+        lease.idle_since = None
+        _granted.inc()
+        return True
+
+    def release(self, host: str):
+        lease = self._leases.get(target_group(host, self.group))
+        if lease is None:
+            return
+        lease.refs -= 1
+        if lease.refs <= 0:
+            lease.refs = 0
+            lease.idle_since = time.monotonic()
+
+    async def acquire(self, host: str, timeout: float | None = None) -> bool:
+        """
+        Wait (jittered backoff) until a slot is free or `timeout` passes
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = settings.POLITENESS_RETRY_DELAY
+        while not await self.try_acquire(host):
+            if deadline is not None and time.monotonic() + delay > deadline:
+                return False
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, self.lease / 2)
+        return True
+
+    @asynccontextmanager
+    async def hold(self, host: str, timeout: float | None = None):
+        """
+        Hold a slot for the block; TimeoutError if none frees up within
+        `timeout` (default POLITENESS_WAIT_TIMEOUT)
+        """
+        timeout = settings.POLITENESS_WAIT_TIMEOUT if timeout is None else timeout
+        if not await self.acquire(host, timeout=timeout):
+            raise TimeoutError(f"no politeness slot for {host} within {timeout:.0f}s")
+        try:
+            yield
+        finally:
+            self.release(host)
+
+    # ---------------------------------------------------
+    # Renewal / idle release
+    # ---------------------------------------------------
+    def _ensure_maintainer(self):
+        if self._maintainer is None or self._maintainer.done():
+            self._maintainer = asyncio.create_task(self._maintain())
+
+    async def _maintain(self):
+        while self._leases:
+            await asyncio.sleep(min(self.linger, self.lease / 3))
+            try:
+                await self._tick()
+            except Exception:
+                logger.exception("Politeness lease maintenance failed")
+
+    async def _tick(self):
+        now = time.monotonic()
+        idle = [g for g, l in self._leases.items() if l.idle_since is not None and now - l.idle_since >= self.linger]
+        due = [g for g, l in self._leases.items() if g not in idle and l.renew_at <= now]
+
+        for group in idle:
+            del self._leases[group]
+        _held_gauge.set(len(self._leases))
+
+        redis = await self._redis()
+        if redis is None or not (idle or due):
+            return
+
+        for group in idle:
+            await redis.zrem(self._key(group), self.token)
+        for group in due:
+            renewed = await redis.eval(_RENEW, 1, self._key(group), self.token, int(self.lease * 1000))
+            lease = self._leases.get(group)
+            if lease is None:
+                continue
+            if renewed:
+                lease.renew_at = now + self.lease / 2
+            else:
+                # Expired and possibly taken; in-flight probes finish, new ones re-acquire
+                _lost.inc()
+                del self._leases[group]
+        _held_gauge.set(len(self._leases))
+
+    async def close(self):
+        if self._maintainer is not None:
+            self._maintainer.cancel()
+            try:
+                await self._maintainer
+            except asyncio.CancelledError:
+                pass
+            self._maintainer = None
+
+        redis = await self._redis()
+        if redis is not None:
+            for group in list(self._leases):
+                try:
+                    await redis.zrem(self._key(group), self.token)
+                except Exception:
+                    break
+        self._leases.clear()
+        self._denied_until.clear()
+        _held_gauge.set(0)
+
+
+# Process-wide slots (singleton)
+_slots: TargetSlots | None = None
+
+
+def get_target_slots() -> TargetSlots | None:
+    """
+    Shared TargetSlots, or None when POLITENESS_ENABLED is off
+    """
+    global _slots
+
+    if not settings.POLITENESS_ENABLED:
+        return None
+    if _slots is None:
+        _slots = TargetSlots()
+    return _slots
+
+
+async def close_target_slots():
+    global _slots
+
+    if _slots is not None:
+        await _slots.close()
+    _slots = None
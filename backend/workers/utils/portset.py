@@ -0,0 +1,228 @@
+"""
+Per-host Port Bitsets
+65536-bit (8 KiB) bitmap per host instead of lists of port dicts
+
+Port p is bit (p & 7) of byte (p >> 3). Set algebra goes through Python
+ints (one C-level op over the whole bitmap); with NumPy installed,
+"which hosts expose port X" and run diffs are computed on a
+hosts x 8192 byte matrix.
+
+Serialized form (JSON-safe base64 string per host):
+    "L" + varint deltas of the sorted ports      (few open ports)
+    "B" + zlib(bitmap)                           (dense hosts)
+whichever is smaller.
+"""
+
+import base64
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # optional
+    np = None
+
+PORT_SPACE = 65536
+BITMAP_BYTES = PORT_SPACE // 8
+
+def _ports_of(value: int) -> list[int]:
+    # Ints are normalized, so peeling the top bit only touches the
+    # populated part of the bitmap
+    ports = []
+    while value:
+        top = value.bit_length() - 1
+        ports.append(top)
+        value ^= 1 << top
+    ports.reverse()
+    return ports
+
+
+def _varints(values) -> bytes:
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def _read_varints(data: bytes):
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        yield value
+        value = shift = 0
+
+
+# ---------------------------------------------------
+# One host
+# ---------------------------------------------------
+class PortSet:
+    __slots__ = ("bits",)
+
+    def __init__(self, ports=(), bits: bytearray | None = None):
+        self.bits = bits if bits is not None else bytearray(BITMAP_BYTES)
+        for port in ports:
+            self.add(port)
+
+    def add(self, port: int):
+        self.bits[port >> 3] |= 1 << (port & 7)
+
+    def discard(self, port: int):
+        self.bits[port >> 3] &= ~(1 << (port & 7)) & 0xFF
+
+    def __contains__(self, port: int) -> bool:
+        return bool(self.bits[port >> 3] & (1 << (port & 7)))
+
+    def __iter__(self):
+        return iter(_ports_of(self.to_int()))
+
+    def __len__(self) -> int:
+        return self.to_int().bit_count()
+
+    def __bool__(self) -> bool:
+        return any(self.bits)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PortSet) and self.bits == other.bits
+
+    def to_int(self) -> int:
+        return int.from_bytes(self.bits, "little")
+
+    @classmethod
+    def from_int(cls, value: int) -> "PortSet":
+        return cls(bits=bytearray(value.to_bytes(BITMAP_BYTES, "little")))
+
+    def __or__(self, other: "PortSet") -> "PortSet":
+        return PortSet.from_int(self.to_int() | other.to_int())
+
+    def __and__(self, other: "PortSet") -> "PortSet":
+        return PortSet.from_int(self.to_int() & other.to_int())
+
+    def __sub__(self, other: "PortSet") -> "PortSet":
+        return PortSet.from_int(self.to_int() & ~other.to_int())
+
+    def serialize(self) -> str:
+        ports = list(self)
+        deltas = _varints(b - a for a, b in zip([0] + ports, ports))
+        as_list = b"L" + deltas
+        if len(as_list) > 64:
+            as_bitmap = b"B" + zlib.compress(bytes(self.bits))
+            if len(as_bitmap) < len(as_list):
+                return base64.b64encode(as_bitmap).decode()
+        return base64.b64encode(as_list).decode()
+
+    @classmethod
+    def deserialize(cls, data: str) -> "PortSet":
+        raw = base64.b64decode(data)
+        if raw[:1] == b"B":
+            return cls(bits=bytearray(zlib.decompress(raw[1:])))
+        port_set = cls()
+        port = 0
+        for delta in _read_varints(raw[1:]):
+            port += delta
+            port_set.add(port)
+        return port_set
+
+
+# ---------------------------------------------------
+# Many hosts (one run)
+# ---------------------------------------------------
+class HostPortMap:
+    def __init__(self, hosts: dict[str, PortSet] | None = None):
+        self.hosts: dict[str, PortSet] = hosts or {}
+        self._matrix = None
+
+    def add(self, host: str, port: int):
+        port_set = self.hosts.get(host)
+        if port_set is None:
+            port_set = self.hosts[host] = PortSet()
+        port_set.add(port)
+        self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self.hosts)
+
+    def ports(self, host: str) -> list[int]:
+        port_set = self.hosts.get(host)
+        return list(port_set) if port_set else []
+
+    def pairs(self) -> int:
+        return sum(len(port_set) for port_set in self.hosts.values())
+
+    def update(self, other: "HostPortMap"):
+        """
+        In-place union (merging shards / jobs of one run)
+        """
+        for host, port_set in other.hosts.items():
+            mine = self.hosts.get(host)
+            self.hosts[host] = port_set if mine is None else mine | port_set
+        self._matrix = None
+
+    def _host_matrix(self):
+        if self._matrix is None:
+            names = list(self.hosts)
+            matrix = np.frombuffer(
+                b"".join(bytes(self.hosts[h].bits) for h in names), dtype=np.uint8
+            ).reshape(len(names), BITMAP_BYTES)
+            self._matrix = (names, matrix)
+        return self._matrix
+
+    def hosts_with_port(self, port: int) -> list[str]:
+        if not self.hosts:
+            return []
+        if np is None:
+            return [host for host, port_set in self.hosts.items() if port in port_set]
+        names, matrix = self._host_matrix()
+        rows = np.nonzero(matrix[:, port >> 3] & (1 << (port & 7)))[0]
+        return [names[row] for row in rows]
+
+    def diff(self, previous: "HostPortMap") -> dict:
+        """
+        Ports opened / closed since `previous`: {"opened": {host: [ports]}, "closed": {...}}
+        """
+        if np is not None and self.hosts and previous.hosts:
+            return self._diff_numpy(previous)
+
+        opened, closed = {}, {}
+        for host in self.hosts.keys() | previous.hosts.keys():
+            mine, theirs = self.hosts.get(host), previous.hosts.get(host)
+            if mine is not None and theirs is not None and mine.bits == theirs.bits:
+                continue
+            now = mine.to_int() if mine is not None else 0
+            before = theirs.to_int() if theirs is not None else 0
+            if now & ~before:
+                opened[host] = _ports_of(now & ~before)
+            if before & ~now:
+                closed[host] = _ports_of(before & ~now)
+        return {"opened": opened, "closed": closed}
+
+    def _diff_numpy(self, previous: "HostPortMap") -> dict:
+        names = sorted(self.hosts.keys() | previous.hosts.keys())
+        empty = bytes(BITMAP_BYTES)
+
+        def aligned(port_map):
+            return np.frombuffer(
+                b"".join(bytes(port_map.hosts[h].bits) if h in port_map.hosts else empty for h in names),
+                dtype=np.uint8,
+            ).reshape(len(names), BITMAP_BYTES)
+
+        now, before = aligned(self), aligned(previous)
+        result = {}
+        for label, delta in (("opened", now & ~before), ("closed", before & ~now)):
+            changed = {}
+            for row in np.nonzero(delta.any(axis=1))[0]:
+                ports = np.nonzero(np.unpackbits(delta[row], bitorder="little"))[0]
+                changed[names[row]] = ports.tolist()
+            result[label] = changed
+        return result
+
+    def serialize(self) -> dict[str, str]:
+        return {host: port_set.serialize() for host, port_set in self.hosts.items() if port_set}
+
+    @classmethod
+    def deserialize(cls, data: dict[str, str] | None) -> "HostPortMap":
+        return cls({host: PortSet.deserialize(encoded) for host, encoded in (data or {}).items()})
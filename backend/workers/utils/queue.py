@@ -2,16 +2,27 @@
 RabbitMQ / Message Queue Connection (ASYNC)
 """
 
-import json
+import asyncio
 import logging
+import time
+from collections import deque
 import aio_pika
 from config.settings import settings
+from utils.metrics import registry
+from utils.codec import encode_payload, decode_payload, CodecError
 
 logger = logging.getLogger(__name__)
 
 # Async connection (singleton)
 _queue_connection: aio_pika.RobustConnection | None = None
 
+# Publisher state (per process)
+_channel_pool: "ChannelPool | None" = None
+_declared_queues: set[str] = set()
+
+_publish_latency = registry.histogram("queue.publish_latency")
+_publish_failures = registry.counter("queue.publish_failures")
+
 
 async def get_queue_connection() -> aio_pika.RobustConnection | None:
     global _queue_connection
@@ -35,23 +46,119 @@ async def get_queue_connection() -> aio_pika.RobustConnection | None:
 
 
 # ---------------------------------------------------
-# Publish message
+# Channel pool
 # ---------------------------------------------------
-async def publish_message(queue_name: str, message: dict) -> bool:
-    try:
+class ChannelPool:
+    """
+    Bounded pool of publisher channels.
+    Channels are reused across publishes instead of opened per message;
+    closed channels are dropped and replaced lazily.
+    """
+
+    def __init__(self, max_size: int, publisher_confirms: bool = True):
+        self.max_size = max_size
+        self.publisher_confirms = publisher_confirms
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_size)
+        self._channels: set = set()
+
+    async def _open_channel(self):
         connection = await get_queue_connection()
         if not connection:
-            return False
+            raise ConnectionError("Queue not available")
+        channel = await connection.channel(
+            publisher_confirms=self.publisher_confirms
+        )
+        self._channels.add(channel)
+        return channel
+
+    async def acquire(self):
+        await self._slots.acquire()
+        try:
+            while not self._idle.empty():
+                channel = self._idle.get_nowait()
+                if not channel.is_closed:
+                    return channel
+                self._channels.discard(channel)
+            return await self._open_channel()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, channel, discard: bool = False):
+        if discard or channel.is_closed:
+            self._channels.discard(channel)
+            if not channel.is_closed:
+                asyncio.ensure_future(channel.close())
+        else:
+            self._idle.put_nowait(channel)
+        self._slots.release()
+
+    async def close(self):
+        for channel in list(self._channels):
+            if not channel.is_closed:
+                await channel.close()
+        self._channels.clear()
+        self._idle = asyncio.Queue()
+
+    def stats(self) -> dict:
+        return {
+            "max_size": self.max_size,
+            "open": len(self._channels),
+            "idle": self._idle.qsize(),
+        }
+
+
+def get_channel_pool() -> ChannelPool:
+    global _channel_pool
+
+    if _channel_pool is None:
+        _channel_pool = ChannelPool(
+            max_size=settings.QUEUE_CHANNEL_POOL_SIZE,
+            publisher_confirms=settings.QUEUE_PUBLISHER_CONFIRMS,
+        )
+    return _channel_pool
+
+
+async def ensure_queue(channel, queue_name: str, arguments: dict | None = None):
+    """
+    Declare a queue once per process; later publishes skip the round trip
+    """
+    if queue_name in _declared_queues:
+        return
+    await channel.declare_queue(queue_name, durable=True, arguments=arguments)
+    _declared_queues.add(queue_name)
+
+
+PUBLISHED_AT_HEADER = "x-published-at"
 
-        channel = await connection.channel()
 
-        await channel.declare_queue(queue_name, durable=True)
+def _build_message(message: dict) -> aio_pika.Message:
+    body, content_type, headers = encode_payload(message)
+    headers[PUBLISHED_AT_HEADER] = time.time()
+    return aio_pika.Message(
+        body=body,
+        content_type=content_type,
+        headers=headers,
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+    )
+
+
+# ---------------------------------------------------
+# Publish message
+# ---------------------------------------------------
+async def publish_message(queue_name: str, message: dict) -> bool:
+    pool = get_channel_pool()
+    channel = None
+    failed = False
+    start = time.perf_counter()
+
+    try:
+        channel = await pool.acquire()
+        await ensure_queue(channel, queue_name)
 
         await channel.default_exchange.publish(
-            aio_pika.Message(
-                body=json.dumps(message).encode(),
-                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-            ),
+            _build_message(message),
             routing_key=queue_name,
         )
 
@@ -59,46 +166,323 @@ async def publish_message(queue_name: str, message: dict) -> bool:
         return True
 
     except Exception:
+        failed = True
+        _publish_failures.inc()
         logger.exception("Failed to publish message")
         return False
 
+    finally:
+        if channel is not None:
+            pool.release(channel, discard=failed)
+        _publish_latency.observe(time.perf_counter() - start)
+
+
+# ---------------------------------------------------
+# Publish many messages (batched confirms)
+# ---------------------------------------------------
+async def publish_messages(queue_name: str, messages: list[dict]) -> list[bool]:
+    """
+    Publish a batch on one channel. Publishes are pipelined and broker
+    confirms are awaited together per QUEUE_CONFIRM_BATCH_SIZE chunk,
+    instead of one confirm round trip per message.
+
+    Returns one success flag per input message.
+    """
+    if not messages:
+        return []
+
+    pool = get_channel_pool()
+    channel = None
+    results = [False] * len(messages)
+    failed = False
+
+    try:
+        channel = await pool.acquire()
+        await ensure_queue(channel, queue_name)
+
+        batch_size = max(1, settings.QUEUE_CONFIRM_BATCH_SIZE)
+        for offset in range(0, len(messages), batch_size):
+            chunk = messages[offset:offset + batch_size]
+            start = time.perf_counter()
+
+            confirms = await asyncio.gather(
+                *(
+                    channel.default_exchange.publish(
+                        _build_message(message),
+                        routing_key=queue_name,
+                    )
+                    for message in chunk
+                ),
+                return_exceptions=True,
+            )
+
+            elapsed = time.perf_counter() - start
+            for index, confirm in enumerate(confirms):
+                ok = not isinstance(confirm, BaseException)
+                results[offset + index] = ok
+                _publish_latency.observe(elapsed / len(chunk))
+                if not ok:
+                    failed = True
+                    _publish_failures.inc()
+
+        logger.info(
+            "Published %d/%d messages to %s",
+            sum(results), len(messages), queue_name,
+        )
+
+    except Exception:
+        failed = True
+        _publish_failures.inc()
+        logger.exception("Failed to publish message batch")
+
+    finally:
+        if channel is not None:
+            pool.release(channel, discard=failed)
+
+    return results
+
+
+def get_publish_stats() -> dict:
+    return {
+        "latency": _publish_latency.snapshot(),
+        "failures": _publish_failures.snapshot(),
+        "channels": get_channel_pool().stats(),
+        "declared_queues": sorted(_declared_queues),
+    }
+
 
 # ---------------------------------------------------
 # Consume messages (ACK/NACK handled HERE)
 # ---------------------------------------------------
-async def consume_messages(queue_name: str, callback):
+async def consume_messages(
+    queue_name: str,
+    callback,
+    prefetch_count: int | None = None,
+    concurrency: int | None = None,
+    stop_event: asyncio.Event | None = None,
+):
     """
     callback signature:
         async def callback(payload: dict)
+
+    Single-queue form of consume_lanes().
     """
+    await consume_lanes(
+        {queue_name: 1},
+        callback,
+        prefetch_count=prefetch_count,
+        concurrency=concurrency,
+        stop_event=stop_event,
+    )
+
+
+def _pick_lane(lanes: dict[str, int], pending: dict, credit: dict) -> str | None:
+    """
+    Smooth weighted round-robin over lanes that have pending messages
+    """
+    eligible = [lane for lane in lanes if pending[lane]]
+    if not eligible:
+        return None
+
+    total = 0
+    for lane in eligible:
+        credit[lane] += lanes[lane]
+        total += lanes[lane]
+
+    chosen = max(eligible, key=lambda lane: credit[lane])
+    credit[chosen] -= total
+    return chosen
+
+
+def _queue_wait(message) -> float | None:
+    published_at = (message.headers or {}).get(PUBLISHED_AT_HEADER)
+    try:
+        return max(0.0, time.time() - float(published_at))
+    except (TypeError, ValueError):
+        return None
+
+
+async def consume_lanes(
+    lanes: dict[str, int],
+    callback,
+    prefetch_count: int | None = None,
+    concurrency: int | None = None,
+    stop_event: asyncio.Event | None = None,
+):
+    """
+    Consume several queues ("lanes") that share one pool of handler slots.
+
+    lanes maps queue name -> weight. When more than one lane has messages
+    waiting, free slots are handed out by smooth weighted round-robin, so
+    a lane with weight 6 gets ~6x the slots of a lane with weight 1 under
+    load, while an idle lane's share is used by the others.
+
+    Up to `concurrency` callbacks run at once (asyncio semaphore), with
+    `prefetch_count` unacked deliveries buffered per lane. Every message
+    is acked on its own once its callback finishes; failures are moved to
+    a delayed retry queue (or the dead-letter queue) first, see
+    utils/retry.py.
+
+    When `stop_event` is set the consumers are cancelled, deliveries
+    still waiting for a slot are requeued and in-flight handlers are
+    drained.
+    """
+    # utils.retry publishes through this module's channel pool
+    from utils.retry import declare_retry_topology, route_failed_message
+
+    concurrency = concurrency or settings.QUEUE_CONSUMER_CONCURRENCY
+    prefetch_count = max(prefetch_count or settings.QUEUE_PREFETCH_COUNT, concurrency)
+    stop_event = stop_event or asyncio.Event()
+
     connection = await get_queue_connection()
     if not connection:
         logger.warning("Queue not available")
         return
 
     channel = await connection.channel()
-    await channel.set_qos(prefetch_count=1)
+    # Per-consumer limit: every lane gets its own prefetch window
+    await channel.set_qos(prefetch_count=prefetch_count)
+
+    slots = asyncio.Semaphore(concurrency)
+    ready = asyncio.Event()
+    tasks: set[asyncio.Task] = set()
+    pending = {lane: deque() for lane in lanes}
+    credit = {lane: 0 for lane in lanes}
+
+    metrics = {
+        lane: {
+            "in_flight": registry.gauge(f"consumer.{lane}.in_flight"),
+            "queued": registry.gauge(f"consumer.{lane}.queued"),
+            "processed": registry.counter(f"consumer.{lane}.processed"),
+            "failed": registry.counter(f"consumer.{lane}.failed"),
+            "handle_latency": registry.histogram(f"consumer.{lane}.handle_latency"),
+            "queue_wait": registry.histogram(f"consumer.{lane}.queue_wait"),
+        }
+        for lane in lanes
+    }
+
+    async def _route_failure(lane: str, message, error: Exception, retryable: bool = True):
+        try:
+            await route_failed_message(lane, message, error, retryable=retryable)
+            await message.ack()
+        except Exception:
+            # Retry topology unavailable: fall back to broker requeue
+            logger.exception("Failed to route message to retry queue")
+            await message.nack(requeue=True)
+
+    async def handle(lane: str, message):
+        lane_metrics = metrics[lane]
+        lane_metrics["in_flight"].inc()
+        start = time.perf_counter()
+
+        try:
+            wait = _queue_wait(message)
+            if wait is not None:
+                lane_metrics["queue_wait"].observe(wait)
+
+            try:
+                payload = decode_payload(message.body, message.content_type, message.headers or {})
+            except CodecError as e:
+                # Poison payload: never retry, park it
+                lane_metrics["failed"].inc()
+                logger.error("Undecodable message on %s: %s", lane, e)
+                await _route_failure(lane, message, e, retryable=False)
+                return
 
-    queue = await channel.declare_queue(queue_name, durable=True)
+            try:
+                await callback(payload)
+            except Exception as e:
+                lane_metrics["failed"].inc()
+                logger.exception("Message processing failed")
+                await _route_failure(lane, message, e)
+                return
 
-    logger.info("Consuming messages from %s", queue_name)
+            await message.ack()
+            lane_metrics["processed"].inc()
 
-    async with queue.iterator() as queue_iter:
-        async for message in queue_iter:
-            async with message.process(requeue=True):
-                try:
-                    payload = json.loads(message.body)
-                    await callback(payload)   
-                except Exception:
-                    logger.exception("Message processing failed")
-                    raise   # message.process() will auto-NACK
+        except Exception:
+            logger.exception("Failed to settle message on %s", lane)
+
+        finally:
+            lane_metrics["in_flight"].dec()
+            lane_metrics["handle_latency"].observe(time.perf_counter() - start)
+            slots.release()
+
+    def on_message_for(lane: str):
+        async def on_message(message):
+            pending[lane].append(message)
+            metrics[lane]["queued"].inc()
+            ready.set()
+        return on_message
+
+    consumers = []
+    for lane in lanes:
+        queue = await channel.declare_queue(lane, durable=True)
+        await declare_retry_topology(channel, lane)
+        consumers.append((queue, await queue.consume(on_message_for(lane))))
+
+    stop_waiter = asyncio.create_task(stop_event.wait())
+    stop_waiter.add_done_callback(lambda _: ready.set())
+
+    logger.info(
+        "Consuming messages from %s (prefetch=%d, concurrency=%d)",
+        ", ".join(f"{lane}:{weight}" for lane, weight in lanes.items()),
+        prefetch_count, concurrency,
+    )
+
+    try:
+        while not stop_event.is_set():
+            await slots.acquire()
+
+            lane = _pick_lane(lanes, pending, credit)
+            while lane is None and not stop_event.is_set():
+                ready.clear()
+                await ready.wait()
+                lane = _pick_lane(lanes, pending, credit)
+
+            if lane is None:
+                slots.release()
+                break
+
+            message = pending[lane].popleft()
+            metrics[lane]["queued"].dec()
+
+            task = asyncio.create_task(handle(lane, message))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    finally:
+        stop_event.set()
+        stop_waiter.cancel()
+        logger.info("Stopping consumers, draining %d handlers", len(tasks))
+
+        for queue, consumer_tag in consumers:
+            await queue.cancel(consumer_tag)
+
+        # Not started yet: hand them back to another consumer
+        for lane, messages in pending.items():
+            for message in messages:
+                await message.nack(requeue=True)
+            metrics[lane]["queued"].set(0)
+            messages.clear()
+
+        if tasks:
+            await asyncio.wait(set(tasks), timeout=settings.QUEUE_DRAIN_TIMEOUT)
+        await channel.close()
+
+        logger.info("Consumers stopped")
 
 
 # ---------------------------------------------------
 # Close connection
 # ---------------------------------------------------
 async def close_queue():
-    global _queue_connection
+    global _queue_connection, _channel_pool
+
+    if _channel_pool is not None:
+        await _channel_pool.close()
+        _channel_pool = None
+    _declared_queues.clear()
 
     if _queue_connection and not _queue_connection.is_closed:
         await _queue_connection.close()
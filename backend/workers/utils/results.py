@@ -0,0 +1,101 @@
+"""
+Incremental Result Streaming
+Workers publish results in numbered chunks while a job runs
+
+Chunk message:
+    {<job header>, "attempt": nonce, "seq": 0.., "final": false, "items": [...]}
+Completion marker (last seq of the job):
+    {<job header>, "seq": n, "final": true, "status": "COMPLETED"|"FAILED",
+     "total_items": k, "summary": {...}, "error": null}
+
+The API side applies chunks as they arrive and de-duplicates on
+(run_id, job_id, attempt, seq), so redelivered chunks are harmless.
+Every stream gets a fresh attempt nonce: when a job message is
+redelivered and rerun, seq restarts at 0 under a new attempt and the
+API drops the abandoned attempt's partial state instead of mistaking
+the rerun's chunks for duplicates.
+"""
+
+import logging
+import time
+import uuid
+
+from config.settings import settings
+from utils.queue import publish_message
+
+logger = logging.getLogger(__name__)
+
+# Only ASM results have an API consumer (utils/results_consumer.py)
+RESULTS_QUEUES = {
+    "asm": "asm.results",
+}
+
+
+class ResultStream:
+    """
+    Buffers result items and publishes a chunk every RESULTS_CHUNK_SIZE
+    items or RESULTS_FLUSH_INTERVAL seconds (checked on add), so the
+    worker never holds more than one chunk in memory.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        header: dict,
+        chunk_size: int | None = None,
+        flush_interval: float | None = None,
+    ):
+        self.queue_name = RESULTS_QUEUES[kind]
+        self.header = header
+        self.chunk_size = chunk_size or settings.RESULTS_CHUNK_SIZE
+        self.flush_interval = flush_interval or settings.RESULTS_FLUSH_INTERVAL
+
+        self.attempt = uuid.uuid4().hex
+        self.seq = 0
+        self.total_items = 0
+        self._buffer: list = []
+        self._last_flush = time.monotonic()
+        self.closed = False
+
+    async def _publish(self, message: dict):
+        if not await publish_message(self.queue_name, {**self.header, "attempt": self.attempt, **message}):
+            raise ConnectionError(f"Failed to publish results to {self.queue_name}")
+        self.seq += 1
+        self._last_flush = time.monotonic()
+
+    async def add(self, item: dict):
+        self._buffer.append(item)
+        self.total_items += 1
+
+        if (
+            len(self._buffer) >= self.chunk_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            await self.flush()
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        items, self._buffer = self._buffer, []
+        await self._publish({"seq": self.seq, "final": False, "items": items})
+
+    async def complete(self, status: str = "COMPLETED", summary: dict | None = None, error: str | None = None):
+        """
+        Flush what is left and publish the completion marker
+        """
+        if self.closed:
+            return
+        await self.flush()
+        await self._publish({
+            "seq": self.seq,
+            "final": True,
+            "status": status,
+            "total_items": self.total_items,
+            "summary": summary or {},
+            "error": error,
+        })
+        self.closed = True
+        logger.info(
+            "Result stream %s closed: %s, %d items in %d chunks",
+            self.header.get("job_id"), status, self.total_items, self.seq,
+        )
@@ -0,0 +1,133 @@
+"""
+Delayed Retry / Dead-Letter Topology (ASYNC)
+
+For a work queue `Q` this declares:
+    Q.retry.<delay>s   TTL queues that dead-letter back into Q
+    Q.dead             final dead-letter queue
+
+A failed message is republished to the next retry tier with an
+incremented `x-retry-count` header and the original delivery is acked,
+so failures never loop straight back to the head of Q.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+import aio_pika
+from config.settings import settings
+from utils.metrics import registry
+from utils.queue import get_channel_pool, ensure_queue
+
+logger = logging.getLogger(__name__)
+
+RETRY_COUNT_HEADER = "x-retry-count"
+LAST_ERROR_HEADER = "x-last-error"
+FIRST_FAILED_HEADER = "x-first-failed-at"
+ORIGIN_QUEUE_HEADER = "x-origin-queue"
+
+
+def retry_delays() -> list[int]:
+    """
+    Retry tier delays in seconds, e.g. QUEUE_RETRY_DELAYS="5,30,120,600"
+    """
+    return [int(d) for d in settings.QUEUE_RETRY_DELAYS.split(",") if d.strip()]
+
+
+def retry_queue_name(queue_name: str, delay: int) -> str:
+    return f"{queue_name}.retry.{delay}s"
+
+
+def dead_letter_queue_name(queue_name: str) -> str:
+    return f"{queue_name}.dead"
+
+
+def _retry_queue_arguments(queue_name: str, delay: int) -> dict:
+    return {
+        "x-message-ttl": delay * 1000,
+        "x-dead-letter-exchange": "",
+        "x-dead-letter-routing-key": queue_name,
+    }
+
+
+# ---------------------------------------------------
+# Declare topology
+# ---------------------------------------------------
+async def declare_retry_topology(channel, queue_name: str):
+    """
+    Declare retry tiers and the dead-letter queue for `queue_name`
+    """
+    for delay in retry_delays():
+        await ensure_queue(
+            channel,
+            retry_queue_name(queue_name, delay),
+            arguments=_retry_queue_arguments(queue_name, delay),
+        )
+    await ensure_queue(channel, dead_letter_queue_name(queue_name))
+
+
+def get_retry_count(message) -> int:
+    try:
+        return int((message.headers or {}).get(RETRY_COUNT_HEADER, 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+# ---------------------------------------------------
+# Route a failed delivery
+# ---------------------------------------------------
+async def route_failed_message(
+    queue_name: str,
+    message,
+    error: Exception,
+    retryable: bool = True,
+) -> str:
+    """
+    Republish a failed delivery to its next retry tier, or to the
+    dead-letter queue once QUEUE_MAX_RETRIES is exhausted (or the error
+    is not retryable). The caller acks the original delivery afterwards.
+
+    Returns the queue the message was routed to.
+    """
+    retry_count = get_retry_count(message)
+    delays = retry_delays()
+
+    headers = dict(message.headers or {})
+    headers[RETRY_COUNT_HEADER] = retry_count + 1
+    headers[LAST_ERROR_HEADER] = f"{type(error).__name__}: {error}"[:512]
+    headers[ORIGIN_QUEUE_HEADER] = queue_name
+    headers.setdefault(FIRST_FAILED_HEADER, datetime.now(timezone.utc).isoformat())
+
+    if retryable and delays and retry_count < settings.QUEUE_MAX_RETRIES:
+        delay = delays[min(retry_count, len(delays) - 1)]
+        target = retry_queue_name(queue_name, delay)
+        arguments = _retry_queue_arguments(queue_name, delay)
+        registry.counter(f"consumer.{queue_name}.retried").inc()
+    else:
+        target = dead_letter_queue_name(queue_name)
+        arguments = None
+        registry.counter(f"consumer.{queue_name}.dead_lettered").inc()
+
+    pool = get_channel_pool()
+    channel = await pool.acquire()
+    failed = True
+    try:
+        await ensure_queue(channel, target, arguments=arguments)
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                headers=headers,
+                content_type=message.content_type,
+                message_id=message.message_id,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=target,
+        )
+        failed = False
+    finally:
+        pool.release(channel, discard=failed)
+
+    logger.warning(
+        "Message on %s failed (attempt %d), routed to %s",
+        queue_name, retry_count + 1, target,
+    )
+    return target
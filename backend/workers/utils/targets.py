@@ -0,0 +1,286 @@
+"""
+Discovery Target Sets
+Canonical domains plus IPs held as merged integer intervals
+
+Accepted forms:
+    example.com, https://Example.com:8443/path, *.example.com   -> example.com
+    10.0.0.1, 10.0.0.0/24, 10.0.0.1-10.0.0.50, 10.0.0.1-50, 2001:db8::/64
+
+Addresses are never materialized: a /8 is one (start, end) pair, and
+membership / overlap are bisect and merge walks over sorted intervals.
+hosts() and split() iterate lazily.
+"""
+
+import ipaddress
+import re
+from bisect import bisect_right
+from itertools import islice
+
+_LABEL = re.compile(r"^(?!-)[a-z0-9_-]{1,63}(?<!-)$")
+_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*://")
+
+
+# ---------------------------------------------------
+# Interval set
+# ---------------------------------------------------
+class IntervalSet:
+    """
+    Disjoint, sorted, inclusive [start, end] integer intervals;
+    adjacent or overlapping input intervals are merged
+    """
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, intervals=()):
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        for start, end in sorted(intervals):
+            if self.ends and start <= self.ends[-1] + 1:
+                if end > self.ends[-1]:
+                    self.ends[-1] = end
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def __bool__(self) -> bool:
+        return bool(self.starts)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, IntervalSet) and self.starts == other.starts and self.ends == other.ends
+
+    def __contains__(self, value: int) -> bool:
+        return self.covers(value, value)
+
+    def covers(self, start: int, end: int) -> bool:
+        # Merged intervals are maximal, so a covered range sits in one of them
+        i = bisect_right(self.starts, start) - 1
+        return i >= 0 and end <= self.ends[i]
+
+    @property
+    def size(self) -> int:
+        return sum(end - start + 1 for start, end in self)
+
+    def overlaps(self, other: "IntervalSet") -> bool:
+        i = j = 0
+        while i < len(self.starts) and j < len(other.starts):
+            if self.ends[i] < other.starts[j]:
+                i += 1
+            elif other.ends[j] < self.starts[i]:
+                j += 1
+            else:
+                return True
+        return False
+
+    def __or__(self, other: "IntervalSet") -> "IntervalSet":
+        return IntervalSet([*self, *other])
+
+    def __and__(self, other: "IntervalSet") -> "IntervalSet":
+        out = []
+        i = j = 0
+        while i < len(self.starts) and j < len(other.starts):
+            start = max(self.starts[i], other.starts[j])
+            end = min(self.ends[i], other.ends[j])
+            if start <= end:
+                out.append((start, end))
+            if self.ends[i] < other.ends[j]:
+                i += 1
+            else:
+                j += 1
+        return IntervalSet(out)
+
+    def values(self):
+        for start, end in self:
+            yield from range(start, end + 1)
+
+
+# ---------------------------------------------------
+# Parsing
+# ---------------------------------------------------
+def canonical_domain(text: str) -> str:
+    name = _SCHEME.sub("", text.strip().lower())
+    name = name.split("/", 1)[0].split("?", 1)[0].rsplit("@", 1)[-1]
+    name = name.rsplit(":", 1)[0] if name.count(":") == 1 else name
+    name = name.rstrip(".")
+    if name.startswith("*."):
+        name = name[2:]
+    try:
+        name = name.encode("idna").decode("ascii")
+    except UnicodeError:
+        raise ValueError(f"Invalid domain: {text!r}") from None
+
+    labels = name.split(".")
+    # A numeric TLD means a mangled address (e.g. 1.2.3.4/40), not a name
+    if (
+        len(name) > 253 or len(labels) < 2 or labels[-1].isdigit()
+        or not all(_LABEL.match(label) for label in labels)
+    ):
+        raise ValueError(f"Invalid domain: {text!r}")
+    return name
+
+
+def parse_target(text: str) -> tuple:
+    """
+    ("domain", name) or ("ip", version, start, end)
+    """
+    value = text.strip()
+    if not value:
+        raise ValueError("Empty target")
+
+    if "/" in value and not _SCHEME.match(value.lower()):
+        try:
+            network = ipaddress.ip_network(value, strict=False)
+        except ValueError:
+            pass
+        else:
+            return "ip", network.version, int(network.network_address), int(network.broadcast_address)
+
+    if "-" in value:
+        first, _, last = value.partition("-")
+        try:
+            start = ipaddress.ip_address(first.strip())
+        except ValueError:
+            pass
+        else:
+            last = last.strip()
+            if last.isdigit() and start.version == 4:
+                # 10.0.0.1-50: last octet only
+                end = ipaddress.ip_address(first.strip().rsplit(".", 1)[0] + "." + last)
+            else:
+                end = ipaddress.ip_address(last)
+            if end.version != start.version or end < start:
+                raise ValueError(f"Invalid address range: {text!r}")
+            return "ip", start.version, int(start), int(end)
+
+    try:
+        address = ipaddress.ip_address(value.strip("[]"))
+    except ValueError:
+        return "domain", canonical_domain(value)
+    return "ip", address.version, int(address), int(address)
+
+
+def _render(version: int, start: int, end: int) -> str:
+    first = ipaddress.ip_address(start) if version == 4 else ipaddress.IPv6Address(start)
+    if start == end:
+        return str(first)
+    last = ipaddress.ip_address(end) if version == 4 else ipaddress.IPv6Address(end)
+    networks = list(islice(ipaddress.summarize_address_range(first, last), 2))
+    if len(networks) == 1:
+        return str(networks[0])
+    return f"{first}-{last}"
+
+
+# ---------------------------------------------------
+# Target set
+# ---------------------------------------------------
+class TargetSet:
+    def __init__(self, domains=(), ipv4: IntervalSet | None = None, ipv6: IntervalSet | None = None):
+        self.domains: dict[str, None] = dict.fromkeys(domains)
+        self.ipv4 = ipv4 or IntervalSet()
+        self.ipv6 = ipv6 or IntervalSet()
+
+    @classmethod
+    def parse(cls, items, strict: bool = True) -> "TargetSet":
+        """
+        Parse and merge raw target strings. With strict, any invalid entry
+        raises ValueError (naming up to five of them); otherwise they are
+        dropped.
+        """
+        domains = []
+        intervals = {4: [], 6: []}
+        invalid = []
+        for item in items:
+            try:
+                parsed = parse_target(item)
+            except ValueError:
+                invalid.append(item)
+                continue
+            if parsed[0] == "domain":
+                domains.append(parsed[1])
+            else:
+                intervals[parsed[1]].append(parsed[2:])
+
+        if strict and invalid:
+            shown = ", ".join(repr(item) for item in invalid[:5])
+            raise ValueError(f"{len(invalid)} invalid targets: {shown}")
+        return cls(domains, IntervalSet(intervals[4]), IntervalSet(intervals[6]))
+
+    def _family(self, version: int) -> IntervalSet:
+        return self.ipv4 if version == 4 else self.ipv6
+
+    def __contains__(self, target: str) -> bool:
+        try:
+            parsed = parse_target(target)
+        except ValueError:
+            return False
+        if parsed[0] == "domain":
+            return parsed[1] in self.domains
+        _, version, start, end = parsed
+        return self._family(version).covers(start, end)
+
+    def overlaps(self, other: "TargetSet") -> bool:
+        return (
+            not self.domains.keys().isdisjoint(other.domains)
+            or self.ipv4.overlaps(other.ipv4)
+            or self.ipv6.overlaps(other.ipv6)
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.domains or self.ipv4 or self.ipv6)
+
+    @property
+    def address_count(self) -> int:
+        return self.ipv4.size + self.ipv6.size
+
+    @property
+    def count(self) -> int:
+        """Domains + addresses (IPv6 ranges can exceed sys.maxsize, so not __len__)"""
+        return len(self.domains) + self.address_count
+
+    def _blocks(self):
+        for version in (4, 6):
+            for start, end in self._family(version):
+                yield version, start, end
+
+    def canonical(self) -> list[str]:
+        """
+        Compact form: domains, then one CIDR / range per merged interval
+        """
+        return [*self.domains, *(_render(*block) for block in self._blocks())]
+
+    def hosts(self):
+        """
+        Lazily yield every domain, then every address as a string
+        """
+        yield from self.domains
+        for version, start, end in self._blocks():
+            cls = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+            for value in range(start, end + 1):
+                yield str(cls(value))
+
+    def split(self, size: int):
+        """
+        Lazily yield lists of canonical target strings covering at most
+        `size` hosts each (ranges are cut, not expanded)
+        """
+        shard, room = [], size
+        for domain in self.domains:
+            shard.append(domain)
+            room -= 1
+            if not room:
+                yield shard
+                shard, room = [], size
+
+        for version, start, end in self._blocks():
+            while start <= end:
+                stop = min(end, start + room - 1)
+                shard.append(_render(version, start, stop))
+                room -= stop - start + 1
+                start = stop + 1
+                if not room:
+                    yield shard
+                    shard, room = [], size
+        if shard:
+            yield shard
@@ -6,8 +6,18 @@ Runs in background, processes scan jobs from queue
 
 import asyncio
 import logging
+import os
 from typing import Dict, List
 
+from config.settings import settings
+from checks import CheckEngine, load_engine
+from discovery import PortScanner, ports_for_intensity, fingerprint
+from scanners import get_parse_pool, close_parse_pool
+from vulndb import open_index, service_cves
+from utils.pipeline import Defer, Pipeline, Stage
+from utils.politeness import get_target_slots, close_target_slots
+from utils.targets import TargetSet
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -22,36 +32,155 @@ class VSScannerWorker:
     
     def __init__(self):
         self.running = True
-    
-    async def process_scan_job(self, scan_id: str, target: str, scan_type: str):
-        """Process a vulnerability scan - actual hardcore work"""
-        logger.info(f"Processing VS scan {scan_id} for target {target}")
-        
-        # TODO: Actual scanning logic
-        # - Port scanning (nmap)
-        # - Service version detection
-        # - CVE checking
-        # - Exploitability scoring
-        # - MITRE ATT&CK mapping
-        
-        # Simulate work
-        await asyncio.sleep(10)
-        
-        # Scan results
-        vulnerabilities = [
+        self.cve_index = open_index(settings.CVE_INDEX_PATH)
+        self.check_engine = self._load_checks()
+        self.scanner = PortScanner()
+        self.slots = get_target_slots()
+
+    def _load_checks(self) -> CheckEngine | None:
+        if not os.path.exists(settings.CHECKS_PATH):
+            logger.warning(f"Signatures {settings.CHECKS_PATH} not found, response checks disabled")
+            return None
+        return load_engine(settings.CHECKS_PATH, settings.CHECKS_CACHE_DIR)
+
+    def run_checks(self, host: str, port: int, protocol: str, response: dict) -> List[dict]:
+        """
+        Signature checks against one response ({"body", "header", "banner"})
+        """
+        if self.check_engine is None:
+            return []
+        return [
+            {**finding, "host": host}
+            for finding in self.check_engine.match(response, port, protocol)
+        ]
+
+    def _service_checks(self, service: dict) -> List[dict]:
+        # nmap NSE output, or the banner the live fingerprint grabbed
+        scripts = service.get("scripts") or {}
+        response = {
+            "banner": scripts.get("banner", service.get("banner") or ""),
+            "header": scripts.get("http-headers", ""),
+            "body": scripts.get("http-title", ""),
+        }
+        if not any(response.values()):
+            return []
+        protocol = "http" if "http" in (service.get("service") or "") else "tcp"
+        return self.run_checks(service["host"], service["port"], protocol, response)
+
+    def correlate(self, service: dict) -> List[dict]:
+        """
+        CVEs affecting a fingerprinted service, matched on its CPEs
+        """
+        if self.cve_index is None:
+            return []
+        return [
             {
-                "cve": "CVE-2024-0001",
-                "severity": "critical",
-                "exploitability_score": 9.8,
-                "description": "Remote code execution vulnerability",
-                "remediation": "Update to version 2.0.1"
+                "source": "cve_index",
+                "kind": "vulnerability",
+                "host": service.get("host"),
+                "port": service.get("port"),
+                "cpe": match["cpe"],
+                "vuln_id": match["cve"],
+                "severity": match["severity"],
+                "cvss_score": match["cvss_score"],
             }
+            for match in service_cves(self.cve_index, service)
         ]
-        
+
+    async def iter_findings(self, reports: List[tuple]):
+        """
+        Stream normalized records out of scanner reports.
+
+        reports: [(kind, path)] with kind "nmap" (XML, -oX) or "trivy" (JSON).
+        Parsing runs in the process pool; records arrive in batches so a
+        /16 sweep never sits in this process all at once. Every service
+        record is followed by its matched CVEs and signature hits.
+        """
+        pool = get_parse_pool()
+        for kind, path in reports:
+            async for record in pool.stream(kind, path):
+                yield record
+                if record["kind"] == "service":
+                    for finding in self.correlate(record):
+                        yield finding
+                    for finding in self._service_checks(record):
+                        yield finding
+
+    def build_pipeline(self, scan_type: str) -> Pipeline:
+        """
+        probe (ports) -> fingerprint (banners, probes) -> assess (CVE index, checks)
+        Live counterpart of iter_findings: every fingerprinted service is
+        matched against the CVE index and the response signatures.
+        """
+        ports = ports_for_intensity(scan_type)
+
+        async def probe(host):
+            async for result in self.scanner.scan([host], ports):
+                yield result
+
+        async def identify(result):
+            # A busy host group is set aside; other hosts' ports go first
+            if self.slots is not None and not await self.slots.try_acquire(result["host"]):
+                raise Defer(settings.POLITENESS_RETRY_DELAY)
+            try:
+                service = await fingerprint(result["host"], result["port"])
+            finally:
+                if self.slots is not None:
+                    self.slots.release(result["host"])
+            yield {**service, "kind": "service"}
+
+        async def assess(service):
+            for finding in self.correlate(service):
+                yield finding
+            for finding in self._service_checks(service):
+                yield finding
+
+        queue_size = settings.PIPELINE_QUEUE_SIZE
+        return Pipeline("vs", [
+            Stage("probe", probe, concurrency=1, queue_size=queue_size),
+            Stage("fingerprint", identify, settings.PIPELINE_FINGERPRINT_CONCURRENCY, queue_size),
+            Stage("assess", assess, concurrency=1, queue_size=queue_size),
+        ])
+
+    async def process_scan_job(
+        self,
+        scan_id: str,
+        target: str,
+        scan_type: str,
+        reports: List[tuple] | None = None,
+    ):
+        """
+        Process a vulnerability scan - actual hardcore work
+
+        Scanner reports are parsed when given; otherwise the target is
+        scanned live. Either way every service is correlated with the
+        CVE index and checks, and the findings are returned.
+        """
+        logger.info(f"Processing VS scan {scan_id} for target {target}")
+
+        if reports:
+            counts: Dict[str, int] = {}
+            vulnerabilities = []
+            async for record in self.iter_findings(reports):
+                counts[record["kind"]] = counts.get(record["kind"], 0) + 1
+                if record["kind"] == "vulnerability":
+                    vulnerabilities.append(record)
+
+            logger.info(f"Scan {scan_id} completed. Parsed {counts}")
+            return vulnerabilities
+
+        counts = {}
+        vulnerabilities = []
+        hosts = TargetSet.parse([target], strict=False).hosts()
+        async for stage, record in self.build_pipeline(scan_type).run(hosts):
+            counts[stage] = counts.get(stage, 0) + 1
+            if record.get("kind") == "vulnerability":
+                vulnerabilities.append(record)
+
         # TODO: Save to database
-        logger.info(f"Scan {scan_id} completed. Found {len(vulnerabilities)} vulnerabilities")
+        logger.info(f"Scan {scan_id} completed. {counts}, {len(vulnerabilities)} vulnerabilities")
         return vulnerabilities
-    
+
     async def run(self):
         """Main worker loop"""
         logger.info("VS Scanner Worker started")
@@ -61,6 +190,10 @@ class VSScannerWorker:
             # if scan:
             #     await self.process_scan_job(scan.id, scan.target, scan.type)
             await asyncio.sleep(1)
+        close_parse_pool()
+        await close_target_slots()
+        if self.cve_index is not None:
+            self.cve_index.close()
 
 if __name__ == "__main__":
     worker = VSScannerWorker()
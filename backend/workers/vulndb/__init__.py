@@ -0,0 +1,13 @@
+"""
+Offline vulnerability data used by the VS worker
+"""
+
+from .cve_index import CveIndex, open_index, service_cves, parse_cpe, version_key
+
+__all__ = [
+    "CveIndex",
+    "open_index",
+    "service_cves",
+    "parse_cpe",
+    "version_key",
+]
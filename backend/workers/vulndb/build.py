@@ -0,0 +1,276 @@
+"""
+CVE Index Builder
+Compiles local NVD JSON feeds into the memory-mapped index read by CveIndex
+
+Accepts NVD 1.1 yearly feeds (CVE_Items) and NVD API 2.0 dumps
+(vulnerabilities), plain or .gz. Feeds are streamed item by item.
+
+Usage:
+    cd backend/workers
+    python -m vulndb.build --out data/cve.idx feeds/nvdcve-1.1-*.json.gz
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import time
+
+from scanners.trivy import iter_json_array
+from .cve_index import (
+    MAGIC, FORMAT_VERSION, HEADER, PRODUCT, BREAKPOINT, RUN, CVE_ID, CVE,
+    SEVERITIES, ANY_VERSIONS, parse_cpe, version_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------
+# Feed readers -> (cve_id, score, severity, [cpe match dicts])
+# ---------------------------------------------------
+def _open_feed(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _walk_nodes(nodes: list, key: str):
+    for node in nodes or ():
+        yield from node.get(key) or ()
+        yield from _walk_nodes(node.get("children"), key)
+
+
+def _read_v11(item: dict):
+    cve_id = item["cve"]["CVE_data_meta"]["ID"]
+    impact = item.get("impact") or {}
+    v3 = (impact.get("baseMetricV3") or {}).get("cvssV3") or {}
+    v2 = impact.get("baseMetricV2") or {}
+    score = v3.get("baseScore", (v2.get("cvssV2") or {}).get("baseScore"))
+    severity = v3.get("baseSeverity") or v2.get("severity")
+
+    matches = [
+        {**match, "criteria": match.get("cpe23Uri", "")}
+        for match in _walk_nodes((item.get("configurations") or {}).get("nodes"), "cpe_match")
+    ]
+    return cve_id, score, severity, matches
+
+
+def _read_v20(item: dict):
+    cve = item["cve"]
+    score = severity = None
+    metrics = cve.get("metrics") or {}
+    for name in ("cvssMetricV31", "cvssMetricV30", "cvssMetricV2"):
+        if metrics.get(name):
+            metric = metrics[name][0]
+            score = metric["cvssData"].get("baseScore")
+            severity = metric["cvssData"].get("baseSeverity") or metric.get("baseSeverity")
+            break
+
+    matches = []
+    for config in cve.get("configurations") or ():
+        matches += _walk_nodes(config.get("nodes"), "cpeMatch")
+    return cve["id"], score, severity, matches
+
+
+def iter_feed(path: str):
+    with _open_feed(path) as fh:
+        head = fh.read(1 << 16)
+        fh.seek(0)
+        if '"CVE_Items"' in head:
+            key, reader = "CVE_Items", _read_v11
+        else:
+            key, reader = "vulnerabilities", _read_v20
+        for item in iter_json_array(fh, key):
+            yield reader(item)
+
+
+# ---------------------------------------------------
+# Intervals -> elementary segments -> runs
+# ---------------------------------------------------
+def _interval(match: dict):
+    """
+    (product_key, lo, lo_inclusive, hi, hi_inclusive) with None for unbounded
+    """
+    parsed = parse_cpe(match.get("criteria", ""))
+    if parsed is None:
+        return None
+    vendor, product, version = parsed
+    key = f"{vendor}:{product}"
+
+    if version not in ANY_VERSIONS:
+        point = version_key(version)
+        return key, point, True, point, True
+
+    lo = hi = None
+    lo_incl = hi_incl = True
+    if match.get("versionStartIncluding"):
+        lo = version_key(match["versionStartIncluding"])
+    elif match.get("versionStartExcluding"):
+        lo, lo_incl = version_key(match["versionStartExcluding"]), False
+    if match.get("versionEndIncluding"):
+        hi = version_key(match["versionEndIncluding"])
+    elif match.get("versionEndExcluding"):
+        hi, hi_incl = version_key(match["versionEndExcluding"]), False
+    return key, lo, lo_incl, hi, hi_incl
+
+
+def build_runs(intervals: list) -> tuple[list[bytes], list[tuple[int, tuple]]]:
+    """
+    intervals: [(lo, lo_incl, hi, hi_incl, cve_index)]
+    Returns the sorted breakpoints and [(segment_start, cve_indexes)].
+    Segment 2i is the gap before breakpoint i, 2i+1 is breakpoint i itself.
+    """
+    breakpoints = sorted({v for lo, _, hi, _, _ in intervals for v in (lo, hi) if v is not None})
+    position = {v: i for i, v in enumerate(breakpoints)}
+    last = 2 * len(breakpoints)
+
+    starts: dict[int, list] = {}
+    ends: dict[int, list] = {}
+    for lo, lo_incl, hi, hi_incl, cve in intervals:
+        s = 0 if lo is None else 2 * position[lo] + (1 if lo_incl else 2)
+        e = last if hi is None else 2 * position[hi] + (1 if hi_incl else 0)
+        if s > e:
+            continue
+        starts.setdefault(s, []).append(cve)
+        ends.setdefault(e + 1, []).append(cve)
+
+    runs = []
+    active: dict[int, int] = {}
+    for segment in sorted(set(starts) | set(ends)):
+        if segment > last:
+            break
+        for cve in ends.get(segment, ()):
+            active[cve] -= 1
+            if not active[cve]:
+                del active[cve]
+        for cve in starts.get(segment, ()):
+            active[cve] = active.get(cve, 0) + 1
+
+        cves = tuple(sorted(active))
+        if runs and runs[-1][1] == cves:
+            continue
+        if not runs and not cves:
+            continue
+        runs.append((segment, cves))
+    return breakpoints, runs
+
+
+# ---------------------------------------------------
+# Writer
+# ---------------------------------------------------
+class _Strings:
+    def __init__(self):
+        self.blob = bytearray()
+        self._seen: dict[bytes, int] = {}
+
+    def add(self, value: bytes) -> tuple[int, int]:
+        offset = self._seen.get(value)
+        if offset is None:
+            offset = self._seen[value] = len(self.blob)
+            self.blob += value
+        return offset, len(value)
+
+
+def build_index(feeds: list[str], out_path: str) -> dict:
+    started = time.perf_counter()
+    cves: list[tuple[str, float | None, str | None]] = []
+    cve_ids: dict[str, int] = {}
+    products: dict[str, list] = {}
+
+    for path in feeds:
+        for cve_id, score, severity, matches in iter_feed(path):
+            index = None
+            for match in matches:
+                if not match.get("vulnerable", True):
+                    continue
+                interval = _interval(match)
+                if interval is None:
+                    continue
+                if index is None:
+                    index = cve_ids.get(cve_id)
+                    if index is None:
+                        index = cve_ids[cve_id] = len(cves)
+                        cves.append((cve_id, score, severity))
+                key, lo, lo_incl, hi, hi_incl = interval
+                products.setdefault(key, []).append((lo, lo_incl, hi, hi_incl, index))
+        logger.info("Read %s (%d CVEs so far)", path, len(cves))
+
+    strings = _Strings()
+    product_table = bytearray()
+    breakpoint_table = bytearray()
+    run_table = bytearray()
+    run_cves = bytearray()
+    shared_lists: dict[tuple, int] = {}
+    total_runs = total_breakpoints = 0
+
+    for key in sorted(products):
+        breakpoints, runs = build_runs(products[key])
+        key_off, key_len = strings.add(key.encode())
+        product_table += PRODUCT.pack(key_off, key_len, total_breakpoints, len(breakpoints), total_runs, len(runs))
+
+        for value in breakpoints:
+            breakpoint_table += BREAKPOINT.pack(*strings.add(value))
+        for segment, members in runs:
+            # Identical CVE sets (common across neighbouring runs) are stored once
+            start = shared_lists.get(members)
+            if start is None:
+                start = shared_lists[members] = len(run_cves) // CVE_ID.size
+                for member in members:
+                    run_cves += CVE_ID.pack(member)
+            run_table += RUN.pack(segment, start, len(members))
+
+        total_breakpoints += len(breakpoints)
+        total_runs += len(runs)
+
+    cve_table = bytearray()
+    for cve_id, score, severity in cves:
+        off, length = strings.add(cve_id.encode())
+        level = (severity or "unknown").lower()
+        cve_table += CVE.pack(
+            off, length,
+            int(round((score or 0) * 10)),
+            SEVERITIES.index(level) if level in SEVERITIES else 0,
+        )
+
+    sections = [product_table, breakpoint_table, run_table, run_cves, cve_table, strings.blob]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(products), len(cves), *offsets))
+        for section in sections:
+            fh.write(section)
+    # Readers mapping the old file keep their view; new opens see the new one
+    os.replace(tmp_path, out_path)
+
+    return {
+        "products": len(products),
+        "cves": len(cves),
+        "breakpoints": total_breakpoints,
+        "runs": total_runs,
+        "bytes": position,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the CPE -> CVE index from NVD JSON feeds")
+    parser.add_argument("feeds", nargs="+", help="NVD 1.1 feeds or API 2.0 dumps (.json / .json.gz)")
+    parser.add_argument("--out", required=True, help="index file to write")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    stats = build_index(args.feeds, args.out)
+    print(
+        f"{args.out}: {stats['products']} products, {stats['cves']} CVEs, "
+        f"{stats['runs']} runs, {stats['bytes'] / 2**20:.1f} MB in {stats['seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
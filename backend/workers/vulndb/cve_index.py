@@ -0,0 +1,223 @@
+"""
+Memory-mapped CPE -> CVE Index
+Offline-built, read-only lookup of vendor:product + version to CVEs
+
+Each product's version line is cut at every interval endpoint into
+elementary segments (gap before v0, point v0, gap, point v1, ...).
+Runs of consecutive segments covered by the same CVE set are stored
+once, so a lookup is two binary searches over the mapped file:
+
+    version -> segment (bisect over sorted version keys)
+    segment -> run     (bisect over run starts) -> CVE ids
+
+File layout (little endian, all sections fixed-size records except strings):
+    header     magic, format, product/cve counts, section offsets
+    products   key_off u32, key_len u16, bp_start u32, bp_count u32, run_start u32, run_count u32
+    breakpts   key_off u32, key_len u16                 (sorted per product)
+    runs       seg_start u32, cve_start u32, cve_count u32
+    run_cves   cve index u32
+    cves       id_off u32, id_len u16, score*10 u16, severity u8
+    strings    utf-8 product keys, CVE ids, binary version keys
+"""
+
+import logging
+import mmap
+import os
+import re
+import struct
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CVEIDX\x00\x01"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sIII6Q")
+PRODUCT = struct.Struct("<IHIIII")
+BREAKPOINT = struct.Struct("<IH")
+RUN = struct.Struct("<III")
+CVE_ID = struct.Struct("<I")
+CVE = struct.Struct("<IHHB")
+
+SEVERITIES = ["unknown", "low", "medium", "high", "critical"]
+
+# Versions that mean "any" / "not applicable" in CPE names
+ANY_VERSIONS = {"", "*", "-"}
+
+_VERSION_PART = re.compile(r"\d+|[a-z]+")
+
+
+# ---------------------------------------------------
+# Version keys
+# ---------------------------------------------------
+def version_key(version: str) -> bytes:
+    """
+    Byte string whose bytewise order follows version order:
+    numbers compare numerically (length-prefixed), letters compare as
+    text, and a prefix sorts first (1.0 < 1.0.1 < 1.0.1a).
+    """
+    key = bytearray()
+    for part in _VERSION_PART.findall(version.lower()):
+        if part.isdigit():
+            digits = part.lstrip("0") or "0"
+            key += b"\x02" + bytes([min(len(digits), 255)]) + digits.encode()
+        else:
+            key += b"\x01" + part.encode() + b"\x00"
+    return bytes(key)
+
+
+def parse_cpe(cpe: str) -> tuple[str, str, str] | None:
+    """
+    (vendor, product, version) from a CPE 2.3 formatted string
+    (cpe:2.3:a:openbsd:openssh:8.9:...) or a CPE 2.2 URI (cpe:/a:openbsd:openssh:8.9p1)
+    """
+    if cpe.startswith("cpe:2.3:"):
+        parts = cpe[8:].split(":")
+    elif cpe.startswith("cpe:/"):
+        parts = cpe[5:].split(":")
+    else:
+        return None
+    if len(parts) < 3:
+        return None
+    version = parts[3] if len(parts) > 3 else "*"
+    return parts[1].lower(), parts[2].lower(), version.replace("\\", "")
+
+
+# ---------------------------------------------------
+# Reader
+# ---------------------------------------------------
+class CveIndex:
+    """
+    Read-only view over an index file; safe to share across coroutines
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic, fmt, self.product_count, self.cve_count,
+            self._products, self._breakpoints, self._runs,
+            self._run_cves, self._cves, self._strings,
+        ) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a CVE index (format {FORMAT_VERSION})")
+
+    def close(self):
+        self._mm.close()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _string(self, offset: int, length: int) -> bytes:
+        start = self._strings + offset
+        return self._mm[start:start + length]
+
+    def _find_product(self, key: bytes):
+        lo, hi = 0, self.product_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = PRODUCT.unpack_from(self._mm, self._products + mid * PRODUCT.size)
+            name = self._string(entry[0], entry[1])
+            if name < key:
+                lo = mid + 1
+            elif name > key:
+                hi = mid
+            else:
+                return entry
+        return None
+
+    def _segment(self, bp_start: int, bp_count: int, key: bytes) -> int:
+        # bisect_left over this product's breakpoints
+        lo, hi = 0, bp_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            off, length = BREAKPOINT.unpack_from(self._mm, self._breakpoints + (bp_start + mid) * BREAKPOINT.size)
+            if self._string(off, length) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo < bp_count:
+            off, length = BREAKPOINT.unpack_from(self._mm, self._breakpoints + (bp_start + lo) * BREAKPOINT.size)
+            if self._string(off, length) == key:
+                return 2 * lo + 1     # exactly on breakpoint lo
+        return 2 * lo                 # gap before breakpoint lo
+
+    def _run(self, run_start: int, run_count: int, segment: int):
+        # bisect_right over run starts, minus one
+        lo, hi = 0, run_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if RUN.unpack_from(self._mm, self._runs + (run_start + mid) * RUN.size)[0] <= segment:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+        return RUN.unpack_from(self._mm, self._runs + (run_start + lo - 1) * RUN.size)
+
+    def _cve(self, index: int) -> dict:
+        off, length, score, severity = CVE.unpack_from(self._mm, self._cves + index * CVE.size)
+        return {
+            "cve": self._string(off, length).decode(),
+            "cvss_score": score / 10 if score else None,
+            "severity": SEVERITIES[severity],
+        }
+
+    def lookup(self, vendor: str, product: str, version: str) -> list[dict]:
+        """
+        CVEs whose configurations include vendor:product at `version`.
+        Unknown versions ("", "*", "-") match nothing rather than everything.
+        """
+        if version in ANY_VERSIONS:
+            return []
+        entry = self._find_product(f"{vendor.lower()}:{product.lower()}".encode())
+        if entry is None:
+            return []
+
+        _, _, bp_start, bp_count, run_start, run_count = entry
+        segment = self._segment(bp_start, bp_count, version_key(version))
+        run = self._run(run_start, run_count, segment)
+        if run is None:
+            return []
+
+        _, cve_start, cve_count = run
+        return [
+            self._cve(CVE_ID.unpack_from(self._mm, self._run_cves + i * CVE_ID.size)[0])
+            for i in range(cve_start, cve_start + cve_count)
+        ]
+
+    def lookup_cpe(self, cpe: str) -> list[dict]:
+        parsed = parse_cpe(cpe)
+        if parsed is None:
+            return []
+        return self.lookup(*parsed)
+
+
+def open_index(path: str) -> CveIndex | None:
+    """
+    CveIndex for `path`, or None (logged) when it has not been built
+    """
+    if not os.path.exists(path):
+        logger.warning(
+            "CVE index %s not found, CVE matching disabled (build it with python -m vulndb.build)", path
+        )
+        return None
+    return CveIndex(path)
+
+
+def service_cves(index: CveIndex, service: dict) -> list[dict]:
+    """
+    CVEs for a fingerprinted service, looked up by each of its CPEs
+    """
+    found = {}
+    for cpe in service.get("cpe") or ():
+        for match in index.lookup_cpe(cpe):
+            found.setdefault(match["cve"], {**match, "cpe": cpe})
+    return list(found.values())